@@ -0,0 +1,114 @@
+import time
+
+class BranchSearchIndex:
+    # Indice di ricerca dei branch, costruito una volta per ogni inventario (vedi RepoState.branch_index).
+    # La query è divisa in parole (es. "feat login"): ogni parola deve comparire nel nome come
+    # sottosequenza di caratteri. Per ogni carattere l'indice tiene l'insieme dei nomi che lo contengono
+    # (un intero usato come bitset, creato al primo uso del carattere), così i candidati si ottengono
+    # con pochi AND prima di qualsiasi confronto.
+    # Ordinamento: prefisso > inizio di parola > sottostringa > sottosequenza, più un bonus per i branch
+    # con commit recenti. Una query che estende la precedente cerca solo tra i risultati precedenti.
+    PREFIX, WORD, SUBSTRING, SUBSEQUENCE = 3.0, 2.0, 1.5, 1.0
+    SEPARATORS = frozenset('/-_. ')
+    RECENCY_WEIGHT = 0.4  # minore dello scarto tra i livelli: la recenza decide solo a parità di corrispondenza
+    RECENCY_HALF_LIFE = 30 * 24 * 3600  # età (secondi) a cui il bonus si dimezza
+
+    def __init__(self, names, dates=None, now=None):
+        # names: nomi in ordine di preferenza a parità di punteggio (es. dal commit più recente)
+        # dates: nome -> data del commit (epoch), 0 o assente se sconosciuta
+        dates = dates or {}
+        now = now or time.time()
+        self.names = list(names)
+        self.lower = [n.lower() for n in self.names]
+        self.recency = []
+        for name in self.names:
+            date = dates.get(name) or 0
+            age = max(0.0, now - date)
+            self.recency.append(self.RECENCY_WEIGHT * self.RECENCY_HALF_LIFE / (self.RECENCY_HALF_LIFE + age) if date else 0.0)
+        self._chars = {}  # carattere -> bitset dei nomi che lo contengono, costruito al primo uso
+        self._last_terms = None
+        self._last_ids = None
+
+    @staticmethod
+    def _terms(query):
+        return query.lower().split()
+
+    def _char_bits(self, c):
+        bits = self._chars.get(c)
+        if bits is None:
+            # Cifra binaria i = 1 se il nome i contiene c (il nome 0 è il bit meno significativo)
+            bits = int('0' + ''.join('1' if c in name else '0' for name in reversed(self.lower)), 2)
+            self._chars[c] = bits
+        return bits
+
+    def _candidates(self, terms):
+        # Bitset dei nomi che contengono tutti i caratteri della query
+        bits = (1 << len(self.names)) - 1
+        for c in set(''.join(terms)):
+            bits &= self._char_bits(c)
+            if not bits:
+                break
+        return bits
+
+    def _narrows(self, terms):
+        # Vero se ogni parola della query precedente è contenuta nella parola corrispondente della nuova:
+        # i risultati nuovi sono allora un sottoinsieme dei precedenti
+        last = self._last_terms
+        if last is None or len(terms) < len(last):
+            return False
+        return all(old in new for old, new in zip(last, terms))
+
+    def _term_score(self, term, i):
+        # Punteggio di una parola sul nome i, 0 se non corrisponde
+        name = self.lower[i]
+        if name.startswith(term):
+            return self.PREFIX
+        pos = name.find(term)
+        if pos >= 0:
+            original = self.names[i]
+            while pos >= 0:
+                # Inizio di parola: dopo un separatore o maiuscola dopo minuscola (es. 'fixLogin')
+                before = original[pos - 1]
+                if before in self.SEPARATORS or (original[pos].isupper() and before.islower()):
+                    return self.WORD
+                pos = name.find(term, pos + 1)
+            return self.SUBSTRING
+        # Sottosequenza: penalità proporzionale ai caratteri saltati tra la prima e l'ultima lettera
+        start = pos = name.find(term[0])
+        if start < 0:
+            return 0.0
+        for c in term[1:]:
+            pos = name.find(c, pos + 1)
+            if pos < 0:
+                return 0.0
+        gaps = (pos - start + 1) - len(term)
+        return self.SUBSEQUENCE - 0.5 * gaps / len(name)
+
+    def search(self, query):
+        # Nomi corrispondenti alla query dal più pertinente; query vuota: tutti, nell'ordine originale
+        terms = self._terms(query)
+        if not terms:
+            self._last_terms, self._last_ids = None, None
+            return list(self.names)
+        if self._narrows(terms):
+            ids = self._last_ids
+        else:
+            bits = bin(self._candidates(terms))[:1:-1]  # cifra i = nome i
+            ids = [i for i, bit in enumerate(bits) if bit == '1']
+        scored = []
+        matched = []
+        term_score, recency, count = self._term_score, self.recency, len(terms)
+        for i in ids:
+            total = 0.0
+            for term in terms:
+                score = term_score(term, i)
+                if not score:
+                    break
+                total += score
+            else:
+                matched.append(i)
+                scored.append((-(total / count + recency[i]), len(self.lower[i]), i))
+        self._last_terms, self._last_ids = terms, matched
+        scored.sort()
+        return [self.names[i] for _, _, i in scored]
+
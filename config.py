@@ -1,6 +1,11 @@
 # --- File paths ---
 import os
 LAST_DIR_FILE = os.path.join(os.path.expanduser("~"), ".gitbash6dir")
+# Cache su disco dello stato delle repository usate di recente (vedi RepoStateCache)
+STATE_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".gitbash6cache.json")
+STATE_CACHE_VERSION = 1
+STATE_CACHE_SAVE_DELAY_MS = 2000  # accorpa i salvataggi ravvicinati
+STATE_CACHE_PREWARM = 3  # repository recenti riconvalidate in background all'avvio
 
 # --- App window configuration ---
 APP_TITLE = "Git Bash Automatico"
@@ -8,18 +13,43 @@ APP_GEOMETRY = "500x375"
 MAIN_PAD = 30
 
 # --- Caching configuration ---
-CACHE_TIMEOUT = 30.0  # seconds
+CACHE_TIMEOUT = 30.0  # seconds (solo se il watcher non può osservare la repository)
+# Fasi dell'avvio registrate in GitGuiApp.startup_timings
+STARTUP_PHASES = ('window', 'first_paint', 'state', 'status', 'github_user', 'branches', 'fetch')
+# Con questa variabile d'ambiente impostata il riepilogo dei tempi di avvio viene stampato
+STARTUP_TIMINGS_ENV = 'GITBASH6_STARTUP_TIMINGS'
+# Numero massimo di repository tenute nella cache di stato in memoria
+REPO_CACHE_SIZE = 8
 CACHE_DEFAULTS = {
-    'branch': None,
-    'origin': None,
-    'github_user': None,
-    'is_repo': None,
-    'cache_time': 0,
-    'github_user_needs_update': False,
     'branches_fetched_on_startup': False,
     'login_in_progress': False,
 }
 
+# --- Clone ---
+# Modalità offerte nella sezione Clona (vedi GitRepo.clone_args)
+CLONE_MODES = {
+    'full': "Completo",
+    'shallow': "Storia limitata (--depth)",
+    'blobless': "Senza contenuti storici (blob:none)",
+    'treeless': "Solo commit (tree:0)",
+}
+CLONE_DEFAULT_DEPTH = 1
+HISTORY_DEEPEN_STEP = 100  # commit aggiunti a ogni 'Approfondisci' nella sezione Storia
+# Percorsi non tracciati mostrati nell'anteprima di rimozione del Force Pull
+FORCE_PULL_PREVIEW_FILES = 15
+# Cache locale degli oggetti per i clone ripetuti (vedi MirrorCache), usata dai clone completi
+MIRROR_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".gitbash6mirrors")
+MIRROR_CACHE_MAX_BYTES = 20 * 1024 ** 3
+MIRROR_CACHE_MAX_AGE_DAYS = 30
+
+# --- Worktree ---
+# Pool di worktree per il cambio branch istantaneo (vedi WorktreePool), opzione della sezione Branch
+WORKTREE_POOL_DIR = os.path.join(os.path.expanduser("~"), ".gitbash6worktrees")
+WORKTREE_POOL_DEFAULT = False
+WORKTREE_POOL_MAX = 5  # worktree per repository
+WORKTREE_POOL_MAX_BYTES = 5 * 1024 ** 3
+WORKTREE_POOL_MAX_AGE_DAYS = 14
+
 # --- UI constants ---
 # Fonts
 DEFAULT_FONT = ("Segoe UI", 10)
@@ -58,3 +88,5 @@ CANVAS_HEIGHT = 130
 SCROLLBAR_FILE_THRESHOLD = 7
 FILESELECTION_SCROLL_THRESHOLD = 9
 FILESELECTION_CANVAS_HEIGHT = 180
+# Attesa dopo l'ultimo tasto prima di filtrare le liste dei branch
+FILTER_DEBOUNCE_MS = 150
@@ -0,0 +1,96 @@
+import os
+import sys
+import threading
+
+class GhHostsReader:
+    # Legge l'account GitHub attivo direttamente da hosts.yml di GitHub CLI,
+    # senza avviare 'gh auth status' (che può anche validare il token in rete).
+    # Il risultato è in cache finché mtime e dimensione del file non cambiano.
+    # I metodi restituiscono None quando il caso non è gestito: il chiamante usa allora la CLI.
+    TOKEN_ENV_VARS = ('GH_TOKEN', 'GITHUB_TOKEN', 'GH_ENTERPRISE_TOKEN', 'GITHUB_ENTERPRISE_TOKEN')
+    _cache = {}  # percorso -> ((mtime_ns, size), host -> {chiave: valore})
+    _lock = threading.Lock()
+
+    @staticmethod
+    def config_dir():
+        # Stessa ricerca di gh: GH_CONFIG_DIR, poi %AppData%\GitHub CLI su Windows, poi XDG
+        if os.environ.get('GH_CONFIG_DIR'):
+            return os.environ['GH_CONFIG_DIR']
+        if sys.platform == 'win32' and os.environ.get('AppData'):
+            return os.path.join(os.environ['AppData'], 'GitHub CLI')
+        if os.environ.get('XDG_CONFIG_HOME'):
+            return os.path.join(os.environ['XDG_CONFIG_HOME'], 'gh')
+        return os.path.join(os.path.expanduser('~'), '.config', 'gh')
+
+    @staticmethod
+    def hosts_file():
+        return os.path.join(GhHostsReader.config_dir(), 'hosts.yml')
+
+    @staticmethod
+    def _parse_hosts(text):
+        # Interpreta solo la struttura di hosts.yml: host al primo livello e le loro chiavi dirette
+        # (user, git_protocol, oauth_token...). None per YAML non previsto (flow style, liste...).
+        hosts = {}
+        host = None
+        child_indent = None
+        for raw in text.splitlines():
+            stripped = raw.strip()
+            if not stripped or stripped.startswith('#'):
+                continue
+            if stripped.startswith(('-', '{', '[', '---')) or '\t' in raw[:len(raw) - len(raw.lstrip())]:
+                return None
+            indent = len(raw) - len(raw.lstrip(' '))
+            key, sep, value = stripped.partition(':')
+            if not sep:
+                return None
+            key = key.strip().strip('"\'')
+            value = value.strip()
+            if indent == 0:
+                if value:
+                    return None
+                host = key
+                hosts[host] = {}
+                child_indent = None
+                continue
+            if host is None:
+                return None
+            if child_indent is None:
+                child_indent = indent
+            if indent == child_indent and value:
+                if value[0] in '{[|>&*!':
+                    return None
+                hosts[host][key] = value.strip('"\'')
+        return hosts
+
+    @staticmethod
+    def _read_hosts():
+        # Restituisce {host: {chiave: valore}}, None se il file manca o non è interpretabile
+        path = GhHostsReader.hosts_file()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        with GhHostsReader._lock:
+            cached = GhHostsReader._cache.get(path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                hosts = GhHostsReader._parse_hosts(f.read())
+        except (OSError, UnicodeDecodeError):
+            return None
+        with GhHostsReader._lock:
+            GhHostsReader._cache[path] = (stamp, hosts)
+        return hosts
+
+    @staticmethod
+    def active_user(hostname='github.com'):
+        # Nome dell'account attivo, '' se non autenticato, None se serve la CLI
+        if any(os.environ.get(v) for v in GhHostsReader.TOKEN_ENV_VARS):
+            # Un token da variabile d'ambiente ha la precedenza sul file: lo risolve solo gh
+            return None
+        hosts = GhHostsReader._read_hosts()
+        if hosts is None:
+            return None
+        return hosts.get(hostname, {}).get('user', '')
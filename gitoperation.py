@@ -0,0 +1,200 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from gitreader import GitDirReader
+from helpers import get_subprocess_kwargs
+
+class OperationCancelled(Exception):
+    pass
+
+
+class GitOperation:
+    # Handle di un'operazione git lunga (push, pull, fetch, clone): creato dall'interfaccia,
+    # passato ai metodi di GitRepo (parametro operation) e annullabile da qualsiasi thread.
+    # Ogni processo avviato per l'operazione parte in un proprio gruppo (sessione su POSIX,
+    # process group su Windows), così cancel() chiude anche i figli (ssh, git-remote-https,
+    # pack-objects): prima con un segnale di terminazione, poi forzando dopo TERMINATE_TIMEOUT.
+    # A processi chiusi leftover_locks() elenca, nella repository cwd, i file .lock creati dopo l'inizio
+    # dell'operazione tra quelli che i suoi comandi possono prendere (locks: uno dei gruppi *_LOCKS; i nomi
+    # che finiscono con '/' sono cartelle di refs). Nessuno viene rimosso senza conferma (remove_locks):
+    # anche un git lanciato da terminale può averli presi. L'elenco è vuoto se un processo non si è chiuso
+    # o se nella stessa repository è in corso un'altra operazione. cwd None per le operazioni che non
+    # lavorano in una repository esistente, come il clone.
+    TERMINATE_TIMEOUT = 3.0
+    FETCH_LOCKS = ('packed-refs.lock', 'shallow.lock', 'config.lock', 'refs/remotes/', 'refs/tags/')
+    PULL_LOCKS = FETCH_LOCKS + ('index.lock', 'HEAD.lock', 'ORIG_HEAD.lock', 'refs/heads/')
+    PUSH_LOCKS = ('index.lock', 'HEAD.lock', 'packed-refs.lock', 'refs/heads/', 'refs/remotes/')
+    # Operazioni create e non ancora concluse (finish), di tutte le repository
+    _active = set()
+    _active_guard = threading.Lock()
+
+    def __init__(self, cwd=None, locks=()):
+        self.cwd = os.path.abspath(cwd) if cwd else None
+        self.locks = tuple(locks) if self.cwd else ()
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._procs = set()
+        self._cancel = threading.Event()
+        self._killer = None
+        self.alive = []  # pid dei processi ancora aperti dopo l'annullamento
+        with self._active_guard:
+            self._active.add(self)
+
+    def finish(self):
+        # Da chiamare a operazione conclusa (anche se annullata o fallita)
+        with self._active_guard:
+            self._active.discard(self)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        # Da chiamare tra un passo e l'altro dell'operazione
+        if self._cancel.is_set():
+            raise OperationCancelled()
+
+    @staticmethod
+    def popen_kwargs(kwargs):
+        # Aggiunge ai parametri di Popen la creazione di un nuovo gruppo di processi
+        kwargs = dict(kwargs)
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = kwargs.get('creationflags', 0) | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True
+        return kwargs
+
+    def attach(self, proc):
+        # Registra un processo appena avviato; se l'operazione è già annullata lo chiude subito
+        with self._lock:
+            if not self._cancel.is_set():
+                self._procs.add(proc)
+                return
+        self._signal_tree(proc, force=True)
+        proc.wait()
+        raise OperationCancelled()
+
+    def detach(self, proc):
+        with self._lock:
+            self._procs.discard(proc)
+
+    def cancel(self, wait=False):
+        # Annulla l'operazione; con wait attende che i processi siano chiusi (es. alla chiusura dell'app)
+        with self._lock:
+            if not self._cancel.is_set():
+                self._cancel.set()
+                self._killer = threading.Thread(target=self._terminate_all, name='git-cancel', daemon=True)
+                self._killer.start()
+            killer = self._killer
+        if wait:
+            killer.join(self.TERMINATE_TIMEOUT + 2)
+
+    def _terminate_all(self):
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            self._signal_tree(proc, force=False)
+        deadline = time.time() + self.TERMINATE_TIMEOUT
+        for proc in procs:
+            try:
+                proc.wait(max(0.0, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                self._signal_tree(proc, force=True)
+        for proc in procs:
+            try:
+                proc.wait(self.TERMINATE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                print(f"[GitOperation] Il processo {proc.pid} non si è chiuso")
+        self.alive = [proc.pid for proc in procs if proc.poll() is None]
+        if self.alive:
+            print("[GitOperation] Processi ancora aperti: lock lasciati al loro posto")
+
+    def wait_closed(self):
+        # Attende la chiusura dei processi avviata da cancel(); vero se sono stati chiusi tutti
+        with self._lock:
+            killer = self._killer
+        if killer is not None:
+            killer.join()
+        return not self.alive
+
+    @staticmethod
+    def _signal_tree(proc, force):
+        # Termina il processo e i suoi figli (tutto il gruppo creato con popen_kwargs)
+        if proc.poll() is not None:
+            return
+        try:
+            if sys.platform == 'win32':
+                if not force:
+                    proc.send_signal(signal.CTRL_BREAK_EVENT)
+                else:
+                    subprocess.run(['taskkill', '/PID', str(proc.pid), '/T', '/F'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **get_subprocess_kwargs())
+            else:
+                os.killpg(proc.pid, signal.SIGKILL if force else signal.SIGTERM)
+        except (OSError, ValueError) as e:
+            if force:
+                print(f"[GitOperation] Errore durante la chiusura del processo {proc.pid}: {e}")
+                try:
+                    proc.kill()
+                except OSError:
+                    pass
+
+    def _lock_candidates(self, loc):
+        _, git_dir, common_dir = loc
+        for name in self.locks:
+            if name.endswith('/'):
+                for root, _, filenames in os.walk(os.path.join(common_dir, name)):
+                    for filename in filenames:
+                        if filename.endswith('.lock'):
+                            yield os.path.join(root, filename)
+            else:
+                for base in dict.fromkeys((git_dir, common_dir)):
+                    yield os.path.join(base, name)
+
+    def _others_running(self, common_dir):
+        # Vero se un'altra operazione non conclusa lavora sulla stessa repository
+        with self._active_guard:
+            others = [op for op in self._active if op is not self and op.cwd]
+        for op in others:
+            loc = GitDirReader.locate(op.cwd)
+            if not loc or os.path.normcase(loc[2]) == os.path.normcase(common_dir):
+                return True
+        return False
+
+    def leftover_locks(self):
+        # Lock creati dopo l'inizio dell'operazione che i suoi processi, chiusi, non rilasceranno più:
+        # i comandi git successivi fallirebbero finché non vengono rimossi
+        if not self.wait_closed():
+            return []
+        loc = GitDirReader.locate(self.cwd) if self.cwd and self.locks else None
+        if not loc:
+            return []
+        if self._others_running(loc[2]):
+            print("[GitOperation] Un'altra operazione è in corso sulla repository: lock non rimossi")
+            return []
+        found = []
+        for path in self._lock_candidates(loc):
+            try:
+                if os.stat(path).st_mtime >= self.started - 1:
+                    found.append(path)
+            except OSError:
+                continue
+        return found
+
+    def remove_locks(self, paths):
+        # Rimuove i lock indicati (da leftover_locks, dopo la conferma dell'utente)
+        removed = []
+        for path in paths:
+            try:
+                os.remove(path)
+                removed.append(path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                print(f"[GitOperation] Impossibile rimuovere {path}: {e}")
+        if removed:
+            print(f"[GitOperation] Rimossi lock rimasti dopo l'annullamento: {', '.join(removed)}")
+        return removed
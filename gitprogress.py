@@ -0,0 +1,97 @@
+import re
+from helpers import format_bytes
+
+class GitProgress:
+    # Un aggiornamento di avanzamento di git (una riga di --progress già interpretata).
+    # percent, current e total sono None quando git mostra solo un conteggio;
+    # transferred e throughput sono in byte (byte/s) e presenti solo nelle fasi di trasferimento.
+    LABELS = {
+        'Enumerating objects': "Enumerazione oggetti",
+        'Counting objects': "Conteggio oggetti",
+        'Compressing objects': "Compressione oggetti",
+        'Finding sources': "Ricerca sorgenti",
+        'Receiving objects': "Ricezione oggetti",
+        'Resolving deltas': "Risoluzione delta",
+        'Writing objects': "Invio oggetti",
+        'Updating files': "Aggiornamento file",
+        'Checking out files': "Estrazione file",
+        'Checking connectivity': "Verifica connettività",
+        'Unpacking objects': "Estrazione oggetti",
+    }
+
+    def __init__(self, phase, remote=False, percent=None, current=None, total=None,
+                 transferred=None, throughput=None, done=False):
+        self.phase = phase
+        self.remote = remote
+        self.percent = percent
+        self.current = current
+        self.total = total
+        self.transferred = transferred
+        self.throughput = throughput
+        self.done = done
+
+    @property
+    def label(self):
+        label = self.LABELS.get(self.phase, self.phase)
+        return f"{label} (remoto)" if self.remote else label
+
+    def detail(self):
+        # Testo breve per la finestra di avanzamento (es: 37% (123/456) - 1.2 MB - 512.0 KB/s)
+        parts = []
+        if self.total is not None:
+            parts.append(f"{self.percent}% ({self.current}/{self.total})")
+        elif self.current is not None:
+            parts.append(f"{self.current} oggetti")
+        if self.transferred is not None:
+            parts.append(format_bytes(self.transferred))
+        if self.throughput is not None:
+            parts.append(f"{format_bytes(self.throughput)}/s")
+        return " - ".join(parts)
+
+    def __repr__(self):
+        return f"GitProgress({self.phase!r}, percent={self.percent}, throughput={self.throughput})"
+
+
+class GitProgressParser:
+    # Interpreta le righe che git scrive su stderr con --progress, ad esempio:
+    #   remote: Counting objects:  45% (123/456)
+    #   Receiving objects:  37% (123/456), 1.20 MiB | 512.00 KiB/s
+    #   Writing objects: 100% (3/3), 280 bytes | 280.00 KiB/s, done.
+    #   Enumerating objects: 1234, done.
+    # feed() restituisce un GitProgress per le righe di avanzamento e None per tutte le altre,
+    # che il chiamante tiene come output del comando.
+    _LINE = re.compile(
+        r'^(?P<remote>remote: )?(?P<phase>[A-Z][A-Za-z ]+?):\s+'
+        r'(?:(?P<percent>\d+)% \((?P<current>\d+)/(?P<total>\d+)\)|(?P<count>\d+))'
+        r'(?:,\s*(?P<size>[\d.]+) (?P<size_unit>bytes|[KMGT]iB)'
+        r'(?:\s*\|\s*(?P<rate>[\d.]+) (?P<rate_unit>bytes|[KMGT]iB)/s)?)?'
+        r'(?P<done>,\s*done\.?)?\s*$'
+    )
+    _UNITS = {'bytes': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3, 'TiB': 1024 ** 4}
+
+    @classmethod
+    def _bytes(cls, value, unit):
+        if value is None:
+            return None
+        return float(value) * cls._UNITS[unit]
+
+    def feed(self, line):
+        line = line.strip()
+        match = self._LINE.match(line)
+        if match is None:
+            return None
+        g = match.groupdict()
+        if g['percent'] is not None:
+            percent, current, total = int(g['percent']), int(g['current']), int(g['total'])
+        else:
+            percent, current, total = None, int(g['count']), None
+        return GitProgress(
+            g['phase'],
+            remote=g['remote'] is not None,
+            percent=percent,
+            current=current,
+            total=total,
+            transferred=self._bytes(g['size'], g['size_unit']),
+            throughput=self._bytes(g['rate'], g['rate_unit']),
+            done=g['done'] is not None or (total is not None and current == total),
+        )
@@ -0,0 +1,343 @@
+import os
+import re
+
+class GitDirReader:
+    # Backend di sola lettura che risponde leggendo direttamente i file della repository
+    # (.git/HEAD, refs, packed-refs, config) senza avviare alcun processo.
+    # Ogni metodo restituisce None quando il caso non è gestito in modo affidabile:
+    # il chiamante (GitRepo) ricade allora sul comando git equivalente.
+    MAX_SYMREF_DEPTH = 5
+    _SECTION_RE = re.compile(r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+    _SHA_RE = re.compile(r'^[0-9a-f]{40}([0-9a-f]{24})?$')
+
+    @staticmethod
+    def locate(cwd=None):
+        # Risale dalla directory corrente fino a trovare .git (cartella o file 'gitdir:').
+        # Restituisce (worktree_root, git_dir, common_dir), False se non è una repository,
+        # None se la situazione è insolita (variabili GIT_*, dentro .git, proprietario diverso...).
+        if any(os.environ.get(v) for v in ('GIT_DIR', 'GIT_WORK_TREE', 'GIT_COMMON_DIR', 'GIT_CEILING_DIRECTORIES')):
+            return None
+        path = os.path.abspath(cwd or os.getcwd())
+        if '.git' in path.replace('\\', '/').split('/'):
+            return None
+        while True:
+            dot_git = os.path.join(path, '.git')
+            if os.path.isdir(dot_git):
+                git_dir = dot_git
+                break
+            if os.path.isfile(dot_git):
+                try:
+                    with open(dot_git, 'r', encoding='utf-8') as f:
+                        content = f.read().strip()
+                except OSError:
+                    return None
+                if not content.startswith('gitdir:'):
+                    return None
+                git_dir = content[len('gitdir:'):].strip()
+                if not os.path.isabs(git_dir):
+                    git_dir = os.path.join(path, git_dir)
+                git_dir = os.path.normpath(git_dir)
+                if not os.path.isdir(git_dir):
+                    return None
+                break
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
+        if not os.path.isfile(os.path.join(git_dir, 'HEAD')):
+            return None
+        common_dir = git_dir
+        commondir_file = os.path.join(git_dir, 'commondir')
+        if os.path.isfile(commondir_file):
+            try:
+                with open(commondir_file, 'r', encoding='utf-8') as f:
+                    common_dir = f.read().strip()
+            except OSError:
+                return None
+            if not os.path.isabs(common_dir):
+                common_dir = os.path.normpath(os.path.join(git_dir, common_dir))
+        # git rifiuta le repository di altri utenti (safe.directory): lascia decidere a git
+        if hasattr(os, 'getuid'):
+            try:
+                if os.stat(path).st_uid != os.getuid():
+                    return None
+            except OSError:
+                return None
+        return path, git_dir, common_dir
+
+    @staticmethod
+    def _read_config(common_dir):
+        # Legge .git/config in una lista di (sezione, sottosezione, chiave, valore).
+        # Restituisce None per i costrutti non gestiti (include, continuazioni di riga, reftable).
+        try:
+            with open(os.path.join(common_dir, 'config'), 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+        entries = []
+        section, subsection = None, None
+        for raw in lines:
+            line = raw.strip()
+            if not line or line[0] in '#;':
+                continue
+            if line.startswith('['):
+                m = GitDirReader._SECTION_RE.match(line)
+                if not m:
+                    return None
+                section = m.group(1).lower()
+                subsection = m.group(2)
+                if subsection is None and '.' in section:
+                    # Sintassi deprecata [remote.origin]
+                    section, _, subsection = section.partition('.')
+                if section in ('include', 'includeif'):
+                    return None
+                line = line[m.end():].strip()
+                if not line or line[0] in '#;':
+                    continue
+            key, sep, value = line.partition('=')
+            value = GitDirReader._parse_value(value) if sep else 'true'
+            if value is None:
+                return None
+            entries.append((section, subsection, key.strip().lower(), value))
+        for section, _, key, value in entries:
+            if section == 'extensions' and key in ('refstorage', 'worktreeconfig'):
+                return None
+        return entries
+
+    @staticmethod
+    def _parse_value(value):
+        # Interpreta un valore di config: virgolette, escape e commenti finali.
+        out = []
+        quoted = False
+        pending_space = ''
+        i = 0
+        value = value.strip()
+        while i < len(value):
+            c = value[i]
+            if c == '\\':
+                if i + 1 >= len(value):
+                    return None
+                nxt = value[i + 1]
+                out.append(pending_space + {'n': '\n', 't': '\t', 'b': '\b'}.get(nxt, nxt))
+                pending_space = ''
+                i += 2
+                continue
+            if c == '"':
+                quoted = not quoted
+            elif not quoted and c in '#;':
+                break
+            elif not quoted and c.isspace():
+                pending_space += c
+            else:
+                out.append(pending_space + c)
+                pending_space = ''
+            i += 1
+        if quoted:
+            return None
+        return ''.join(out)
+
+    @staticmethod
+    def _global_url_rewrites():
+        # Gli 'insteadOf' nelle config globali cambiano l'URL restituito da 'git remote get-url'
+        candidates = [os.path.join(os.path.expanduser('~'), '.gitconfig')]
+        xdg = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+        candidates.append(os.path.join(xdg, 'git', 'config'))
+        for path in candidates:
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    if 'insteadof' in f.read().lower():
+                        return True
+            except OSError:
+                continue
+        return False
+
+    @staticmethod
+    def _read_packed_refs(common_dir):
+        # Restituisce {refname: sha} da packed-refs (vuoto se il file non esiste).
+        refs = {}
+        try:
+            with open(os.path.join(common_dir, 'packed-refs'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.rstrip('\n')
+                    if not line or line[0] in '#^':
+                        continue
+                    sha, _, name = line.partition(' ')
+                    refs[name] = sha
+        except FileNotFoundError:
+            pass
+        return refs
+
+    @staticmethod
+    def _ref_dir(git_dir, common_dir, refname):
+        # HEAD e i ref per-worktree stanno nella gitdir del worktree, il resto nella common dir
+        if '/' not in refname or refname.startswith(('refs/bisect/', 'refs/worktree/', 'refs/rewritten/')):
+            return git_dir
+        return common_dir
+
+    @staticmethod
+    def _resolve(git_dir, common_dir, refname, packed=None):
+        # Segue i ref simbolici e restituisce lo sha, '' se il ref non esiste, None se illeggibile.
+        for _ in range(GitDirReader.MAX_SYMREF_DEPTH):
+            path = os.path.join(GitDirReader._ref_dir(git_dir, common_dir, refname), *refname.split('/'))
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read().strip()
+            except (FileNotFoundError, NotADirectoryError):
+                if packed is None:
+                    packed = GitDirReader._read_packed_refs(common_dir)
+                return packed.get(refname, '')
+            except OSError:
+                return None
+            if content.startswith('ref:'):
+                refname = content[4:].strip()
+                continue
+            return content if GitDirReader._SHA_RE.match(content) else None
+        return None
+
+    @staticmethod
+    def _list_refs(common_dir, prefix):
+        # Elenca i ref sotto prefix (es. 'refs/heads/') unendo file sciolti e packed-refs.
+        # Restituisce {nome_breve: contenuto} dove il contenuto è uno sha o 'ref: ...'.
+        refs = {}
+        for name, sha in GitDirReader._read_packed_refs(common_dir).items():
+            if name.startswith(prefix):
+                refs[name[len(prefix):]] = sha
+        base = os.path.join(common_dir, *prefix.rstrip('/').split('/'))
+        for root, _, filenames in os.walk(base):
+            for filename in filenames:
+                if filename.endswith('.lock'):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        content = f.read().strip()
+                except OSError:
+                    return None
+                name = os.path.relpath(path, base).replace('\\', '/')
+                refs[name] = content
+        return refs
+
+    @staticmethod
+    def state_stamp(cwd=None):
+        # Impronta economica dello stato: mtime e dimensione di HEAD, index, config, packed-refs
+        # e delle cartelle sotto refs/ (git aggiorna i ref con una rinomina, che cambia l'mtime
+        # della cartella). Due impronte uguali indicano che branch, ref e origin non sono cambiati.
+        loc = GitDirReader.locate(cwd)
+        if not loc:
+            return None
+        _, git_dir, common_dir = loc
+        paths = [
+            os.path.join(git_dir, 'HEAD'),
+            os.path.join(git_dir, 'index'),
+            os.path.join(common_dir, 'config'),
+            os.path.join(common_dir, 'packed-refs'),
+        ]
+        for root, _, _ in os.walk(os.path.join(common_dir, 'refs')):
+            paths.append(root)
+        parts = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                parts.append('-')
+                continue
+            except OSError:
+                return None
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        return '|'.join(parts)
+
+    @staticmethod
+    def is_repo(cwd=None):
+        loc = GitDirReader.locate(cwd)
+        if loc is None:
+            return None
+        return bool(loc)
+
+    @staticmethod
+    def worktree_root(cwd=None):
+        loc = GitDirReader.locate(cwd)
+        if not loc:
+            return None
+        return loc[0]
+
+    @staticmethod
+    def head_ref(cwd=None):
+        # Restituisce il contenuto di HEAD: ('ref', 'refs/heads/x') oppure ('sha', sha).
+        loc = GitDirReader.locate(cwd)
+        if not loc:
+            return None
+        _, git_dir, _ = loc
+        try:
+            with open(os.path.join(git_dir, 'HEAD'), 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+        except OSError:
+            return None
+        if content.startswith('ref:'):
+            return 'ref', content[4:].strip()
+        if GitDirReader._SHA_RE.match(content):
+            return 'sha', content
+        return None
+
+    @staticmethod
+    def has_commits(cwd=None):
+        loc = GitDirReader.locate(cwd)
+        if not loc:
+            return None
+        _, git_dir, common_dir = loc
+        sha = GitDirReader._resolve(git_dir, common_dir, 'HEAD')
+        if sha is None:
+            return None
+        return bool(sha)
+
+    @staticmethod
+    def current_branch(cwd=None):
+        # Nome del branch corrente, 'HEAD' se staccato (come 'git rev-parse --abbrev-ref HEAD').
+        head = GitDirReader.head_ref(cwd)
+        if head is None:
+            return None
+        kind, value = head
+        if kind == 'sha':
+            return 'HEAD'
+        if value.startswith('refs/heads/'):
+            return value[len('refs/heads/'):]
+        return None
+
+    @staticmethod
+    def local_branches(cwd=None):
+        loc = GitDirReader.locate(cwd)
+        if not loc:
+            return None
+        refs = GitDirReader._list_refs(loc[2], 'refs/heads/')
+        if refs is None:
+            return None
+        return sorted(refs)
+
+    @staticmethod
+    def remote_branches(cwd=None):
+        # Branch remoti in forma 'remote/nome', esclusi i ref simbolici (es. origin/HEAD).
+        loc = GitDirReader.locate(cwd)
+        if not loc:
+            return None
+        refs = GitDirReader._list_refs(loc[2], 'refs/remotes/')
+        if refs is None:
+            return None
+        return sorted(name for name, content in refs.items() if not content.startswith('ref:'))
+
+    @staticmethod
+    def origin_url(cwd=None):
+        # URL di origin, '' se non configurato, None se serve git per interpretarlo.
+        loc = GitDirReader.locate(cwd)
+        if not loc:
+            return None
+        entries = GitDirReader._read_config(loc[2])
+        if entries is None:
+            return None
+        url = ''
+        for section, subsection, key, value in entries:
+            if section == 'url':
+                return None
+            if section == 'remote' and subsection == 'origin' and key == 'url' and not url:
+                url = value
+        if url and GitDirReader._global_url_rewrites():
+            return None
+        return url
@@ -1,107 +1,711 @@
 import subprocess
+import re
 import os
 import shutil
+import tempfile
+import stat
+import heapq
+import time
+import atexit
+import threading
 import tkinter as tk
 from tkinter import messagebox as mb
+from concurrent.futures import ThreadPoolExecutor
+from helpers import get_subprocess_kwargs
+from gitreader import GitDirReader
+from ghidentity import GhHostsReader
+from gitprogress import GitProgressParser
+from gitoperation import OperationCancelled
+from parking import UntrackedParking
+
+class _CatFileBatch:
+    # Processo 'git cat-file --batch-check' persistente legato a una directory.
+    # Risolve revisioni (HEAD, refs, sha) senza avviare un nuovo processo per ogni domanda.
+    def __init__(self, cwd):
+        self.cwd = cwd
+        self.lock = threading.Lock()
+        self.proc = subprocess.Popen(
+            ['git', 'cat-file', '--batch-check'],
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            **GitExecutor.subprocess_kwargs()
+        )
+
+    def query(self, rev):
+        # Restituisce (sha, tipo) oppure None se la revisione non esiste.
+        # Solleva OSError se il processo non è più utilizzabile (es. directory non git).
+        with self.lock:
+            self.proc.stdin.write(rev + '\n')
+            self.proc.stdin.flush()
+            line = self.proc.stdout.readline()
+        if not line:
+            raise OSError("git cat-file --batch-check terminato")
+        parts = line.split()
+        if len(parts) >= 3 and parts[-1].isdigit():
+            return parts[0], parts[1]
+        return None
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            self.proc.wait(timeout=1)
+        except Exception:
+            self.proc.kill()
+
+
+class GitExecutor:
+    # Punto unico di esecuzione dei comandi git (e gh).
+    # - calcola una sola volta startupinfo/creationflags per nascondere la console su Windows
+    # - mantiene processi 'cat-file --batch-check' persistenti per le risoluzioni di revisioni
+    # - offre un pool di thread per lanciare in parallelo i comandi indipendenti
+    MAX_WORKERS = 4
+    MAX_BATCHES = 8
+    _kwargs = None
+    _batches = {}
+    _lock = threading.Lock()
+    _pool = None
+    _LINE_END = re.compile(rb'\r\n|\r|\n')
+    # Per le query di sola lettura lanciate in automatico (es. lo status a ogni modifica vista dal watcher):
+    # non prendono il lock dell'indice e non lo riscrivono, quindi non intralciano un git lanciato
+    # dall'utente. I comandi avviati dall'utente lo aggiornano normalmente.
+    READ_ONLY_ENV = {'GIT_OPTIONAL_LOCKS': '0'}
+
+    @classmethod
+    def subprocess_kwargs(cls):
+        # Restituisce una copia dei parametri comuni a tutti i subprocess.
+        # L'ambiente è letto a ogni chiamata: le modifiche a os.environ valgono per i comandi successivi.
+        if cls._kwargs is None:
+            cls._kwargs = get_subprocess_kwargs()
+        kwargs = dict(cls._kwargs)
+        kwargs['env'] = os.environ.copy()
+        return kwargs
+
+    @classmethod
+    def run(cls, cmd, cwd=None, input_text=None, stderr=subprocess.STDOUT, env=None, operation=None):
+        # Equivalente di subprocess.check_output: restituisce l'output come testo
+        # e solleva CalledProcessError in caso di errore.
+        # Con operation (GitOperation) il processo è annullabile e solleva OperationCancelled.
+        kwargs = cls.subprocess_kwargs()
+        if env:
+            kwargs['env'] = dict(kwargs['env'], **env)
+        if operation is not None:
+            operation.check()
+            proc = subprocess.Popen(cmd, cwd=cwd, stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE, stderr=stderr, text=True, encoding='utf-8',
+                                    errors='replace', **operation.popen_kwargs(kwargs))
+            operation.attach(proc)
+            try:
+                output, errors = proc.communicate(input_text)
+            finally:
+                operation.detach(proc)
+            operation.check()
+            if proc.returncode:
+                raise subprocess.CalledProcessError(proc.returncode, cmd, output=output, stderr=errors)
+            return output
+        return subprocess.check_output(
+            cmd,
+            cwd=cwd,
+            input=input_text,
+            stderr=stderr,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            **kwargs
+        )
+
+    @classmethod
+    def stream(cls, cmd, cwd=None, on_progress=None, env=None, operation=None):
+        # Come run, ma legge l'output mentre il comando gira (per i comandi lanciati con --progress).
+        # Le righe di avanzamento (su stderr, terminate da \r) vanno a on_progress(GitProgress),
+        # le altre formano l'output restituito. Solleva CalledProcessError con l'output in caso di errore.
+        kwargs = cls.subprocess_kwargs()
+        # Messaggi non tradotti: il parser riconosce le fasi di git in inglese
+        kwargs['env'] = dict(kwargs['env'], LC_ALL='C', **(env or {}))
+        if operation is not None:
+            operation.check()
+            kwargs = operation.popen_kwargs(kwargs)
+        parser = GitProgressParser()
+        lines = []
+
+        def handle(raw):
+            text = raw.decode('utf-8', errors='replace')
+            progress = parser.feed(text)
+            if progress is None:
+                lines.append(text)
+            elif on_progress is not None:
+                on_progress(progress)
+        proc = subprocess.Popen(cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, **kwargs)
+        if operation is not None:
+            operation.attach(proc)
+        try:
+            cls._read_stream(proc, handle)
+        finally:
+            if operation is not None:
+                operation.detach(proc)
+        if operation is not None:
+            operation.check()
+        output = "\n".join(lines)
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, output=output)
+        return output
+
+    @classmethod
+    def _read_stream(cls, proc, handle):
+        # Passa a handle ogni riga (terminata da \r, \n o \r\n) fino alla fine del processo
+        pending = b''
+        with proc.stdout:
+            while True:
+                chunk = proc.stdout.read1(65536)
+                if not chunk:
+                    break
+                pending += chunk
+                pos = 0
+                for match in cls._LINE_END.finditer(pending):
+                    if match.group() == b'\r' and match.end() == len(pending):
+                        # Potrebbe essere un \r\n spezzato tra due letture
+                        break
+                    handle(pending[pos:match.start()])
+                    pos = match.end()
+                pending = pending[pos:]
+        if pending:
+            handle(pending)
+        return proc.wait()
+
+    @classmethod
+    def submit(cls, cmd, **kwargs):
+        # Esegue run() nel pool condiviso e restituisce un Future.
+        with cls._lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS, thread_name_prefix='git')
+            pool = cls._pool
+        return pool.submit(cls.run, cmd, **kwargs)
+
+    @classmethod
+    def resolve(cls, rev, cwd=None):
+        # Risolve una revisione con il processo cat-file persistente della directory.
+        # Restituisce (sha, tipo) o None; solleva OSError se la directory non è una repository.
+        key = os.path.normcase(os.path.realpath(cwd or os.getcwd()))
+        with cls._lock:
+            batch = cls._batches.pop(key, None)
+            if batch is not None and not batch.alive():
+                batch.close()
+                batch = None
+            if batch is None:
+                batch = _CatFileBatch(key)
+                # Mantiene solo le directory usate più di recente
+                while len(cls._batches) >= cls.MAX_BATCHES:
+                    oldest = next(iter(cls._batches))
+                    cls._batches.pop(oldest).close()
+            cls._batches[key] = batch
+        try:
+            return batch.query(rev.strip())
+        except (OSError, ValueError):
+            with cls._lock:
+                if cls._batches.get(key) is batch:
+                    del cls._batches[key]
+            batch.close()
+            raise OSError(f"Impossibile risolvere '{rev}' in {key}")
+
+    @classmethod
+    def shutdown(cls):
+        # Chiude i processi persistenti e il pool (registrato con atexit).
+        with cls._lock:
+            batches = list(cls._batches.values())
+            cls._batches.clear()
+            pool, cls._pool = cls._pool, None
+        for batch in batches:
+            batch.close()
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+atexit.register(GitExecutor.shutdown)
+
+class RepoSnapshot:
+    # Fotografia dello stato della repository ottenuta con un solo
+    # 'git status --porcelain=v2 --branch -z' più una lettura di remote.origin.url.
+    # Sostituisce le chiamate separate a is_valid_repo/has_commits/get_current_branch/get_current_origin.
+    def __init__(self):
+        self.is_repo = False
+        self.has_commits = False
+        self.branch = None          # None se HEAD è staccato
+        self.head_oid = None
+        self.upstream = None
+        self.ahead = 0
+        self.behind = 0
+        self.origin = None
+        self.staged = 0
+        self.unstaged = 0
+        self.untracked = 0
+        self.conflicts = 0
+        self.has_status = False     # False se i conteggi non sono stati calcolati
+        self.time = 0.0
+        self.stamp = None           # impronta dei file .git presa prima della lettura (GitRepo.get_state_stamp)
+
+    @property
+    def branch_label(self):
+        # Stesse etichette di GitRepo.get_current_branch
+        if not self.is_repo:
+            return "(nessun branch)"
+        if not self.has_commits:
+            return "(nessun commit)"
+        return self.branch or "HEAD"
+
+    @property
+    def origin_label(self):
+        # Stesse etichette di GitRepo.get_current_origin
+        if not self.has_commits or not self.origin:
+            return "(nessun link remoto)"
+        return self.origin
+
+    @property
+    def changes(self):
+        return self.staged + self.unstaged + self.untracked + self.conflicts
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        snap = cls()
+        for key, value in data.items():
+            if key in snap.__dict__:
+                setattr(snap, key, value)
+        return snap
+
+    def parse_status(self, output):
+        # Interpreta l'output NUL-separato di 'git status --porcelain=v2 --branch -z'.
+        fields = output.split('\0')
+        i = 0
+        while i < len(fields):
+            entry = fields[i]
+            i += 1
+            if not entry:
+                continue
+            if entry.startswith('# '):
+                key, _, value = entry[2:].partition(' ')
+                if key == 'branch.oid':
+                    self.has_commits = value != '(initial)'
+                    self.head_oid = value if self.has_commits else None
+                elif key == 'branch.head':
+                    self.branch = None if value == '(detached)' else value
+                elif key == 'branch.upstream':
+                    self.upstream = value
+                elif key == 'branch.ab':
+                    ahead, _, behind = value.partition(' ')
+                    self.ahead = int(ahead.lstrip('+') or 0)
+                    self.behind = int(behind.lstrip('-') or 0)
+            elif entry[0] in '12':
+                xy = entry[2:4]
+                if xy[0] != '.':
+                    self.staged += 1
+                if xy[1] != '.':
+                    self.unstaged += 1
+                if entry[0] == '2':
+                    # Le rinomine hanno il percorso originale come campo successivo
+                    i += 1
+            elif entry[0] == 'u':
+                self.conflicts += 1
+            elif entry[0] == '?':
+                self.untracked += 1
+
+    @classmethod
+    def capture(cls, cwd=None):
+        # Esegue status e lettura dell'origin in parallelo e restituisce la fotografia.
+        snap = cls()
+        snap.time = time.time()
+        snap.stamp = GitRepo.get_state_stamp(cwd)
+        origin_future = GitExecutor.submit(['git', 'config', '--get', 'remote.origin.url'], cwd=cwd, stderr=subprocess.DEVNULL)
+        try:
+            output = GitExecutor.run(['git', 'status', '--porcelain=v2', '--branch', '-z'], cwd=cwd, stderr=subprocess.DEVNULL,
+                                     env=GitExecutor.READ_ONLY_ENV)
+            snap.is_repo = True
+            snap.has_status = True
+            snap.parse_status(output)
+        except Exception:
+            snap.is_repo = False
+        try:
+            snap.origin = origin_future.result().strip() or None
+        except Exception:
+            snap.origin = None
+        return snap
+
+    @classmethod
+    def capture_local(cls, cwd=None):
+        # Versione istantanea letta da GitRepo.read_backend, senza processi e senza conteggio modifiche.
+        # Ricade su capture() se il backend non sa rispondere.
+        backend = GitRepo.read_backend
+        if backend is None:
+            return cls.capture(cwd)
+        snap = cls()
+        snap.time = time.time()
+        snap.stamp = backend.state_stamp(cwd)
+        is_repo = backend.is_repo(cwd)
+        if is_repo is False:
+            return snap
+        head = backend.head_ref(cwd) if is_repo else None
+        has_commits = backend.has_commits(cwd) if is_repo else None
+        origin = backend.origin_url(cwd) if is_repo else None
+        if head is None or has_commits is None or origin is None:
+            return cls.capture(cwd)
+        snap.is_repo = True
+        snap.has_commits = has_commits
+        kind, value = head
+        if kind == 'ref':
+            snap.branch = value[len('refs/heads/'):] if value.startswith('refs/heads/') else value
+        elif has_commits:
+            snap.head_oid = value
+        snap.origin = origin or None
+        return snap
+
+class BranchRecord:
+    # Branch locale o remoto restituito da GitRepo.get_branch_inventory.
+    def __init__(self, name, remote, upstream, sha, date):
+        self.name = name            # nome senza prefisso remoto (es. 'feature/x')
+        self.remote = remote        # None per i branch locali
+        self.upstream = upstream    # es. 'origin/main' per i branch locali che lo tracciano
+        self.sha = sha
+        self.date = date            # data del commit (epoch), 0 se sconosciuta
+
+    @property
+    def is_local(self):
+        return self.remote is None
+
+    @property
+    def display_name(self):
+        # Nome mostrato nelle sezioni branch: i branch di origin senza prefisso, gli altri remoti con
+        if self.remote is None or self.remote == 'origin':
+            return self.name
+        return f"{self.remote}/{self.name}"
+
+    def to_dict(self):
+        return {'name': self.name, 'remote': self.remote, 'upstream': self.upstream, 'sha': self.sha, 'date': self.date}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data.get('remote'), data.get('upstream'), data.get('sha', ''), data.get('date', 0))
+
+    def __repr__(self):
+        return f"BranchRecord({self.display_name!r}, remote={self.remote!r}, sha={self.sha[:7]!r})"
+
+class ParallelStager:
+    # Staging per selezioni grandi (es. cartelle di asset binari): invece di far calcolare gli hash
+    # a un solo processo, divide i file fra più 'git hash-object -w --stdin-paths' in parallelo
+    # e applica i risultati all'index con un solo 'git update-index --index-info'.
+    # Gli hash rispettano .gitattributes (filtri, fine riga) perché hash-object riceve il percorso.
+    MIN_BYTES = 64 * 1024 * 1024   # sotto questa soglia un solo processo è già abbastanza veloce
+    MAX_WORKERS = 8
+    PROGRESS_INTERVAL = 0.1
+
+    @classmethod
+    def workers(cls):
+        return max(1, min(cls.MAX_WORKERS, os.cpu_count() or 1))
+
+    @staticmethod
+    def plan(paths, repo_root):
+        # Separa i file regolari (da hashare in parallelo) dal resto: link simbolici, cartelle
+        # (sottomoduli), file cancellati e nomi con a capo restano a 'update-index --add --remove'.
+        # Restituisce (file, altri, byte_totali) con file = [(percorso, dimensione, eseguibile)].
+        files, others, total = [], [], 0
+        for path in paths:
+            try:
+                st = os.lstat(os.path.join(repo_root, path))
+            except OSError:
+                others.append(path)
+                continue
+            if not stat.S_ISREG(st.st_mode) or '\n' in path:
+                others.append(path)
+                continue
+            files.append((path, st.st_size, bool(st.st_mode & 0o111)))
+            total += st.st_size
+        return files, others, total
+
+    @classmethod
+    def _shards(cls, files, count):
+        # Distribuisce i file sui processi bilanciando i byte (il più grande al processo più scarico)
+        heap = [(0, i) for i in range(count)]
+        shards = [[] for _ in range(count)]
+        for item in sorted(files, key=lambda f: f[1], reverse=True):
+            load, i = heapq.heappop(heap)
+            shards[i].append(item)
+            heapq.heappush(heap, (load + item[1], i))
+        return [s for s in shards if s]
+
+    @staticmethod
+    def _hash_shard(shard, repo_root, on_bytes, operation=None):
+        # Un processo hash-object per shard; restituisce gli sha nello stesso ordine dei file
+        kwargs = GitExecutor.subprocess_kwargs()
+        if operation is not None:
+            operation.check()
+            kwargs = operation.popen_kwargs(kwargs)
+        proc = subprocess.Popen(['git', 'hash-object', '-w', '--stdin-paths'], cwd=repo_root,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, encoding='utf-8', errors='replace', **kwargs)
+        if operation is not None:
+            operation.attach(proc)
+        errors = []
+
+        # stdin e stderr in thread separati: con pipe piene il processo si bloccherebbe
+        def feed():
+            try:
+                for path, _, _ in shard:
+                    proc.stdin.write(path + '\n')
+                proc.stdin.close()
+            except OSError:
+                pass
+
+        def drain():
+            errors.append(proc.stderr.read())
+        threads = [threading.Thread(target=feed, daemon=True), threading.Thread(target=drain, daemon=True)]
+        for t in threads:
+            t.start()
+        shas = []
+        for line in proc.stdout:
+            if len(shas) < len(shard):
+                on_bytes(shard[len(shas)][1])
+            shas.append(line.strip())
+        proc.wait()
+        for t in threads:
+            t.join()
+        if operation is not None:
+            operation.detach(proc)
+            operation.check()
+        if proc.returncode != 0 or len(shas) != len(shard):
+            raise subprocess.CalledProcessError(proc.returncode, 'git hash-object', output=''.join(errors))
+        return shas
+
+    @classmethod
+    def stage(cls, files, total, repo_root, env, on_progress=None, operation=None):
+        # Aggiunge i file all'index indicato da env (GIT_INDEX_FILE) riportando i byte elaborati
+        filemode = True
+        try:
+            filemode = GitExecutor.run(['git', 'config', '--bool', 'core.filemode'], cwd=repo_root,
+                                       stderr=subprocess.DEVNULL).strip() != 'false'
+        except subprocess.CalledProcessError:
+            pass
+        modes = {}
+        if not filemode:
+            # Senza bit di esecuzione affidabile (Windows) si conserva il modo già presente nell'index
+            listing = GitExecutor.run(['git', 'ls-files', '-s', '-z'], cwd=repo_root, env=env, stderr=subprocess.PIPE,
+                                      operation=operation)
+            for entry in listing.split('\0'):
+                info, _, path = entry.partition('\t')
+                if path:
+                    modes[path] = info.split(' ', 1)[0]
+        lock = threading.Lock()
+        progress = {'done': 0, 'last': 0.0}
+
+        def on_bytes(size):
+            if on_progress is None:
+                return
+            with lock:
+                progress['done'] += size
+                now = time.time()
+                if now - progress['last'] < cls.PROGRESS_INTERVAL:
+                    return
+                progress['last'] = now
+                done = progress['done']
+            on_progress(done, total)
+        shards = cls._shards(files, cls.workers())
+        with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix='hash-object') as pool:
+            results = list(pool.map(lambda shard: cls._hash_shard(shard, repo_root, on_bytes, operation), shards))
+        if on_progress is not None:
+            on_progress(total, total)
+        lines = []
+        for shard, shas in zip(shards, results):
+            for (path, _, executable), sha in zip(shard, shas):
+                if filemode:
+                    mode = '100755' if executable else '100644'
+                else:
+                    mode = modes.get(path, '100644')
+                lines.append(f"{mode} {sha}\t{path}")
+        GitExecutor.run(['git', 'update-index', '-z', '--index-info'], cwd=repo_root, env=env,
+                        input_text='\0'.join(lines) + '\0', operation=operation)
+
 
 class GitRepo:
+    # Backend di sola lettura per le query frequenti (branch, origin, elenco branch).
+    # Impostare a None per usare sempre i comandi git.
+    read_backend = GitDirReader
+    # Lettura dell'account GitHub da hosts.yml di gh; None per usare sempre 'gh auth status'
+    identity_backend = GhHostsReader
+    # Backup del force pull, per branch: HEAD precedente e modifiche non committate (git stash create)
+    FORCE_PULL_BACKUP = 'refs/gitbash6/backup/head/'
+    FORCE_PULL_WIP = 'refs/gitbash6/backup/wip/'
+    # File in conflitto elencati nei messaggi del cambio branch
+    CHECKOUT_PREVIEW_FILES = 15
 
     @staticmethod
-    def _handle_checkout_overwrite_error(err_msg, retry_cmd, branch, current_branch):
-        # Gestisce l'errore 'would be overwritten by checkout' chiedendo all'utente se vuole annullare le modifiche
-        # e riprovare. Se accetta, esegue git restore sui file coinvolti e riprova il comando di checkout.
-        # retry_cmd: funzione che esegue il comando di checkout (senza argomenti)
-        # branch: branch di destinazione
-        # current_branch: branch corrente
-        root = tk._default_root
-        if root is None:
-            root = tk.Tk()
-            root.withdraw()
-        res = mb.askyesno("Modifiche locali rilevate", "Sono presenti modifiche locali che impediscono il cambio branch.\n\nVuoi annullare le modifiche (git restore) e riprovare?")
-        if res:
-            # Estrai i file che causano l'errore dal messaggio di errore
-            files = []
-            lines = err_msg.splitlines()
-            for i, line in enumerate(lines):
-                if line.strip().startswith('error: Your local changes to the following files would be overwritten by checkout:'):
-                    for file_line in lines[i+1:]:
-                        file_line = file_line.strip()
-                        if not file_line or file_line.startswith('Please commit your changes'):
-                            break
-                        files.append(file_line)
-            if files:
-                try:
-                    subprocess.check_output(['git', 'restore', '--'] + files, stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-                    # Riprova il checkout
-                    try:
-                        output2 = retry_cmd()
-                        GitRepo.unpark_untracked_files(branch)
-                        return True, output2.strip() if isinstance(output2, str) else output2
-                    except subprocess.CalledProcessError as e2:
-                        GitRepo.unpark_untracked_files(current_branch)
-                        return False, e2.output.strip() if hasattr(e2, 'output') and e2.output else str(e2)
-                except subprocess.CalledProcessError as e_restore:
-                    return False, f"Errore durante git restore: {e_restore.output.strip() if hasattr(e_restore, 'output') and e_restore.output else str(e_restore)}"
-            else:
-                return False, "Impossibile determinare i file da ripristinare dall'errore."
-        else:
+    def _read(query):
+        # Interroga il backend di lettura; None significa 'usa il comando git'.
+        backend = GitRepo.read_backend
+        if backend is None:
+            return None
+        try:
+            return getattr(backend, query)()
+        except Exception:
+            return None
+
+    @staticmethod
+    def _discard_local_changes(files, confirm=None):
+        # Chiede all'utente se annullare le modifiche locali che impediscono il cambio branch e, se accetta,
+        # le riporta allo stato di HEAD (index e working directory) con git restore.
+        # confirm: funzione (titolo, messaggio) -> bool usata al posto di messagebox (es. da un thread di lavoro)
+        if confirm is None:
+            root = tk._default_root
+            if root is None:
+                root = tk.Tk()
+                root.withdraw()
+            confirm = mb.askyesno
+        preview = GitRepo._preview_paths(files)
+        res = confirm("Modifiche locali rilevate", f"Le modifiche locali a questi file impediscono il cambio branch:\n\n{preview}\n\nVuoi annullarle (git restore) e cambiare branch?")
+        if not res:
             return False, "Operazione annullata dall'utente."
+        try:
+            GitRepo._run_with_pathspecs(['restore', '--source=HEAD', '--staged', '--worktree'], files)
+        except subprocess.CalledProcessError as e:
+            return False, f"Errore durante git restore: {e.output.strip() if e.output else str(e)}"
+        return True, ''
+
     @staticmethod
-    def park_untracked_files(branch):
-        # Sposta i file non tracciati in una cartella nascosta .git-untracked/<branch>.
-        repo_root = os.path.abspath(subprocess.check_output(['git', 'rev-parse', '--show-toplevel'], text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)).strip())
-        untracked_dir = os.path.join(repo_root, '.git-untracked', branch)
-        os.makedirs(untracked_dir, exist_ok=True)
-        # Trova i file non tracciati
-        status = subprocess.check_output(['git', 'status', '--porcelain'], text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-        untracked_files = [line[3:] for line in status.splitlines() if line.startswith('?? ')]
-        moved = []
-        for f in untracked_files:
-            # Skip .git directories and the .git-untracked directory itself
-            if f.startswith('.git'):
+    def _preview_paths(paths):
+        preview = "\n".join(paths[:GitRepo.CHECKOUT_PREVIEW_FILES])
+        if len(paths) > GitRepo.CHECKOUT_PREVIEW_FILES:
+            preview += f"\n... e altri {len(paths) - GitRepo.CHECKOUT_PREVIEW_FILES}"
+        return preview
+
+    @staticmethod
+    def _overwritten_files(err_msg):
+        # File elencati da git nell'errore 'would be overwritten by checkout'
+        files = []
+        lines = err_msg.splitlines()
+        for i, line in enumerate(lines):
+            if line.strip().startswith('error: Your local changes to the following files would be overwritten by checkout:'):
+                for file_line in lines[i+1:]:
+                    file_line = file_line.strip()
+                    if not file_line or file_line.startswith('Please commit your changes'):
+                        break
+                    files.append(file_line)
+        return files
+
+    @staticmethod
+    def _resolve_checkout_target(name):
+        # Commit che il checkout di name estrarrebbe: il branch locale o, come fa git checkout,
+        # l'unico branch remoto con quel nome. None se non è determinabile.
+        for rev in (f'refs/heads/{name}', name):
+            try:
+                return GitExecutor.run(['git', 'rev-parse', '--verify', '--quiet', f'{rev}^{{commit}}'], stderr=subprocess.DEVNULL).strip()
+            except subprocess.CalledProcessError:
+                pass
+        try:
+            output = GitExecutor.run(['git', 'for-each-ref', '--format=%(objectname)', f'refs/remotes/*/{name}'], stderr=subprocess.DEVNULL)
+        except subprocess.CalledProcessError:
+            return None
+        shas = set(output.split())
+        return shas.pop() if len(shas) == 1 else None
+
+    @staticmethod
+    def checkout_preflight(target):
+        # Prevede i conflitti del checkout di target (commit) prima di spostare qualsiasi file.
+        # Restituisce {'changed', 'modified', 'untracked'}: i percorsi che il checkout riscrive, quelli con
+        # modifiche locali che git rifiuterebbe di sovrascrivere e i non tracciati che il branch di
+        # destinazione traccia (protetti dal parcheggio). None se non è prevedibile (es. repository senza commit).
+        try:
+            changed = GitExecutor.run(['git', 'diff-tree', '-r', '-z', '--name-only', '--no-renames', 'HEAD', target], stderr=subprocess.DEVNULL)
+            changed = {p for p in changed.split('\0') if p}
+            result = {'changed': changed, 'modified': [], 'untracked': []}
+            if not changed:
+                return result
+            # Modifiche locali (index o working directory) rispetto a HEAD, escluse quelle già uguali al target
+            local = GitExecutor.run(['git', 'diff', '-z', '--name-only', '--no-renames', 'HEAD'], stderr=subprocess.DEVNULL)
+            candidates = changed.intersection(p for p in local.split('\0') if p)
+            if candidates:
+                differs = GitExecutor.run(['git', 'diff', '-z', '--name-only', '--no-renames', target], stderr=subprocess.DEVNULL)
+                result['modified'] = sorted(candidates.intersection(p for p in differs.split('\0') if p))
+            untracked = GitExecutor.run(['git', 'ls-files', '-z', '-o', '--directory', '--exclude-standard'], stderr=subprocess.DEVNULL)
+            # Un non tracciato è coinvolto se coincide con un percorso del target, lo contiene (cartella)
+            # o ne è una cartella padre (file non tracciato dove il target ha una cartella)
+            parents = {p.rsplit('/', i)[0] for p in changed for i in range(1, p.count('/') + 1)}
+            for path in (p for p in untracked.split('\0') if p):
+                name = path.rstrip('/')
+                if name in changed or name in parents or (path.endswith('/') and any(c.startswith(path) for c in changed)):
+                    result['untracked'].append(name)
+        except (subprocess.CalledProcessError, OSError):
+            return None
+        return result
+
+    @staticmethod
+    def _switch_branch(cmd, target, dest_branch, confirm=None):
+        # Cambio branch comune a checkout, checkout_new e create_and_checkout_from_branch.
+        # Il preflight individua in anticipo le modifiche locali in conflitto: l'utente decide prima che
+        # i file non tracciati vengano parcheggiati, e parcheggio e checkout avvengono una volta sola.
+        # cmd: comando git checkout; target: nome del commit da estrarre; dest_branch: branch di destinazione
+        current_branch = GitRepo.get_current_branch()
+        sha = GitRepo._resolve_checkout_target(target)
+        preflight = GitRepo.checkout_preflight(sha) if sha else None
+        if preflight is not None and preflight['modified']:
+            ok, msg = GitRepo._discard_local_changes(preflight['modified'], confirm)
+            if not ok:
+                return False, msg
+        for attempt in range(2):
+            GitRepo.park_untracked_files(current_branch)
+            if preflight is not None and preflight['untracked']:
+                # Un non tracciato rimasto al suo posto (es. file aperto da un altro programma) farebbe fallire il checkout
+                root = GitRepo.get_repo_root()
+                blocked = [p for p in preflight['untracked'] if os.path.lexists(os.path.join(root, p))]
+                if blocked:
+                    GitRepo.unpark_untracked_files(current_branch)
+                    return False, f"Impossibile parcheggiare i file non tracciati che il branch sovrascriverebbe:\n\n{GitRepo._preview_paths(blocked)}"
+            try:
+                output = GitExecutor.run(cmd)
+            except subprocess.CalledProcessError as e:
+                GitRepo.unpark_untracked_files(current_branch)
+                err_msg = e.output.strip() if hasattr(e, 'output') and e.output else str(e)
+                # Solo se il preflight non era possibile (o la working directory è cambiata nel frattempo)
+                files = GitRepo._overwritten_files(err_msg) if attempt == 0 else []
+                if not files:
+                    return False, err_msg
+                ok, msg = GitRepo._discard_local_changes(files, confirm)
+                if not ok:
+                    return False, msg
                 continue
-            abs_f = os.path.join(repo_root, f)
-            if os.path.isfile(abs_f):
-                dest = os.path.join(untracked_dir, os.path.basename(f))
-                shutil.move(abs_f, dest)
-                moved.append(f)
-            elif os.path.isdir(abs_f):
-                dest = os.path.join(untracked_dir, os.path.basename(f))
-                shutil.move(abs_f, dest)
-                moved.append(f)
-        return moved
+            GitRepo.unpark_untracked_files(dest_branch)
+            return True, output.strip()
+
+    @staticmethod
+    def _untracked_parking():
+        repo_root = GitExecutor.run(['git', 'rev-parse', '--show-toplevel'], stderr=subprocess.DEVNULL).strip()
+        return UntrackedParking(repo_root, lambda args: GitExecutor.run(['git'] + args, cwd=repo_root, stderr=subprocess.DEVNULL))
+
+    @staticmethod
+    def park_untracked_files(branch):
+        # Sposta i file non tracciati nel parcheggio del branch (vedi UntrackedParking).
+        return GitRepo._untracked_parking().park(branch)
 
     @staticmethod
     def unpark_untracked_files(branch):
-        # Ripristina i file non tracciati dalla cartella .git-untracked/<branch> nella working directory.
-        repo_root = os.path.abspath(subprocess.check_output(['git', 'rev-parse', '--show-toplevel'], text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)).strip())
-        untracked_dir = os.path.join(repo_root, '.git-untracked', branch)
-        if not os.path.isdir(untracked_dir):
-            return []
-        restored = []
-        for name in os.listdir(untracked_dir):
-            src = os.path.join(untracked_dir, name)
-            dest = os.path.join(repo_root, name)
-            shutil.move(src, dest)
-            restored.append(name)
-        # Rimuovi la cartella se vuota
-        try:
-            os.rmdir(untracked_dir)
-        except OSError:
-            pass
-        return restored
+        # Ripristina nella working directory i file non tracciati parcheggiati per il branch.
+        return GitRepo._untracked_parking().unpark(branch)
     
     @staticmethod
     def run_gh_command(args, input_text=None, hide_console=True):
         # Esegue un comando gh (GitHub CLI) con gestione della console su Windows.
         # Restituisce (returncode, stdout, stderr)
-        kwargs = {'capture_output': True,'text': True}
+        kwargs = GitExecutor.subprocess_kwargs() if hide_console else {}
+        kwargs.update({'capture_output': True, 'text': True})
         if input_text is not None:
             kwargs['input'] = input_text
-        if hide_console and os.name == 'nt':
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            kwargs['startupinfo'] = startupinfo
         try:
             # Se il comando è 'auth login', esegui prima il logout
             if len(args) >= 2 and args[0] == 'auth' and args[1] == 'login':
@@ -144,7 +748,7 @@ class GitRepo:
     def get_status_short_branch():
         # Restituisce l'output di 'git status --short --branch'
         try:
-            output = subprocess.check_output(['git', 'status', '--short', '--branch'], text=True, stderr=subprocess.STDOUT, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            output = GitExecutor.run(['git', 'status', '--short', '--branch'])
             return True, output.strip()
         except subprocess.CalledProcessError as e:
             return False, e.output.strip() if hasattr(e, 'output') and e.output else str(e)
@@ -155,7 +759,7 @@ class GitRepo:
     def get_status_porcelain():
         # Restituisce l'output di 'git status --porcelain'
         try:
-            output = subprocess.check_output(['git', 'status', '--porcelain'], text=True, stderr=subprocess.STDOUT, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            output = GitExecutor.run(['git', 'status', '--porcelain'])
             return True, output.strip()
         except subprocess.CalledProcessError as e:
             return False, e.output.strip() if hasattr(e, 'output') and e.output else str(e)
@@ -166,7 +770,7 @@ class GitRepo:
     def delete_local_branch(branch):
         # Elimina un branch locale e restituisce direttamente l'output di git.
         try:
-            output = subprocess.check_output(['git', 'branch', '-D', branch], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            output = GitExecutor.run(['git', 'branch', '-D', branch])
             return True, output.strip()
         except subprocess.CalledProcessError as e:
             return False, e.output.strip() if hasattr(e, 'output') and e.output else str(e)
@@ -177,23 +781,54 @@ class GitRepo:
         try:
             remote_branches = GitRepo.get_remote_branches()
             if branch in remote_branches:
-                output = subprocess.check_output(['git', 'checkout', '-b', branch, f'origin/{branch}'], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+                output = GitExecutor.run(['git', 'checkout', '-b', branch, f'origin/{branch}'])
                 return True, output.strip()
             else:
-                output = subprocess.check_output(['git', 'checkout', '-b', branch], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+                output = GitExecutor.run(['git', 'checkout', '-b', branch])
                 return True, output.strip()
         except subprocess.CalledProcessError as e:
             return False, e.output.strip() if hasattr(e, 'output') and e.output else str(e)
         
+    @staticmethod
+    def get_state_stamp(cwd=None):
+        # Impronta dei file di stato in .git, None se non calcolabile senza git
+        backend = GitRepo.read_backend
+        if backend is None:
+            return None
+        try:
+            return backend.state_stamp(cwd)
+        except Exception:
+            return None
+
+    @staticmethod
+    def get_repo_root(cwd=None):
+        # Radice del worktree: dai file .git se possibile, altrimenti con git rev-parse
+        root = None
+        if GitRepo.read_backend is not None:
+            try:
+                root = GitRepo.read_backend.worktree_root(cwd)
+            except Exception:
+                root = None
+        if root is None:
+            try:
+                root = GitExecutor.run(['git', 'rev-parse', '--show-toplevel'], cwd=cwd, stderr=subprocess.DEVNULL).strip()
+            except (subprocess.CalledProcessError, OSError):
+                root = cwd or os.getcwd()
+        return os.path.abspath(root)
+
+    @staticmethod
+    def get_snapshot(full=True, cwd=None):
+        # Stato della repository in una sola interrogazione.
+        # full=False legge solo i file .git (istantaneo, senza upstream e conteggio modifiche).
+        return RepoSnapshot.capture(cwd) if full else RepoSnapshot.capture_local(cwd)
+
     @staticmethod
     def is_valid_repo():
+        result = GitRepo._read('is_repo')
+        if result is not None:
+            return result
         try:
-            startupinfo = None
-            if hasattr(subprocess, 'STARTF_USESHOWWINDOW'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            subprocess.check_output(['git', 'rev-parse', '--is-inside-work-tree'], stderr=subprocess.STDOUT, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0), startupinfo=startupinfo)
+            GitExecutor.run(['git', 'rev-parse', '--is-inside-work-tree'])
             return True
         except Exception:
             return False
@@ -202,7 +837,7 @@ class GitRepo:
     def init_repository():
         # Inizializza una nuova repository git nella directory corrente.
         try:
-            output = subprocess.check_output(['git', 'init'], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            output = GitExecutor.run(['git', 'init'])
             return True, output.strip() or "Repository inizializzata con successo."
         except subprocess.CalledProcessError as e:
             return False, e.output.strip() if hasattr(e, 'output') and e.output else str(e)
@@ -213,8 +848,7 @@ class GitRepo:
     def create_initial_commit():
         # Crea un commit vuoto per inizializzare la repository con un primo commit.
         try:
-            output = subprocess.check_output(['git', 'commit', '--allow-empty', '-m', 'Initial commit'], 
-                                           stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            output = GitExecutor.run(['git', 'commit', '--allow-empty', '-m', 'Initial commit'])
             return True, output.strip() or "Commit iniziale creato con successo."
         except subprocess.CalledProcessError as e:
             return False, e.output.strip() if hasattr(e, 'output') and e.output else str(e)
@@ -223,16 +857,12 @@ class GitRepo:
 
     @staticmethod
     def has_commits():
+        result = GitRepo._read('has_commits')
+        if result is not None:
+            return result
+        # Usa il processo cat-file persistente invece di un 'git rev-parse HEAD' per chiamata
         try:
-            startupinfo = None
-            if hasattr(subprocess, 'STARTF_USESHOWWINDOW'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.STDOUT, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0), startupinfo=startupinfo)
-            return True
-        except subprocess.CalledProcessError:
-            return False
+            return GitExecutor.resolve('HEAD') is not None
         except Exception:
             return False
 
@@ -240,159 +870,254 @@ class GitRepo:
     def get_current_branch():
         if not GitRepo.has_commits():
             return "(nessun commit)"
+        branch = GitRepo._read('current_branch')
+        if branch is not None:
+            return branch
         try:
-            startupinfo = None
-            if hasattr(subprocess, 'STARTF_USESHOWWINDOW'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            return subprocess.check_output(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0), startupinfo=startupinfo).strip()
+            return GitExecutor.run(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], stderr=subprocess.DEVNULL).strip()
         except Exception:
             return "(nessun branch)"
 
     @staticmethod
-    def get_current_origin():
-        if not GitRepo.has_commits():
-            return "(nessun link remoto)"
+    def get_current_origin(cwd=None):
+        # cwd: repository indicata esplicitamente (dal worker); il backend di lettura segue la directory corrente
+        if cwd is None:
+            if not GitRepo.has_commits():
+                return "(nessun link remoto)"
+            origin = GitRepo._read('origin_url')
+            if origin is not None:
+                return origin or "(nessun link remoto)"
         try:
-            startupinfo = None
-            if hasattr(subprocess, 'STARTF_USESHOWWINDOW'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            return subprocess.check_output(['git', 'remote', 'get-url', 'origin'], text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0), startupinfo=startupinfo).strip()
+            return GitExecutor.run(['git', 'remote', 'get-url', 'origin'], cwd=cwd, stderr=subprocess.DEVNULL).strip()
         except Exception:
             return "(nessun link remoto)"
 
     @staticmethod
-    def fetch():
+    def fetch(prune=False, cwd=None, on_git_progress=None, operation=None):
         try:
-            startupinfo = None
-            if hasattr(subprocess, 'STARTF_USESHOWWINDOW'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            output = subprocess.check_output(['git', 'fetch'], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0), startupinfo=startupinfo)
+            cmd = ['git', 'fetch', '--progress'] + (['--prune'] if prune else [])
+            output = GitExecutor.stream(cmd, cwd=cwd, on_progress=on_git_progress, operation=operation)
             return True, output.strip()
         except subprocess.CalledProcessError as e:
             return False, e.output.strip() if hasattr(e, 'output') and e.output else str(e)
 
     @staticmethod
-    def pull(branch):
+    def pull(branch, on_git_progress=None, operation=None):
         try:
-            output = subprocess.check_output(['git', 'pull', 'origin', branch], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            output = GitExecutor.stream(['git', 'pull', '--progress', 'origin', branch], on_progress=on_git_progress,
+                                        operation=operation)
             return True, output.strip()
         except subprocess.CalledProcessError as e:
-            # Mostra solo errore e suggerisce di abilitare il force pull
-            root = tk._default_root
-            if root is None:
-                root = tk.Tk()
-                root.withdraw()
-            mb.showerror("Errore pull", f"Si è verificato un errore durante il pull:\n\n{e.output.strip() if hasattr(e, 'output') and e.output else str(e)}\n\nPer risolvere, abilita l'opzione Force Pull.")
+            # Nessuna finestra qui: il pull gira nel worker, l'errore lo mostra l'interfaccia
             return False, e.output.strip() if hasattr(e, 'output') and e.output else str(e)
 
     @staticmethod
-    def pull_force(branch):
-        # Chiede sempre la riclonazione, senza tentare fetch o reset
-        root = tk._default_root
-        if root is None:
-            root = tk.Tk()
-            root.withdraw()
-        res = mb.askyesno("Riclonazione repository", "Vuoi cancellare e riclonare la repository da remoto?\n\nATTENZIONE: Tutte le modifiche locali e file non tracciati andranno perse.")
-        if res:
-            ok, msg = GitRepo.offer_cancel_or_clone()
-            return ok, msg
-        else:
-            return False, "Operazione annullata dall'utente."
+    def force_pull_prepare(branch, cwd=None, on_git_progress=None, operation=None):
+        # Primo passo del force pull (nel worker): scarica solo il branch remoto e raccoglie
+        # cosa andrebbe perso, per la conferma. Restituisce (True, info) oppure (False, errore).
+        # info: target (sha remoto), current (branch corrente o None), ahead (commit locali persi),
+        # changes (file tracciati modificati) e untracked (percorsi che clean rimuoverebbe).
+        try:
+            GitExecutor.stream(['git', 'fetch', '--progress', 'origin', branch], cwd=cwd,
+                               on_progress=on_git_progress, operation=operation)
+            target = GitExecutor.run(['git', 'rev-parse', '--verify', '-q', 'FETCH_HEAD^{commit}'], cwd=cwd,
+                                     stderr=subprocess.DEVNULL).strip()
+        except subprocess.CalledProcessError as e:
+            return False, e.output.strip() if e.output else str(e)
+        info = {'target': target, 'current': None, 'ahead': 0, 'changes': 0, 'untracked': []}
+        try:
+            info['current'] = GitExecutor.run(['git', 'symbolic-ref', '-q', '--short', 'HEAD'], cwd=cwd,
+                                              stderr=subprocess.DEVNULL).strip() or None
+        except subprocess.CalledProcessError:
+            pass
+        try:
+            info['ahead'] = int(GitExecutor.run(['git', 'rev-list', '--count', f'{target}..HEAD'], cwd=cwd,
+                                                stderr=subprocess.DEVNULL).strip())
+        except (subprocess.CalledProcessError, ValueError):
+            pass
+        try:
+            status = GitExecutor.run(['git', 'status', '--porcelain=v2', '-z', '--untracked-files=no'], cwd=cwd,
+                                     stderr=subprocess.DEVNULL)
+            # Un file per voce '1', '2' o 'u' (come in RepoSnapshot.parse_status); le rinomine ('2')
+            # hanno il percorso originale come campo successivo, che non va contato
+            fields = status.split('\0')
+            i = 0
+            while i < len(fields):
+                entry = fields[i]
+                i += 1
+                if entry[:1] in ('1', '2', 'u'):
+                    info['changes'] += 1
+                    if entry[0] == '2':
+                        i += 1
+            # Stesso insieme di 'git clean -d' (senza -x) su tutta la repository, relativo alla root:
+            # cartelle non tracciate intere, file ignorati e repository annidate esclusi
+            root = GitRepo.get_repo_root(cwd)
+            untracked = GitExecutor.run(['git', 'ls-files', '-z', '-o', '--directory', '--exclude-standard'],
+                                        cwd=root, stderr=subprocess.DEVNULL)
+            info['untracked'] = [p for p in untracked.split('\0')
+                                 if p and not (p.endswith('/') and os.path.exists(os.path.join(root, p, '.git')))]
+        except subprocess.CalledProcessError:
+            pass
+        return True, info
+
+    @staticmethod
+    def _backup_name(current):
+        return current or 'HEAD'
 
     @staticmethod
-    def push(files, branch, commit_msg, force=False, on_too_many_files=None):
+    def force_pull_apply(target, current=None, clean_paths=None, cwd=None):
+        # Secondo passo (nel worker, dopo la conferma): salva HEAD e le modifiche non committate
+        # in refs/gitbash6/backup, porta il branch corrente su target con 'reset --hard' e,
+        # se richiesto, rimuove i percorsi non tracciati mostrati nell'anteprima.
+        name = GitRepo._backup_name(current)
+        try:
+            head = GitExecutor.run(['git', 'rev-parse', '-q', '--verify', 'HEAD^{commit}'], cwd=cwd,
+                                   stderr=subprocess.DEVNULL).strip()
+        except subprocess.CalledProcessError:
+            head = ''
+        try:
+            if head:
+                GitExecutor.run(['git', 'update-ref', '--create-reflog', '-m', f'force pull: backup di {name}',
+                                 GitRepo.FORCE_PULL_BACKUP + name, head], cwd=cwd)
+                # Commit delle modifiche non committate, senza toccare worktree e index ('' se non ce ne sono)
+                wip = GitExecutor.run(['git', 'stash', 'create', f'force pull: modifiche su {name}'], cwd=cwd,
+                                      stderr=subprocess.DEVNULL).strip()
+                if wip:
+                    GitExecutor.run(['git', 'update-ref', '--create-reflog', '-m', 'force pull: modifiche',
+                                     GitRepo.FORCE_PULL_WIP + name, wip], cwd=cwd)
+                else:
+                    GitExecutor.run(['git', 'update-ref', '-d', GitRepo.FORCE_PULL_WIP + name], cwd=cwd,
+                                    stderr=subprocess.DEVNULL)
+            output = GitExecutor.run(['git', 'reset', '--hard', target], cwd=cwd)
+        except subprocess.CalledProcessError as e:
+            return False, e.output.strip() if e.output else str(e)
+        removed, failed = GitRepo._remove_untracked(clean_paths or [], cwd)
+        msg = output.strip()
+        if removed:
+            msg += f"\nRimossi {removed} percorsi non tracciati."
+        if failed:
+            msg += "\nNon è stato possibile rimuovere:\n" + "\n".join(failed[:10])
+        return True, msg
+
+    @staticmethod
+    def _remove_untracked(paths, cwd=None):
+        # Rimuove i percorsi elencati da force_pull_prepare (relativi alla root, cartelle con '/' finale).
+        # Le repository annidate restano al loro posto, come fa 'git clean -d' senza -ff.
+        root = GitRepo.get_repo_root(cwd)
+        current = os.path.normcase(os.path.abspath(cwd or os.getcwd()))
+        removed, failed = 0, []
+        for rel in paths:
+            path = os.path.join(root, rel.rstrip('/'))
+            try:
+                if os.path.isdir(path) and not os.path.islink(path):
+                    if os.path.exists(os.path.join(path, '.git')):
+                        continue
+                    norm = os.path.normcase(os.path.abspath(path))
+                    if current == norm or current.startswith(norm + os.sep):
+                        # La cartella di lavoro dell'applicazione non può sparire
+                        failed.append(rel)
+                        continue
+                    shutil.rmtree(path)
+                elif os.path.lexists(path):
+                    os.remove(path)
+                else:
+                    continue
+                removed += 1
+            except OSError as e:
+                print(f"[force_pull] Errore durante la rimozione di {rel}: {e}")
+                failed.append(rel)
+        return removed, failed
+
+    @staticmethod
+    def get_force_pull_backup(cwd=None):
+        # Backup dell'ultimo force pull sul branch corrente: (nome, sha_head, sha_modifiche) o None
+        try:
+            current = GitExecutor.run(['git', 'symbolic-ref', '-q', '--short', 'HEAD'], cwd=cwd,
+                                      stderr=subprocess.DEVNULL).strip() or None
+        except subprocess.CalledProcessError:
+            current = None
+        name = GitRepo._backup_name(current)
+        refs = {}
+        try:
+            output = GitExecutor.run(['git', 'for-each-ref', '--format=%(refname) %(objectname)',
+                                      GitRepo.FORCE_PULL_BACKUP + name, GitRepo.FORCE_PULL_WIP + name],
+                                     cwd=cwd, stderr=subprocess.DEVNULL)
+        except subprocess.CalledProcessError:
+            return None
+        for line in output.splitlines():
+            ref, _, sha = line.partition(' ')
+            refs[ref] = sha
+        head = refs.get(GitRepo.FORCE_PULL_BACKUP + name)
+        if not head:
+            return None
+        return name, head, refs.get(GitRepo.FORCE_PULL_WIP + name)
+
+    @staticmethod
+    def restore_force_pull_backup(cwd=None):
+        # Annulla l'ultimo force pull: riporta il branch al commit salvato e riapplica le modifiche
+        backup = GitRepo.get_force_pull_backup(cwd)
+        if backup is None:
+            return False, "Nessun backup di force pull per il branch corrente."
+        name, head, wip = backup
+        try:
+            output = GitExecutor.run(['git', 'reset', '--hard', head], cwd=cwd)
+            if wip:
+                try:
+                    # --index riporta anche lo staging (es. rinomine già aggiunte all'index)
+                    output += GitExecutor.run(['git', 'stash', 'apply', '--index', wip], cwd=cwd)
+                except subprocess.CalledProcessError as e:
+                    print(f"[restore_force_pull_backup] Errore nel ripristino dell'index: {e.output}")
+                    output += GitExecutor.run(['git', 'stash', 'apply', wip], cwd=cwd)
+                    output += "\nAttenzione: le modifiche sono state riapplicate ma l'area di staging non è stata ripristinata."
+            GitExecutor.run(['git', 'update-ref', '-d', GitRepo.FORCE_PULL_BACKUP + name], cwd=cwd)
+            if wip:
+                GitExecutor.run(['git', 'update-ref', '-d', GitRepo.FORCE_PULL_WIP + name], cwd=cwd)
+            return True, output.strip()
+        except subprocess.CalledProcessError as e:
+            return False, e.output.strip() if e.output else str(e)
+
+    @staticmethod
+    def push(files, branch, commit_msg, force=False, repo_root=None, on_progress=None, on_git_progress=None,
+             operation=None):
+        # files: percorsi relativi alla root della repository (output di PathExpander), None per il push globale
+        # Tutti i comandi girano in repo_root: nel worker la directory del processo può cambiare nel frattempo.
+        # on_progress(fatti, totale) segue l'hashing dei file grandi, on_git_progress(GitProgress) l'invio.
+        # Annullato con operation solleva OperationCancelled (indicando se il commit era già stato creato).
+        committed = False
         try:
             output = ""
-            repo_root = os.path.abspath(subprocess.check_output(['git', 'rev-parse', '--show-toplevel'], text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)).strip())
+            if repo_root is None:
+                repo_root = GitRepo.get_repo_root()
 
             def do_global_push():
                 nonlocal output
-                output += subprocess.check_output(['git', 'add', '-A'], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)) or ""
+                output += GitExecutor.run(['git', 'add', '-A'], cwd=repo_root, operation=operation) or ""
                 # Non controllare lo status prima - lascia che git commit gestisca il caso
-                output += subprocess.check_output(['git', 'commit', '-m', commit_msg], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+                output += GitExecutor.run(['git', 'commit', '-m', commit_msg], cwd=repo_root, operation=operation)
                 return True, None
             if not files or len(files) == 0:
                 ok, msg = do_global_push()
                 if not ok:
                     return False, msg
             else:
-                # Espandi file e cartelle ricorsivamente
-                files_to_add = []
-                def add_files_recursively(path):
-                    abs_path = os.path.abspath(path)
-                    if os.path.isfile(abs_path):
-                        git_path = os.path.relpath(abs_path, repo_root).replace('\\', '/')
-                        files_to_add.append(git_path)
-                    elif os.path.isdir(abs_path):
-                        for root, _, filenames in os.walk(abs_path):
-                            for filename in filenames:
-                                file_abs = os.path.join(root, filename)
-                                git_path = os.path.relpath(file_abs, repo_root).replace('\\', '/')
-                                files_to_add.append(git_path)
-                for f in files:
-                    add_files_recursively(f)
-                # Rimuovi duplicati mantenendo l'ordine
-                files_to_add = list(dict.fromkeys(files_to_add))
-                if not files_to_add:
-                    return False, "Nessun file selezionato da committare."
-                try:
-                    # Prima resetta i file selezionati dallo staging (così git add è sempre "fresco")
-                    subprocess.check_output(['git', 'reset', 'HEAD', '--'] + files_to_add, stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-                    # Esegui git add solo sui file selezionati
-                    output += subprocess.check_output(['git', 'add', '--'] + files_to_add, stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)) or ""
-                    # Controlla se almeno uno dei file selezionati è staged
-                    diff_files = subprocess.check_output(['git', 'diff', '--cached', '--name-only', '--'] + files_to_add, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-                    if not diff_files.strip():
-                        return False, "Nessuna modifica da committare nei file selezionati."
-                    # Committa solo se almeno un file selezionato è staged
-                    output += subprocess.check_output(['git', 'commit', '-m', commit_msg], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-                except (subprocess.CalledProcessError, OSError) as e:
-                    err_msg = str(e)
-                    # Cerca errori di "troppi file" o "estensione troppo lunga"
-                    if any(x in err_msg.lower() for x in ["file name too long", "arg list too long", "estensione troppo lunga", "argument list too long"]):
-                        if on_too_many_files and callable(on_too_many_files):
-                            user_confirm = on_too_many_files()
-                            if user_confirm:
-                                ok, msg = do_global_push()
-                                if not ok:
-                                    return False, msg
-                            else:
-                                return False, "Push annullato dall'utente (troppi file selezionati)."
-                        else:
-                            # Callback visuale di default
-                            root = None
-                            try:
-                                root = tk._default_root
-                                if root is None:
-                                    root = tk.Tk()
-                                    root.withdraw()
-                                user_confirm = mb.askyesno("Push globale", "Hai selezionato troppi file/cartelle per il push selettivo.\n\nVuoi eseguire un commit e push di TUTTE le modifiche nella repository?\n\nQuesta azione includerà TUTTI i file modificati, aggiunti o cancellati.")
-                            except Exception:
-                                user_confirm = False
-                            finally:
-                                if root is not None and not root.winfo_viewable():
-                                    root.destroy()
-                            if user_confirm:
-                                ok, msg = do_global_push()
-                                if not ok:
-                                    return False, msg
-                            else:
-                                return False, "Push annullato dall'utente (troppi file selezionati)."
-                    else:
-                        return False, err_msg
+                # L'espansione delle cartelle e la rimozione dei duplicati sono già fatte da PathExpander
+                ok, msg = GitRepo.commit_selected(files, commit_msg, repo_root, on_progress=on_progress,
+                                                  operation=operation)
+                if not ok:
+                    return False, msg
+                output += msg + "\n"
+            committed = True
 
             # Push con o senza force
-            push_cmd = ['git', 'push', 'origin', branch]
+            push_cmd = ['git', 'push', '--progress', 'origin', branch]
             if force:
                 push_cmd.insert(2, '--force')
-            output += subprocess.check_output(push_cmd, stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            output += GitExecutor.stream(push_cmd, cwd=repo_root, on_progress=on_git_progress, operation=operation)
             return True, output.strip()
+        except OperationCancelled:
+            if committed:
+                raise OperationCancelled("Il commit locale è stato creato ma non è stato inviato al remoto.")
+            raise
         except subprocess.CalledProcessError as e:
             error_msg = e.output.strip() if hasattr(e, 'output') and e.output else str(e)
             # Rileva errore "repository not found"
@@ -400,96 +1125,182 @@ class GitRepo:
                 return False, f"REPO_NOT_FOUND:{error_msg}"
             return False, error_msg
 
+    @staticmethod
+    def commit_selected(paths, commit_msg, repo_root, on_progress=None, operation=None):
+        # Commit dei soli percorsi selezionati costruito in un index temporaneo (GIT_INDEX_FILE):
+        # index temporaneo = HEAD + file selezionati -> 'git commit' sull'index temporaneo.
+        # L'index reale non viene riscritto per intero: alla fine si riallineano solo i percorsi
+        # selezionati, quindi quello che l'utente aveva in staging per altri file resta com'è.
+        # 'git add' e 'git commit' mantengono file ignorati rifiutati, hook, firma e pulizia del messaggio.
+        # paths: relativi alla root. Per selezioni grandi gli hash sono calcolati in parallelo
+        # (ParallelStager) e on_progress(byte_elaborati, byte_totali) riporta l'avanzamento.
+        # operation annulla la preparazione dell'index; da 'git commit' in poi si arriva sempre in fondo.
+        # Restituisce (ok, messaggio).
+        paths = [p.rstrip('/') for p in paths]
+        tmp_dir = tempfile.mkdtemp(prefix='gitbash6-index-')
+        tmp_env = {'GIT_INDEX_FILE': os.path.join(tmp_dir, 'index')}
+        try:
+            try:
+                head = GitExecutor.run(['git', 'rev-parse', '-q', '--verify', 'HEAD^{commit}'], cwd=repo_root, stderr=subprocess.DEVNULL).strip()
+            except subprocess.CalledProcessError:
+                head = ''  # branch senza commit
+            if head:
+                GitExecutor.run(['git', 'read-tree', head], cwd=repo_root, env=tmp_env, operation=operation)
+            else:
+                GitExecutor.run(['git', 'read-tree', '--empty'], cwd=repo_root, env=tmp_env, operation=operation)
+            files, others, total = ParallelStager.plan(paths, repo_root)
+            if total >= ParallelStager.MIN_BYTES and len(files) > 1:
+                # I file ignorati e non tracciati restano a 'git add', che li rifiuta come prima
+                ignored = set(GitRepo._ignored_paths([f[0] for f in files], repo_root, tmp_env))
+                if ignored:
+                    files = [f for f in files if f[0] not in ignored]
+                    others = others + sorted(ignored)
+                    total = sum(f[1] for f in files)
+                if files:
+                    ParallelStager.stage(files, total, repo_root, tmp_env, on_progress, operation)
+                remaining = others
+            else:
+                remaining = paths
+            if remaining:
+                # Aggiunge, aggiorna o rimuove (se cancellati dal disco) i percorsi selezionati
+                GitRepo._run_with_pathspecs(['add'], remaining, cwd=repo_root, env=tmp_env, operation=operation)
+            tree = GitExecutor.run(['git', 'write-tree'], cwd=repo_root, env=tmp_env, stderr=subprocess.PIPE,
+                                   operation=operation).strip()
+            if head:
+                head_tree = GitExecutor.run(['git', 'rev-parse', head + '^{tree}'], cwd=repo_root, stderr=subprocess.PIPE).strip()
+                if tree == head_tree:
+                    return False, "Nessuna modifica da committare nei file selezionati."
+            output = GitExecutor.run(['git', 'commit', '-m', commit_msg], cwd=repo_root, env=tmp_env)
+            # Riallinea l'index reale al nuovo HEAD solo per i percorsi selezionati
+            try:
+                GitRepo._run_with_pathspecs(['reset', '-q'], paths, cwd=repo_root)
+            except subprocess.CalledProcessError as e:
+                print(f"[commit_selected] Errore nel riallineamento dell'index: {e.output}")
+            return True, output.strip()
+        except subprocess.CalledProcessError as e:
+            err = e.output if e.output else (e.stderr or str(e))
+            return False, err.strip()
+        except OSError as e:
+            return False, str(e)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _ignored_paths(paths, repo_root, env=None):
+        # Percorsi non tracciati (nell'index indicato da env) esclusi da .gitignore
+        try:
+            output = GitExecutor.run(['git', 'check-ignore', '-z', '--stdin'], cwd=repo_root, env=env,
+                                     input_text='\0'.join(paths) + '\0', stderr=subprocess.DEVNULL)
+        except subprocess.CalledProcessError as e:
+            output = e.output if e.returncode == 1 else ''  # 1: nessun percorso ignorato
+        return [p for p in output.split('\0') if p]
+
+    @staticmethod
+    def list_changed_files(dirs, cwd=None):
+        # File da considerare sotto le cartelle selezionate, chiesti a git invece di visitare il disco:
+        # modificati e cancellati (-m -d), nuovi non ignorati (-o --exclude-standard) e già in staging.
+        # dirs e risultato sono relativi alla root (cwd); None se git non risponde.
+        specs = ['--'] + [d or '.' for d in dirs]
+        try:
+            staged = GitExecutor.submit(['git', '--literal-pathspecs', 'diff', '--cached', '--name-only', '--no-renames', '-z'] + specs,
+                                        cwd=cwd, stderr=subprocess.DEVNULL)
+            listed = GitExecutor.run(['git', '--literal-pathspecs', 'ls-files', '-z', '-m', '-o', '-d', '--exclude-standard'] + specs,
+                                     cwd=cwd, stderr=subprocess.DEVNULL)
+            listed += staged.result()
+        except (subprocess.CalledProcessError, OSError):
+            return None
+        return list(dict.fromkeys(p for p in listed.split('\0') if p))
+
+    @staticmethod
+    def _run_with_pathspecs(args, paths, cwd=None, env=None, operation=None):
+        # Esegue 'git <args>' passando i percorsi su stdin separati da NUL (--pathspec-from-file):
+        # nessun limite di lunghezza della riga di comando e nessun problema con spazi o a capo.
+        # --literal-pathspecs evita che nomi con *, ? o ':' vengano interpretati come pattern.
+        cmd = ['git', '--literal-pathspecs'] + args + ['--pathspec-from-file=-', '--pathspec-file-nul']
+        return GitExecutor.run(cmd, cwd=cwd, input_text='\0'.join(paths), env=env, operation=operation)
+
+    @staticmethod
+    def get_branch_inventory(cwd=None):
+        # Elenca branch locali e remoti con un solo 'git for-each-ref'.
+        # Restituisce una lista di BranchRecord ordinata dal commit più recente.
+        fmt = '%(refname)%00%(symref)%00%(objectname)%00%(upstream:short)%00%(committerdate:unix)'
+        try:
+            output = GitExecutor.run(['git', 'for-each-ref', f'--format={fmt}', 'refs/heads', 'refs/remotes'], cwd=cwd, stderr=subprocess.DEVNULL)
+        except Exception:
+            return []
+        records = []
+        for line in output.splitlines():
+            parts = line.split('\0')
+            if len(parts) != 5:
+                continue
+            refname, symref, sha, upstream, date = parts
+            if symref:
+                # es. refs/remotes/origin/HEAD -> origin/main
+                continue
+            if refname.startswith('refs/heads/'):
+                name, remote = refname[len('refs/heads/'):], None
+            else:
+                remote, _, name = refname[len('refs/remotes/'):].partition('/')
+                if not name:
+                    continue
+            records.append(BranchRecord(name, remote, upstream or None, sha, int(date) if date.isdigit() else 0))
+        records.sort(key=lambda r: r.date, reverse=True)
+        return records
+
+    @staticmethod
+    def _strip_origin(name):
+        # Rimuove solo il prefisso 'origin/' iniziale (non le occorrenze interne al nome)
+        return name[len('origin/'):] if name.startswith('origin/') else name
+
     @staticmethod
     def get_remote_branches():
+        remote_branches = GitRepo._read('remote_branches')
+        if remote_branches is not None:
+            return [GitRepo._strip_origin(b) for b in remote_branches]
         try:
-            remote_branches = subprocess.check_output(['git', 'branch', '-r'], text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-            return [b.strip().replace('origin/', '') for b in remote_branches.splitlines() if '->' not in b]
+            remote_branches = GitExecutor.run(['git', 'branch', '-r'], stderr=subprocess.DEVNULL)
+            return [GitRepo._strip_origin(b.strip()) for b in remote_branches.splitlines() if '->' not in b]
         except Exception:
             return []
 
     @staticmethod
     def get_local_branches():
+        local_branches = GitRepo._read('local_branches')
+        if local_branches is not None:
+            return local_branches
         try:
-            local_branches = subprocess.check_output(['git', 'branch'], text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            local_branches = GitExecutor.run(['git', 'branch'], stderr=subprocess.DEVNULL)
             return [b.strip().replace("* ", "") for b in local_branches.splitlines()]
         except Exception:
             return []
 
     @staticmethod
-    def checkout(branch):
+    def checkout(branch, confirm=None):
         # Parcheggia i file non tracciati prima del checkout, ripristina quelli del nuovo branch dopo
-        current_branch = GitRepo.get_current_branch()
-        GitRepo.park_untracked_files(current_branch)
-        try:
-            output = subprocess.check_output(['git', 'checkout', branch], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-            GitRepo.unpark_untracked_files(branch)
-            return True, output.strip()
-        except subprocess.CalledProcessError as e:
-            GitRepo.unpark_untracked_files(current_branch)
-            err_msg = e.output.strip() if hasattr(e, 'output') and e.output else str(e)
-            if 'would be overwritten by checkout' in err_msg:
-                return GitRepo._handle_checkout_overwrite_error(
-                    err_msg,
-                    lambda: subprocess.check_output(['git', 'checkout', branch], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)),
-                    branch,
-                    current_branch
-                )
-            return False, err_msg
+        return GitRepo._switch_branch(['git', 'checkout', branch], branch, branch, confirm)
 
     @staticmethod
-    def checkout_new(branch):
-        # Parcheggia i file non tracciati prima del checkout, ripristina quelli del nuovo branch dopo
-        current_branch = GitRepo.get_current_branch()
-        GitRepo.park_untracked_files(current_branch)
-        try:
-            output = subprocess.check_output(['git', 'checkout', '-b', branch, f'origin/{branch}'], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-            GitRepo.unpark_untracked_files(branch)
-            return True, output.strip()
-        except subprocess.CalledProcessError as e:
-            GitRepo.unpark_untracked_files(current_branch)
-            err_msg = e.output.strip() if hasattr(e, 'output') and e.output else str(e)
-            if 'would be overwritten by checkout' in err_msg:
-                return GitRepo._handle_checkout_overwrite_error(
-                    err_msg,
-                    lambda: subprocess.check_output(['git', 'checkout', '-b', branch, f'origin/{branch}'], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)),
-                    branch,
-                    current_branch
-                )
-            return False, err_msg
+    def checkout_new(branch, confirm=None):
+        return GitRepo._switch_branch(['git', 'checkout', '-b', branch, f'origin/{branch}'], f'origin/{branch}', branch, confirm)
 
     @staticmethod
-    def create_and_checkout_from_branch(new_branch, origin_branch):
-        # Parcheggia i file non tracciati prima del checkout, ripristina quelli del nuovo branch dopo
-        current_branch = GitRepo.get_current_branch()
-        GitRepo.park_untracked_files(current_branch)
-        try:
-            output = subprocess.check_output(['git', 'checkout', '-b', new_branch, origin_branch], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-            GitRepo.unpark_untracked_files(new_branch)
-            return True, output.strip()
-        except subprocess.CalledProcessError as e:
-            GitRepo.unpark_untracked_files(current_branch)
-            err_msg = e.output.strip() if hasattr(e, 'output') and e.output else str(e)
-            if 'would be overwritten by checkout' in err_msg:
-                return GitRepo._handle_checkout_overwrite_error(
-                    err_msg,
-                    lambda: subprocess.check_output(['git', 'checkout', '-b', new_branch, origin_branch], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)),
-                    new_branch,
-                    current_branch
-                )
-            return False, err_msg
+    def create_and_checkout_from_branch(new_branch, origin_branch, confirm=None):
+        return GitRepo._switch_branch(['git', 'checkout', '-b', new_branch, origin_branch], origin_branch, new_branch, confirm)
 
     @staticmethod
     def get_github_user():
-        # Restituisce l'utente GitHub autenticato tramite GitHub CLI
-        try:
-            startupinfo = None
-            if hasattr(subprocess, 'STARTF_USESHOWWINDOW'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-                
-            output = subprocess.check_output(['gh', 'auth', 'status'], stderr=subprocess.STDOUT, text=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0), startupinfo=startupinfo)
+        # Restituisce l'utente GitHub autenticato: da hosts.yml se possibile, altrimenti tramite GitHub CLI
+        backend = GitRepo.identity_backend
+        if backend is not None:
+            try:
+                user = backend.active_user()
+            except Exception as e:
+                print(f"[get_github_user] Errore lettura configurazione gh: {e}")
+                user = None
+            if user is not None:
+                return user or "(non autenticato)"
+        try:
+            output = GitExecutor.run(['gh', 'auth', 'status'])
             
             # Estrae il nome utente dall'output
             for line in output.split('\n'):
@@ -560,24 +1371,14 @@ class GitRepo:
             url = GitRepo.build_github_url(account, repo_name)
             try:
                 # Prova prima ad aggiornare il remote esistente
-                _ = subprocess.check_output(
-                    ['git', 'remote', 'set-url', 'origin', url],
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
-                )
+                _ = GitExecutor.run(['git', 'remote', 'set-url', 'origin', url])
                 return True, f"Remote impostato a: {url}"
             except subprocess.CalledProcessError as e:
                 # Se il remote non esiste, crealo
                 err_msg = e.output.strip() if hasattr(e, 'output') and e.output else str(e)
                 if "no such remote" in err_msg.lower():
                     try:
-                        _ = subprocess.check_output(
-                            ['git', 'remote', 'add', 'origin', url],
-                            stderr=subprocess.STDOUT,
-                            text=True,
-                            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
-                        )
+                        _ = GitExecutor.run(['git', 'remote', 'add', 'origin', url])
                         return True, f"Remote creato a: {url}"
                     except subprocess.CalledProcessError as e_add:
                         err_add = e_add.output.strip() if hasattr(e_add, 'output') and e_add.output else str(e_add)
@@ -590,7 +1391,7 @@ class GitRepo:
             return False, str(e)
 
     @staticmethod
-    def create_remote_repository(repo_name, account=None):
+    def create_remote_repository(repo_name, account=None, cwd=None):
         # Crea una repository su GitHub tramite GitHub CLI.
         # Se account è fornito, crea nell'organizzazione, altrimenti nel profilo utente.
         try:
@@ -603,21 +1404,11 @@ class GitRepo:
             # Comando semplicissimo - solo creare la repo senza toccare il remote locale
             cmd = ['gh', 'repo', 'create', repo_full_name, '--public']
             
-            _ = subprocess.check_output(
-                cmd,
-                stderr=subprocess.STDOUT,
-                text=True,
-                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
-            )
+            _ = GitExecutor.run(cmd, cwd=cwd)
             
             # Dopo la creazione, fai il push manualmente usando il remote già configurato
             push_cmd = ['git', 'push', '-u', 'origin', 'HEAD']
-            _ = subprocess.check_output(
-                push_cmd,
-                stderr=subprocess.STDOUT,
-                text=True,
-                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
-            )
+            _ = GitExecutor.run(push_cmd, cwd=cwd)
             
             return True, f"Repository '{repo_full_name}' creata con successo su GitHub!"
         except subprocess.CalledProcessError as e:
@@ -629,10 +1420,36 @@ class GitRepo:
             return False, str(e)
 
     @staticmethod
-    def clone(url, destination=None):
+    def clone_args(mode='full', depth=None, single_branch=False):
+        # Opzioni di 'git clone' per le modalità veloci (chiavi di CLONE_MODES):
+        # - shallow: solo gli ultimi depth commit (--depth, approfondibile con deepen)
+        # - blobless: tutti i commit e gli alberi, il contenuto dei file solo per il checkout
+        # - treeless: tutti i commit, alberi e file scaricati quando servono
+        # Le ultime due sono partial clone: git recupera da solo gli oggetti mancanti quando servono.
+        args = []
+        if mode == 'shallow':
+            args.append(f'--depth={max(1, int(depth or 1))}')
+            if not single_branch:
+                # --depth implica --single-branch: lo si annulla se non richiesto
+                args.append('--no-single-branch')
+        elif mode == 'blobless':
+            args.append('--filter=blob:none')
+        elif mode == 'treeless':
+            args.append('--filter=tree:0')
+        if single_branch and mode != 'shallow':
+            args.append('--single-branch')
+        return args
+
+    @staticmethod
+    def clone(url, destination=None, on_git_progress=None, operation=None, mode='full', depth=None, single_branch=False,
+              reference=None):
         # Clona una repository da un URL GitHub
         # Se destination non è specificato, clona nella directory corrente
+        # mode, depth e single_branch scelgono una modalità veloce (vedi clone_args)
+        # reference: repository locale con gli stessi oggetti (MirrorCache) da cui copiare invece di scaricare
         # Restituisce (success, percorso_repo_o_errore)
+        clone_path = None
+        existed = True
         try:
             # Estrai il nome della repo dall'URL per usarlo come cartella di destinazione
             repo_name = url.rstrip('/').split('/')[-1].replace('.git', '')
@@ -642,16 +1459,21 @@ class GitRepo:
             else:
                 clone_path = repo_name
             # Clona nella destinazione specificata
-            clone_cmd = ['git', 'clone', url, clone_path]
-            output = subprocess.check_output(
-                clone_cmd,
-                stderr=subprocess.STDOUT,
-                text=True,
-                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
-            )
+            existed = os.path.exists(clone_path)
+            clone_cmd = ['git', 'clone', '--progress'] + GitRepo.clone_args(mode, depth, single_branch)
+            if reference:
+                # --dissociate copia gli oggetti usati: il clone non dipende dalla cache, che può essere eliminata
+                clone_cmd += ['--reference-if-able', reference, '--dissociate']
+            clone_cmd += [url, clone_path]
+            output = GitExecutor.stream(clone_cmd, on_progress=on_git_progress, operation=operation)
             # Restituisci il percorso assoluto della repo clonata
             cloned_path = os.path.abspath(clone_path)
             return True, cloned_path
+        except OperationCancelled:
+            # git rimuove da solo la cartella se terminato con un segnale, non se chiuso forzatamente
+            if clone_path and not existed and os.path.isdir(clone_path):
+                shutil.rmtree(clone_path, ignore_errors=True)
+            raise
         except subprocess.CalledProcessError as e:
             err_msg = e.output.strip() if hasattr(e, 'output') and e.output else str(e)
             return False, err_msg
@@ -659,15 +1481,62 @@ class GitRepo:
             return False, str(e)
 
     @staticmethod
-    def reset_last_commit():
+    def get_history_info(cwd=None):
+        # Quanto della storia remota è presente in locale (per le repository clonate in modalità veloce).
+        # Restituisce un dict con shallow, partial_filter ('' se completa), single_branch e commits (in HEAD).
+        info = {'shallow': False, 'partial_filter': '', 'single_branch': False, 'commits': None}
+        try:
+            info['shallow'] = GitExecutor.run(['git', 'rev-parse', '--is-shallow-repository'], cwd=cwd,
+                                              stderr=subprocess.DEVNULL).strip() == 'true'
+        except subprocess.CalledProcessError:
+            pass
+        try:
+            config = GitExecutor.run(['git', 'config', '--get-regexp', r'^remote\.origin\.(fetch|partialclonefilter)$'],
+                                     cwd=cwd, stderr=subprocess.DEVNULL)
+        except subprocess.CalledProcessError:
+            config = ''
+        refspecs = []
+        for line in config.splitlines():
+            key, _, value = line.partition(' ')
+            if key.endswith('.partialclonefilter'):
+                info['partial_filter'] = value.strip()
+            else:
+                refspecs.append(value.strip())
+        # Con --single-branch il refspec di origin elenca un solo branch invece di refs/heads/*
+        info['single_branch'] = bool(refspecs) and not any('*' in r for r in refspecs)
+        try:
+            info['commits'] = int(GitExecutor.run(['git', 'rev-list', '--count', 'HEAD'], cwd=cwd,
+                                                  stderr=subprocess.DEVNULL).strip())
+        except (subprocess.CalledProcessError, ValueError):
+            pass
+        return info
+
+    @staticmethod
+    def deepen(commits=None, cwd=None, on_git_progress=None, operation=None):
+        # Scarica altra storia in una repository shallow: commits in più, oppure tutta (None)
+        cmd = ['git', 'fetch', '--progress'] + ([f'--deepen={int(commits)}'] if commits else ['--unshallow']) + ['origin']
+        try:
+            output = GitExecutor.stream(cmd, cwd=cwd, on_progress=on_git_progress, operation=operation)
+            return True, output.strip()
+        except subprocess.CalledProcessError as e:
+            return False, e.output.strip() if e.output else str(e)
+
+    @staticmethod
+    def fetch_all_branches(cwd=None, on_git_progress=None, operation=None):
+        # Estende un clone --single-branch a tutti i branch remoti
+        try:
+            GitExecutor.run(['git', 'remote', 'set-branches', 'origin', '*'], cwd=cwd, operation=operation)
+            output = GitExecutor.stream(['git', 'fetch', '--progress', 'origin'], cwd=cwd,
+                                        on_progress=on_git_progress, operation=operation)
+            return True, output.strip()
+        except subprocess.CalledProcessError as e:
+            return False, e.output.strip() if e.output else str(e)
+
+    @staticmethod
+    def reset_last_commit(cwd=None):
         # Annulla l'ultimo commit, mantenendo i cambiamenti nel working directory.
         try:
-            _ = subprocess.check_output(
-                ['git', 'reset', '--soft', 'HEAD~1'],
-                stderr=subprocess.STDOUT,
-                text=True,
-                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
-            )
+            _ = GitExecutor.run(['git', 'reset', '--soft', 'HEAD~1'], cwd=cwd)
             return True, ""
         except subprocess.CalledProcessError as e:
             err_msg = e.output.strip() if hasattr(e, 'output') and e.output else str(e)
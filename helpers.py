@@ -3,7 +3,10 @@ import os
 import tkinter as tk
 import tkinter.messagebox as mb
 import subprocess
-from config import LAST_DIR_FILE
+import json
+import tempfile
+import threading
+from config import LAST_DIR_FILE, STATE_CACHE_FILE, BUTTON_PAD_Y_SUGG
 
 class MouseWheelHelper:
     @staticmethod
@@ -48,25 +51,122 @@ class MouseWheelHelper:
     def _on_destroy(self, event=None):
         self.unbind_mousewheel()
 
-def create_scrollable_list(parent, height, threshold, item_count_func, parent_win, **canvas_kwargs):
-    container = tk.Frame(parent, relief="groove", borderwidth=2)
-    canvas = tk.Canvas(container, borderwidth=0, highlightthickness=0, height=height, **canvas_kwargs)
-    canvas.pack(side="left", fill="both", expand=True)
-    vscroll = tk.Scrollbar(container, orient="vertical", command=canvas.yview)
-    vscroll.pack(side="right", fill="y")
-    canvas.configure(yscrollcommand=vscroll.set)
-    btn_frame = tk.Frame(canvas)
-    btn_window = canvas.create_window((0, 0), window=btn_frame, anchor="nw")
-    def on_canvas_configure(event):
-        canvas.itemconfig(btn_window, width=event.width)
-    canvas.bind('<Configure>', on_canvas_configure)
-    def update_scrollregion(event=None):
-        canvas.configure(scrollregion=canvas.bbox("all"))
-    btn_frame.bind("<Configure>", update_scrollregion)
-    helper = MouseWheelHelper(canvas, parent_win, item_count_func, threshold)
-    def update_mousewheel_binding():
-        helper._update_binding()
-    return container, canvas, btn_frame, update_mousewheel_binding
+class VirtualList:
+    # Lista scorrevole di pulsanti per elenchi lunghi (es. migliaia di branch).
+    # Crea solo i pulsanti che entrano nell'area visibile (più uno) e li riusa durante lo scorrimento:
+    # set_items aggiorna il modello e riconfigura le righe visibili senza distruggere widget.
+    # items: lista di (valore, testo); on_click(valore) alla pressione di una riga.
+    def __init__(self, parent, height, threshold, parent_win, on_click, empty_text="Nessun elemento.", **button_kwargs):
+        self.on_click = on_click
+        self.button_kwargs = button_kwargs
+        self.items = []
+        self.offset = 0  # pixel scorsi dall'inizio della lista
+        self.rows = []
+        self.container = tk.Frame(parent, relief="groove", borderwidth=2)
+        self.body = tk.Frame(self.container, height=height)
+        self.body.pack(side="left", fill="both", expand=True)
+        self.vscroll = tk.Scrollbar(self.container, orient="vertical", command=self.yview)
+        self.vscroll.pack(side="right", fill="y")
+        self.empty_label = tk.Label(self.body, text=empty_text, font=button_kwargs.get('font'))
+        # Altezza di una riga misurata su un pulsante reale (dipende da font e piattaforma)
+        probe = self._new_row()
+        self.row_height = probe.winfo_reqheight() + 2 * BUTTON_PAD_Y_SUGG
+        self.body.bind('<Configure>', lambda event: self._render())
+        self.wheel = MouseWheelHelper(self, parent_win, lambda: len(self.items), threshold)
+
+    def _new_row(self):
+        slot = len(self.rows)
+        row = tk.Button(self.body, command=lambda: self._on_row_click(slot), **self.button_kwargs)
+        self.rows.append(row)
+        return row
+
+    def _on_row_click(self, slot):
+        index = self.offset // self.row_height + slot
+        if index < len(self.items):
+            self.on_click(self.items[index][0])
+
+    def pack(self, **kwargs):
+        self.container.pack(**kwargs)
+
+    def destroy(self):
+        self.wheel.unbind_mousewheel()
+        self.container.destroy()
+
+    def update_mousewheel(self):
+        self.wheel._update_binding()
+
+    def set_items(self, items):
+        # Nuovo contenuto (es. dopo un filtro): torna all'inizio se la lista è cambiata
+        items = list(items)
+        if items != self.items:
+            self.items = items
+            self.offset = 0
+        self._render()
+        self.update_mousewheel()
+
+    def _max_offset(self):
+        return max(0, len(self.items) * self.row_height - self.body.winfo_height())
+
+    def _render(self):
+        height = max(self.body.winfo_height(), 1)
+        self.offset = min(self.offset, self._max_offset())
+        visible = min(len(self.items), height // self.row_height + 2)
+        while len(self.rows) < visible:
+            self._new_row()
+        first = self.offset // self.row_height
+        for slot, row in enumerate(self.rows):
+            index = first + slot
+            if slot >= visible or index >= len(self.items):
+                row.place_forget()
+                continue
+            text = self.items[index][1]
+            if row.cget('text') != text:
+                row.config(text=text)
+            row.place(x=0, y=index * self.row_height - self.offset + BUTTON_PAD_Y_SUGG, relwidth=1,
+                      height=self.row_height - 2 * BUTTON_PAD_Y_SUGG)
+        if self.items:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(relx=0.5, y=BUTTON_PAD_Y_SUGG, anchor="n")
+        total = len(self.items) * self.row_height
+        if total <= height:
+            self.vscroll.set(0, 1)
+        else:
+            self.vscroll.set(self.offset / total, (self.offset + height) / total)
+
+    def yview(self, *args):
+        # Protocollo della Scrollbar: ('moveto', frazione) o ('scroll', n, 'units'|'pages')
+        if not args:
+            return
+        if args[0] == 'moveto':
+            offset = float(args[1]) * len(self.items) * self.row_height
+        elif args[0] == 'scroll':
+            step = self.body.winfo_height() if args[2] == 'pages' else self.row_height
+            offset = self.offset + int(args[1]) * step
+        else:
+            return
+        self.offset = int(min(max(offset, 0), self._max_offset()))
+        self._render()
+
+    def yview_scroll(self, number, what):
+        # Usato da MouseWheelHelper come per un Canvas
+        self.yview('scroll', number, what)
+
+
+def debounced(widget, delay_ms, func):
+    # Restituisce una funzione che esegue func solo dopo delay_ms senza nuove chiamate:
+    # di una raffica di tasti viene elaborato solo l'ultimo. Non esegue nulla se widget è stato distrutto.
+    root = widget.winfo_toplevel()
+    pending = [None]
+    def run():
+        pending[0] = None
+        if widget.winfo_exists():
+            func()
+    def call(*args):
+        if pending[0] is not None:
+            root.after_cancel(pending[0])
+        pending[0] = root.after(delay_ms, run)
+    return call
 
 def save_last_dir(path):
     try:
@@ -85,6 +185,40 @@ def load_last_dir():
         print(f"[load_last_dir] Errore nel caricamento: {e}")
     return None
 
+_state_cache_lock = threading.Lock()
+
+def save_state_cache(data):
+    # Scrittura atomica: file temporaneo nella stessa cartella e os.replace,
+    # così un'interruzione non lascia mai una cache troncata
+    directory = os.path.dirname(STATE_CACHE_FILE)
+    with _state_cache_lock:
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, prefix=".gitbash6cache.",
+                                             suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, STATE_CACHE_FILE)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[save_state_cache] Errore nel salvataggio: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+def load_state_cache():
+    try:
+        with open(STATE_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"[load_state_cache] Errore nel caricamento: {e}")
+    return None
+
 def set_placeholder(var, ent, placeholder, placeholder_fg):
     if not var.get():
         ent.config(fg=placeholder_fg)
@@ -101,6 +235,13 @@ def count_selected_files(files, placeholder=None):
         return len([f for f in files if f and f.strip()])
     return len([f for f in files if f and f.strip() and f != placeholder])
 
+def format_bytes(size):
+    # Dimensione leggibile (es: 1.5 MB) per i messaggi di avanzamento.
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
 def update_counter_var(counter_var, get_count_func, num_var=None):
     # Aggiorna una StringVar counter_var con il valore restituito da get_count_func.
     # Se num_var è fornito, mostra anche il totale (es: 2/5).
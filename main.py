@@ -1,32 +1,48 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox as mb
 from gitrepo import GitRepo, subprocess
-from widgets import FileSelectionWindow
+from widgets import FileSelectionWindow, ProgressWindow
 from config import *
 import time
 import os
 import threading
 from helpers import *
+from refresh import UiDispatcher, RefreshWorker
+from watcher import RepoWatcher
+from repocache import RepoStateCache
+from pathexpander import PathExpander, ExpansionCancelled
+from gitoperation import GitOperation, OperationCancelled
+from mirrorcache import MirrorCache
+from worktreepool import WorktreePool
 
 class GitGuiApp(tk.Tk):
-    def _update_progress(self, win, count):
+    def _update_progress(self, win, count, total=None, text=None):
         # Aggiorna la progress bar se la finestra è presente e il metodo esiste.
         if win and hasattr(win, 'update_progress'):
-            win.update_progress(count)
+            win.update_progress(count, total, text)
+
+    def _update_git_progress(self, win, progress):
+        # Mostra una riga di --progress di git: fase come messaggio, percentuale sulla barra,
+        # oggetti, volume e velocità nel dettaglio.
+        if win and win.exists():
+            win.set_message(progress.label)
+            win.update_progress(progress.percent or 0, 100 if progress.percent is not None else None, progress.detail())
+
+    def _git_progress_callback(self, win):
+        # Callback per on_git_progress: chiamata nel worker, inoltra al main thread
+        return lambda progress: self._dispatcher.post(self._update_git_progress, win, progress)
 
     def _safe_show_error(self, title, msg):
         # Mostra un errore in modo thread-safe.
-        try:
-            self.after(0, lambda: show_error(title, msg))
-        except Exception:
-            show_error(title, msg)
+        self._dispatcher.post(show_error, title, msg)
 
     def _safe_show_info(self, title, msg):
         # Mostra una info in modo thread-safe.
-        try:
-            self.after(0, lambda: show_info(title, msg))
-        except Exception:
-            show_info(title, msg)
+        self._dispatcher.post(show_info, title, msg)
+
+    def _confirm_from_worker(self, title, msg):
+        # Chiede conferma all'utente da un thread di lavoro, attendendo la risposta dal main thread.
+        return self._dispatcher.call(mb.askyesno, title, msg)
 
     def reset_content_area(self):
         # Centralized removal of dynamic widgets from main_container except dir_label and button_frame.
@@ -54,70 +70,21 @@ class GitGuiApp(tk.Tk):
         # Controlla se il branch è valido. Non mostra più warning personalizzati, lascia a git l'errore.
         return branch in self.branch_info
 
-    def get_valid_files(self, files):
-        # Restituisce solo i file validi e interni alla repo. 
-        # Se viene selezionata una cartella, espande tutti i file e sottocartelle.
-        # Ora normalizza anche i path tra virgolette ("C:\path\file.txt" o 'C:/path/file.txt')
-        if not files:
-            return []
-        def strip_quotes(path):
-            if isinstance(path, str) and len(path) > 1:
-                if (path.startswith('"') and path.endswith('"')) or (path.startswith("'") and path.endswith("'")):
-                    return path[1:-1]
-            return path
-        try:
-            repo_root = None
-            startupinfo = None
-            if os.name == 'nt':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            try:
-                repo_root = subprocess.check_output(
-                    ['git', 'rev-parse', '--show-toplevel'],
-                    text=True,
-                    startupinfo=startupinfo
-                ).strip()
-            except Exception:
-                repo_root = os.getcwd()
-            # Normalizza repo_root per confronto robusto
-            repo_root_norm = os.path.normcase(os.path.normpath(repo_root))
-            valid = []
-            for f in files:
-                if f and isinstance(f, str) and f.strip():
-                    f_stripped = strip_quotes(f.strip())
-                    abs_f = os.path.abspath(f_stripped)
-                    abs_f_norm = os.path.normcase(os.path.normpath(abs_f))
-                    if os.path.isdir(abs_f):
-                        for root, dirs, filelist in os.walk(abs_f):
-                            for file in filelist:
-                                file_path = os.path.join(root, file)
-                                file_path_norm = os.path.normcase(os.path.normpath(file_path))
-                                if repo_root_norm and file_path_norm.startswith(repo_root_norm):
-                                    valid.append(file_path)
-                    else:
-                        if repo_root_norm and abs_f_norm.startswith(repo_root_norm):
-                            valid.append(abs_f)
-            return valid
-        except Exception:
-            return []
-
     def validate_commit_message(self, msg):
         # Controlla se il messaggio di commit è valido. Lascia a git la gestione degli errori.
         return bool(msg)
 
     # --- Caching ottimizzato per ridurre chiamate frequenti ---
+    # Lo stato (branch, origin, fotografia, utente GitHub) è in _repo_cache, una voce per repository
     _cache_timeout = CACHE_TIMEOUT
-    _cached_branch = CACHE_DEFAULTS['branch']
-    _cached_origin = CACHE_DEFAULTS['origin']
-    _cached_github_user = CACHE_DEFAULTS['github_user']
-    _cached_is_repo = CACHE_DEFAULTS['is_repo']
-    _cache_time = CACHE_DEFAULTS['cache_time']
-    _github_user_needs_update = CACHE_DEFAULTS['github_user_needs_update']  # Flag per aggiornamento utente GitHub
     _branches_fetched_on_startup = CACHE_DEFAULTS['branches_fetched_on_startup']  # Flag per evitare fetch multipli
     _login_in_progress = CACHE_DEFAULTS['login_in_progress']  # Flag per indicare login in corso
     
     # set_placeholder e clear_placeholder ora sono in helpers.py
     def __init__(self):
+        # Tempi di avvio (secondi da qui) per misurare il time-to-first-paint
+        self._startup_t0 = time.perf_counter()
+        self._startup_timings = {}
         super().__init__()
         last_dir = load_last_dir()
         if last_dir:
@@ -135,8 +102,17 @@ class GitGuiApp(tk.Tk):
         self._push_commit_msg = ""
         # Finestra selezione file (per evitare doppioni)
         self._file_selection_window = None
-        # Mappa branch -> tipo (remoto, locale, entrambi)
-        self._branch_info = {}
+        # Stato in cache per repository (mappa branch -> tipo, inventario, fotografia, utente GitHub)
+        self._repo_cache = RepoStateCache(REPO_CACHE_SIZE)
+        # Il primo frame arriva dalla cache su disco della sessione precedente (se ancora valida)
+        self._repo_cache.load(load_state_cache(), STATE_CACHE_VERSION)
+        self._state_save_pending = False
+        self._repo_key = None
+        self._repo_state = None
+        self._select_repo_state()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        # Cambio branch tramite il pool di worktree (opzione della sezione Branch, vale per la sessione)
+        self._worktree_mode = tk.BooleanVar(value=WORKTREE_POOL_DEFAULT)
         # Nome suggerito per nuovo branch (quando si reindirizza da checkout)
         self._suggested_new_branch = None
         # Persistent layout
@@ -147,12 +123,52 @@ class GitGuiApp(tk.Tk):
         self.button_frame = None
         self.content_frame = tk.Frame(self.main_container)
         self.content_frame.pack(fill="both", expand=True)
-        # Aggiorna i branch solo una volta all'avvio per rimuovere quelli eliminati dal remoto
-        self._update_branch_info(prune=True)
-        self._branches_fetched_on_startup = True
+        # Tutte le interrogazioni git girano nel worker; i risultati tornano al main thread dal dispatcher
+        self._dispatcher = UiDispatcher(self)
+        self._refresh_worker = RefreshWorker(self._dispatcher)
+        self._task_running = False
+        # Operazioni git annullabili in corso (chiuse alla chiusura della finestra).
+        # Registrate anche dal worker (fetch in background): l'insieme è protetto da _operations_lock
+        self._operations = set()
+        self._operations_lock = threading.Lock()
+        self._closing = False
+        self._state_stale = False
+        self._github_user_stale = False
+        self._check_repo_pending = False
+        # Callback della sezione visibile da richiamare quando arrivano dati aggiornati
+        self._current_section_refresh = None
+        # La cache viene invalidata dai cambiamenti dei file in .git, non più a scadenza fissa
+        self._watcher = RepoWatcher(lambda kinds: self._dispatcher.post(self._on_repo_files_changed, kinds))
+        self._watcher.watch(os.getcwd())
+        # La finestra viene costruita subito: stato, utente GitHub e branch arrivano in parallelo dal worker
         self.create_buttons()
         self.update_dir_label()
         self.check_repo()
+        self._update_branch_info()
+        self._mark_startup('window')
+        # Il fetch (rete) parte solo dopo il primo disegno della finestra
+        self.after_idle(self._on_first_paint)
+
+    def _on_first_paint(self):
+        self._mark_startup('first_paint')
+        # Aggiorna i branch solo una volta all'avvio per rimuovere quelli eliminati dal remoto
+        self._update_branch_info(prune=True)
+        self._branches_fetched_on_startup = True
+        self._prewarm_recent_repos()
+
+    def _mark_startup(self, phase):
+        # Registra il primo completamento di ogni fase dell'avvio; il riepilogo viene stampato
+        # quando sono tutte arrivate, solo se richiesto con STARTUP_TIMINGS_ENV
+        if phase in self._startup_timings or len(self._startup_timings) >= len(STARTUP_PHASES):
+            return
+        self._startup_timings[phase] = time.perf_counter() - self._startup_t0
+        if all(p in self._startup_timings for p in STARTUP_PHASES) and os.environ.get(STARTUP_TIMINGS_ENV):
+            summary = ", ".join(f"{p}={self._startup_timings[p] * 1000:.0f}ms" for p in STARTUP_PHASES)
+            print(f"[startup] {summary}")
+
+    @property
+    def startup_timings(self):
+        return dict(self._startup_timings)
 
     @property
     def file_selection_window(self):
@@ -164,11 +180,153 @@ class GitGuiApp(tk.Tk):
 
     @property
     def branch_info(self):
-        return self._branch_info
+        return self._repo_state.branch_info
 
     @branch_info.setter
     def branch_info(self, value):
-        self._branch_info = value
+        self._repo_state.branch_info = value
+
+    @property
+    def branch_records(self):
+        return self._repo_state.branch_records
+
+    @property
+    def branch_index(self):
+        return self._repo_state.branch_index
+
+    # Valori della repository corrente, letti dalla sua voce di cache
+    @property
+    def _cached_snapshot(self):
+        return self._repo_state.snapshot
+
+    @property
+    def _cached_branch(self):
+        snapshot = self._repo_state.snapshot
+        return snapshot.branch_label if snapshot is not None else None
+
+    @property
+    def _cached_origin(self):
+        snapshot = self._repo_state.snapshot
+        return snapshot.origin_label if snapshot is not None else None
+
+    @property
+    def _cached_is_repo(self):
+        snapshot = self._repo_state.snapshot
+        return snapshot.is_repo if snapshot is not None else None
+
+    @property
+    def _cached_github_user(self):
+        return self._repo_state.github_user
+
+    def _select_repo_state(self):
+        # Passa alla voce di cache della directory corrente (creandola se serve).
+        # La voce lasciata non è più osservata dal watcher: al ritorno viene mostrata subito
+        # ma marcata come da aggiornare.
+        if self._repo_state is not None:
+            self._repo_state.invalidate('snapshot', 'branches')
+        self._repo_key = RepoStateCache.key_for(os.getcwd())
+        self._repo_state = self._repo_cache.get(self._repo_key)
+        # Validi solo se i file .git non sono cambiati da quando sono stati letti
+        self._repo_state.revalidate(GitRepo.get_state_stamp())
+
+    def _schedule_state_save(self):
+        # Salva la cache su disco poco dopo l'ultimo aggiornamento (salvataggi ravvicinati accorpati)
+        if self._state_save_pending:
+            return
+        self._state_save_pending = True
+        self.after(STATE_CACHE_SAVE_DELAY_MS, self._save_state_cache)
+
+    def _save_state_cache(self, background=True):
+        self._state_save_pending = False
+        data = self._repo_cache.to_dict(STATE_CACHE_VERSION)
+        if background:
+            threading.Thread(target=save_state_cache, args=(data,), daemon=True).start()
+        else:
+            save_state_cache(data)
+
+    def _on_close(self):
+        # Nessun processo git deve sopravvivere alla finestra: annulla le operazioni in corso
+        with self._operations_lock:
+            self._closing = True
+            operations = list(self._operations)
+        for operation in operations:
+            operation.cancel()
+        for operation in operations:
+            operation.cancel(wait=True)
+        self._save_state_cache(background=False)
+        self._watcher.stop()
+        self.destroy()
+
+    def _start_operation(self, cwd=None, locks=()):
+        # Crea l'handle di un'operazione git annullabile (vedi GitOperation) e lo registra.
+        # locks: lock che i comandi dell'operazione possono lasciare se annullati (GitOperation.*_LOCKS)
+        operation = GitOperation(cwd, locks)
+        with self._operations_lock:
+            self._operations.add(operation)
+            closing = self._closing
+        if closing:
+            # Finestra in chiusura: l'operazione non deve più partire
+            operation.cancel()
+        return operation
+
+    def _end_operation(self, operation):
+        operation.finish()
+        with self._operations_lock:
+            self._operations.discard(operation)
+
+    def _offer_lock_cleanup(self, operation):
+        # Dopo un annullamento: i lock lasciati dai processi chiusi si rimuovono solo con la conferma
+        # dell'utente, perché anche un git lanciato da terminale potrebbe averli presi
+        def on_found(result):
+            if isinstance(result, Exception):
+                return
+            closed, locks = result
+            if not closed:
+                show_info("Lock non rimossi", "Alcuni processi git non si sono chiusi: i file .lock della "
+                                              "repository sono stati lasciati al loro posto.")
+            elif locks and mb.askyesno(
+                    "Lock rimasti",
+                    "L'operazione annullata ha lasciato questi file di lock:\n\n" + "\n".join(locks) +
+                    "\n\nFinché restano, i comandi git sulla repository falliranno. Rimuoverli?\n"
+                    "Rispondi No se git è in uso in un terminale o in un altro programma."):
+                self._run_git_task(lambda: operation.remove_locks(locks), lambda result: None)
+        self._run_git_task(lambda: (operation.wait_closed(), operation.leftover_locks()), on_found)
+
+    def _prewarm_recent_repos(self):
+        # Riconvalida in background le repository usate di recente (solo letture locali, niente fetch):
+        # tornando in una di queste il primo frame è già aggiornato
+        targets = [(e.root, e.stamp('snapshot'), e.stamp('branches'))
+                   for e in self._repo_cache.entries() if e.root != self._repo_key][:STATE_CACHE_PREWARM]
+        if not targets:
+            return
+
+        def gather(publish):
+            results = []
+            for root, snapshot_stamp, branches_stamp in targets:
+                stamp = GitRepo.get_state_stamp(root)
+                if stamp is None:
+                    continue
+                snapshot = GitRepo.get_snapshot(full=False, cwd=root) if stamp != snapshot_stamp else None
+                branches = (stamp, GitRepo.get_branch_inventory(cwd=root)) if stamp != branches_stamp else None
+                results.append((root, snapshot, branches))
+            return results
+        self._refresh_worker.request('prewarm', gather, self._on_prewarm_done)
+
+    def _on_prewarm_done(self, results):
+        for root, snapshot, branches in results:
+            entry = self._repo_cache.peek(root)
+            if entry is None or root == self._repo_key:
+                continue
+            if snapshot is not None and snapshot.is_repo:
+                entry.store_snapshot(snapshot)
+            if branches is not None:
+                self._on_branch_inventory(root, branches)
+        self._schedule_state_save()
+
+    def _state_valid(self, field):
+        # Il TTL vale solo se il watcher non può osservare la directory corrente
+        ttl = None if self._watcher.active else self._cache_timeout
+        return self._repo_state.is_valid(field, ttl)
 
     def _clear_content_frame_widgets(self):
         # Usa la funzione centralizzata
@@ -183,33 +341,89 @@ class GitGuiApp(tk.Tk):
         self.check_repo()
 
     def _update_branch_info(self, prune=False):
-        # Recupera branch locali e remoti e costruisce la mappa branch -> tipo
+        # Recupera branch locali e remoti in background e aggiorna la mappa branch -> tipo.
+        # Con prune lancia anche 'git fetch --prune' su un thread separato: i branch locali
+        # restano visibili subito e l'inventario viene riletto a fetch concluso.
+        cwd = os.getcwd()
+        key = self._repo_key
+        # L'impronta dei file .git va presa prima della lettura: se cambiano durante, la cache risulta vecchia
+        self._refresh_worker.request('branches', lambda publish: (GitRepo.get_state_stamp(cwd), GitRepo.get_branch_inventory(cwd=cwd)),
+                                     lambda result: self._on_branch_inventory(key, result))
+        if prune:
+            self._refresh_worker.request('fetch', lambda publish: self._background_fetch(cwd), self._on_fetch_done)
+
+    def _background_fetch(self, cwd):
+        # Gira nel worker: l'handle viene creato solo quando il fetch parte davvero
+        operation = self._start_operation(cwd, GitOperation.FETCH_LOCKS)
         try:
-            if prune:
-                try:
-                    kwargs = get_subprocess_kwargs()
-                    # Su Windows, nasconde la finestra della console per il comando subprocess
-                    if os.name == 'nt':
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        kwargs['startupinfo'] = startupinfo
-                    subprocess.check_output(['git', 'fetch', '--prune'], text=True, **kwargs)
-                except Exception:
-                    pass
-            local = set(GitRepo.get_local_branches())
-            remote = set(GitRepo.get_remote_branches())
-            all_branches = local | remote
+            return GitRepo.fetch(prune=True, cwd=cwd, operation=operation)
+        finally:
+            self._end_operation(operation)
+
+    def _on_fetch_done(self, result):
+        self._mark_startup('fetch')
+        ok, msg = result
+        if not ok:
+            print(f"[fetch] Errore durante il fetch: {msg}")
+        self._update_branch_info()
+
+    def _on_branch_inventory(self, key, result):
+        # Costruisce la mappa branch -> tipo dai record dell'inventario (main thread)
+        stamp, records = result
+        entry = self._repo_cache.peek(key)
+        if entry is None:
+            return
+        if key == self._repo_key:
+            self._mark_startup('branches')
+        try:
+            # I record sono già ordinati dal commit più recente: l'ordine della mappa lo rispetta
+            local = {r.display_name for r in records if r.is_local}
+            remote = {r.display_name for r in records if not r.is_local}
             info = {}
-            for b in all_branches:
+            for r in records:
+                b = r.display_name
+                if b in info:
+                    continue
                 if b in local and b in remote:
                     info[b] = "(locale/remoto)"
                 elif b in local:
                     info[b] = "(locale)"
-                elif b in remote:
+                else:
                     info[b] = "(remoto)"
-            self._branch_info = info
+            entry.store_branches(records, info, stamp)
         except Exception:
-            self._branch_info = {}
+            entry.store_branches([], {})
+        self._schedule_state_save()
+        if key == self._repo_key:
+            self._notify_section()
+
+    def _notify_section(self):
+        # Aggiorna la sezione visibile con i nuovi dati in cache
+        refresh = self._current_section_refresh
+        if refresh is not None:
+            try:
+                refresh()
+            except Exception:
+                self._current_section_refresh = None
+
+    def _run_git_task(self, func, on_done, operation=None):
+        # Esegue func nel worker (mai sul main thread) con cursore di attesa.
+        # on_done riceve il risultato nel main thread, oppure l'eccezione sollevata da func.
+        # operation (da _start_operation) viene rilasciato a operazione conclusa.
+        if self._task_running:
+            show_info("Operazione in corso", "Attendi il completamento dell'operazione in corso.")
+            return False
+        self._task_running = True
+        self.config(cursor="watch")
+
+        def finish(result):
+            self._task_running = False
+            if operation is not None:
+                self._end_operation(operation)
+            self.config(cursor="")
+            on_done(result)
+        self._refresh_worker.run_task(func, finish)
+        return True
 
     def create_buttons(self):
         button_frame = tk.Frame(self.main_container)
@@ -240,89 +454,180 @@ class GitGuiApp(tk.Tk):
         row4.pack(fill="x", pady=PAD_Y_MENU_ROW)
         self.btn_clone = tk.Button(row4, text="Clona Repository", command=self.do_clone, **btn_opts)
         self.btn_clone.pack(side="left", expand=True, fill="x", pady=PAD_Y_MENU_BTN, padx=BUTTON_PAD_INNER)
-        # Pulsante disabilitato per mantenere lo stile
-        tk.Button(row4, state="disabled", **btn_opts).pack(side="left", expand=True, fill="x", pady=PAD_Y_MENU_BTN, padx=BUTTON_PAD_INNER)
+        # Storia scaricata (per le repository clonate in modalità veloce)
+        self.btn_history = tk.Button(row4, text="Storia Repository", command=self.do_history, **btn_opts)
+        self.btn_history.pack(side="left", expand=True, fill="x", pady=PAD_Y_MENU_BTN, padx=BUTTON_PAD_INNER)
         self.button_frame = button_frame
 
     def update_dir_label(self, force_refresh=False):
-        now = time.time()
-        cache_expired = (now - self._cache_time > self._cache_timeout)
-        
-        # Aggiorna branch e origin solo se necessario
-        if force_refresh or cache_expired or self._cached_branch is None or self._cached_origin is None:
-            self._cached_branch = GitRepo.get_current_branch()
-            self._cached_origin = GitRepo.get_current_origin()
-            self._cache_time = now
-        
-        # Aggiorna utente GitHub solo se richiesto esplicitamente
-        if self._github_user_needs_update or self._cached_github_user is None:
-            self._cached_github_user = GitRepo.get_github_user()
-            self._github_user_needs_update = False
+        # Mostra subito i valori in cache (marcati se in aggiornamento) e li aggiorna in background
+        # Aggiorna branch e origin solo se necessario (una sola interrogazione git)
+        if force_refresh or not self._state_valid('snapshot'):
+            self._request_state_refresh()
         
-        branch = self._cached_branch
-        origin = self._cached_origin
-        github_user = self._cached_github_user
+        # Aggiorna utente GitHub solo se invalidato esplicitamente (login, logout...)
+        if not self._repo_state.is_valid('github_user'):
+            self._request_github_user_refresh()
+        self._render_dir_label()
+
+    def _render_dir_label(self):
+        loading = "(caricamento...)"
+        branch = self._cached_branch or loading
+        snapshot = self._cached_snapshot
+        if snapshot is not None and snapshot.upstream and (snapshot.ahead or snapshot.behind):
+            branch = f"{branch} (↑{snapshot.ahead} ↓{snapshot.behind})"
+        origin = self._cached_origin or loading
+        github_user = self._cached_github_user or loading
+        # I valori non ancora aggiornati restano visibili ma marcati
+        stale = " ⏳" if (self._state_stale or self._github_user_stale) else ""
+        cwd = os.getcwd()
+        self.dir_label.config(text=f"📁 Directory: {cwd}{stale}\n ➥ Branch: {branch}\n🔍 Link: {origin}\n 👤 GitHub: {github_user}")
+
+    def _request_state_refresh(self):
+        # Richiede al worker una nuova fotografia della repository (richieste ravvicinate accorpate)
+        self._state_stale = True
         cwd = os.getcwd()
-        self.dir_label.config(text=f"📁 Directory: {cwd}\n ➥ Branch: {branch}\n🔍 Link: {origin}\n 👤 GitHub: {github_user}")
+        key = self._repo_key
+
+        def gather(publish):
+            # Prima la lettura istantanea dei file .git, poi lo stato completo con git status
+            snapshot = GitRepo.get_snapshot(full=False, cwd=cwd)
+            if snapshot.has_status or not snapshot.is_repo:
+                return snapshot
+            publish(snapshot)
+            return GitRepo.get_snapshot(full=True, cwd=cwd)
+        self._refresh_worker.request('state', gather, lambda snapshot: self._store_snapshot(key, snapshot))
+
+    def _store_snapshot(self, key, snapshot):
+        # Aggiorna branch, origin e stato repo dalla stessa fotografia (main thread)
+        self._mark_startup('state')
+        # Una fotografia parziale (solo file .git) non aggiorna lo status: la repository resta da rileggere
+        complete = snapshot.has_status or not snapshot.is_repo
+        if complete:
+            self._mark_startup('status')
+        entry = self._repo_cache.peek(key)
+        if entry is not None:
+            entry.store_snapshot(snapshot)
+            self._schedule_state_save()
+        if key != self._repo_key:
+            return
+        if complete:
+            self._state_stale = False
+        self._render_dir_label()
+        if self._check_repo_pending:
+            self._check_repo_pending = False
+            self._apply_repo_state()
+        self._notify_section()
+
+    def _request_github_user_refresh(self):
+        self._github_user_stale = True
+        key = self._repo_key
+        self._refresh_worker.request('github_user', lambda publish: GitRepo.get_github_user(),
+                                     lambda user: self._store_github_user(key, user))
+
+    def _store_github_user(self, key, user):
+        self._mark_startup('github_user')
+        entry = self._repo_cache.peek(key)
+        if entry is not None:
+            entry.store_github_user(user)
+            self._schedule_state_save()
+        if key != self._repo_key:
+            return
+        self._github_user_stale = False
+        self._render_dir_label()
+
+    def _on_repo_files_changed(self, kinds):
+        # Il watcher ha visto cambiare file in .git (es. comandi git da un altro terminale):
+        # aggiorna solo i dati che dipendono da quei file
+        if 'repo' in kinds:
+            # .git creata o rimossa: la radice (e quindi la voce di cache) può essere cambiata
+            self._select_repo_state()
+            self.invalidate_cache()
+            self.update_dir_label(force_refresh=True)
+            self.check_repo()
+            self._update_branch_info()
+            return
+        # HEAD, index, config e refs compaiono tutti nella fotografia (branch, origin, ahead/behind, modifiche)
+        self._repo_state.invalidate('snapshot')
+        self.update_dir_label(force_refresh=True)
+        if kinds & {'refs', 'config'}:
+            # Branch creati/eliminati, fetch o upstream modificati
+            self._repo_state.invalidate('branches')
+            self._update_branch_info()
 
     def invalidate_cache(self):
-        # Invalida la cache per branch e origin (non per utente GitHub)
-        self._cached_branch = None
-        self._cached_origin = None
-        self._cached_is_repo = None
-        self._cache_time = 0
+        # Invalida la fotografia della repository corrente (branch, origin, stato; non l'utente GitHub).
+        # I valori restano visibili, marcati, finché il worker non pubblica quelli nuovi.
+        self._repo_state.invalidate('snapshot')
 
     def invalidate_github_user_cache(self):
-        # Invalida solo la cache dell'utente GitHub
-        self._cached_github_user = None
-        self._github_user_needs_update = True
+        # Invalida l'utente GitHub in tutte le repository (l'account è unico)
+        self._repo_cache.invalidate_all('github_user')
 
     @staticmethod
     def is_valid_branch(branch, branches):
         return branch in branches
 
     def check_repo(self, force_refresh=False):
-        now = time.time()
-        if force_refresh or (self._cached_is_repo is None) or (now - self._cache_time > self._cache_timeout):
-            self._cached_is_repo = GitRepo.is_valid_repo()
-            self._cache_time = now
+        # Verifica che la directory sia una repository e abilita i pulsanti.
+        # Se lo stato non è in cache la verifica avviene quando arriva la fotografia dal worker.
+        if force_refresh or self._cached_is_repo is None or not self._state_valid('snapshot'):
+            self._check_repo_pending = True
+            if not self._state_stale:
+                self._request_state_refresh()
+            return
+        self._apply_repo_state()
+
+    def _apply_repo_state(self):
         if not self._cached_is_repo:
             # Chiedi all'utente se vuole inizializzare una nuova repository
             response = mb.askyesno("Repository non trovata", 
                                    "La directory corrente non è una repository git valida.\n\nVuoi inizializzarla come repository git?")
             if response:
-                # Tenta di inizializzare la repository
-                ok, msg = GitRepo.init_repository()
-                if ok:
+                # Tenta di inizializzare la repository (nel worker)
+                def init_repo():
+                    ok, msg = GitRepo.init_repository()
                     # Crea un commit vuoto per inizializzare la repository
-                    ok_commit, msg_commit = GitRepo.create_initial_commit()
-                    if not ok_commit:
-                        show_error("Errore commit", f"Repository inizializzata ma errore nel commit:\n{msg_commit}")
-                    # Se l'inizializzazione ha successo, aggiorna il flag e abilita i bottoni
-                    self._cached_is_repo = True
-                    self.invalidate_cache()
-                    self.invalidate_github_user_cache()
-                    self.update_dir_label(force_refresh=True)
-                    self._update_branch_info(prune=False)
-                    show_info("Repository inizializzata", msg)
-                    self.btn_pull.config(state="normal")
-                    self.btn_push.config(state="normal")
-                    self.btn_branch.config(state="normal")
-                else:
-                    # Se fallisce, mostra errore e disabilita i bottoni
-                    show_error("Errore", f"Impossibile inizializzare la repository:\n{msg}")
-                    self.btn_pull.config(state="disabled")
-                    self.btn_push.config(state="disabled")
-                    self.btn_branch.config(state="disabled")
+                    commit_result = GitRepo.create_initial_commit() if ok else None
+                    return ok, msg, commit_result
+                self._run_git_task(init_repo, self._on_repo_initialized)
             else:
                 # Utente ha rifiutato l'inizializzazione
                 self.btn_pull.config(state="disabled")
                 self.btn_push.config(state="disabled")
                 self.btn_branch.config(state="disabled")
+                self.btn_history.config(state="disabled")
         else:
             self.btn_pull.config(state="normal")
             self.btn_push.config(state="normal")
             self.btn_branch.config(state="normal")
+            self.btn_history.config(state="normal")
+
+    def _on_repo_initialized(self, result):
+        if isinstance(result, Exception):
+            result = (False, str(result), None)
+        ok, msg, commit_result = result
+        if ok:
+            ok_commit, msg_commit = commit_result
+            if not ok_commit:
+                show_error("Errore commit", f"Repository inizializzata ma errore nel commit:\n{msg_commit}")
+            # Se l'inizializzazione ha successo, aggiorna il flag e abilita i bottoni
+            self.invalidate_cache()
+            self.invalidate_github_user_cache()
+            self.update_dir_label(force_refresh=True)
+            self._update_branch_info(prune=False)
+            show_info("Repository inizializzata", msg)
+            self.btn_pull.config(state="normal")
+            self.btn_push.config(state="normal")
+            self.btn_branch.config(state="normal")
+            self.btn_history.config(state="normal")
+        else:
+            # Se fallisce, mostra errore e disabilita i bottoni
+            show_error("Errore", f"Impossibile inizializzare la repository:\n{msg}")
+            self.btn_pull.config(state="disabled")
+            self.btn_push.config(state="disabled")
+            self.btn_branch.config(state="disabled")
+            self.btn_history.config(state="disabled")
 
     def do_pull(self):
         # Non aggiornare la lista branch all'apertura della sezione Pull
@@ -344,9 +649,117 @@ class GitGuiApp(tk.Tk):
             return
         force = force_var.get() if force_var is not None else False
         if force:
-            ok, msg = GitRepo.pull_force(branch)
+            self._force_pull(branch)
+        else:
+            if self._task_running:
+                show_info("Operazione in corso", "Attendi il completamento dell'operazione in corso.")
+                return
+            operation = self._start_operation(os.getcwd(), GitOperation.PULL_LOCKS)
+            progress_win = ProgressWindow(self, "Pull", f"Pull di '{branch}' in corso...", on_cancel=operation.cancel)
+
+            def on_done(result):
+                progress_win.close()
+                self._on_pull_done(result)
+                if isinstance(result, OperationCancelled):
+                    self._offer_lock_cleanup(operation)
+            self._run_git_task(lambda: GitRepo.pull(branch, on_git_progress=self._git_progress_callback(progress_win),
+                                                    operation=operation), on_done, operation)
+
+    def _force_pull(self, branch):
+        # Force pull: fetch del solo branch remoto, conferma con anteprima di ciò che andrà perso,
+        # backup e 'reset --hard'. Le conferme restano nel main thread, git gira nel worker.
+        if self._task_running:
+            show_info("Operazione in corso", "Attendi il completamento dell'operazione in corso.")
+            return
+        cwd = os.getcwd()
+        operation = self._start_operation(cwd, GitOperation.FETCH_LOCKS)
+        progress_win = ProgressWindow(self, "Force Pull", f"Download di origin/{branch}...", on_cancel=operation.cancel)
+
+        def on_prepared(result):
+            progress_win.close()
+            if isinstance(result, OperationCancelled):
+                show_info("Force Pull annullato", "Force Pull annullato: nessuna modifica è stata fatta.")
+                self._offer_lock_cleanup(operation)
+                return
+            if isinstance(result, Exception):
+                result = (False, str(result))
+            ok, info = result
+            if not ok:
+                show_error("Errore Force Pull", f"Impossibile scaricare origin/{branch}:\n\n{info}")
+                return
+            current = info['current'] or "HEAD (detached)"
+            lost = []
+            if info['ahead']:
+                lost.append(f"{info['ahead']} commit locali non presenti in origin/{branch}")
+            if info['changes']:
+                lost.append(f"le modifiche non committate di {info['changes']} file")
+            details = ("\n\nVerranno scartati:\n- " + "\n- ".join(lost)) if lost else ""
+            if not mb.askyesno("Conferma Force Pull",
+                               f"Il branch '{current}' verrà riportato a origin/{branch} ({info['target'][:7]}).{details}\n\n"
+                               "Commit e modifiche attuali vengono salvati in un backup: "
+                               "potrai ripristinarli con 'Annulla Force Pull'.\n\nContinuare?"):
+                return
+            clean_paths = []
+            untracked = info['untracked']
+            if untracked:
+                preview = "\n".join(untracked[:FORCE_PULL_PREVIEW_FILES])
+                if len(untracked) > FORCE_PULL_PREVIEW_FILES:
+                    preview += f"\n... e altri {len(untracked) - FORCE_PULL_PREVIEW_FILES}"
+                answer = mb.askyesnocancel("File non tracciati",
+                                           f"Rimuovere anche i {len(untracked)} percorsi non tracciati?\n\n{preview}\n\n"
+                                           "ATTENZIONE: i file non tracciati rimossi non sono inclusi nel backup.\n"
+                                           "Sì = rimuovi, No = mantieni, Annulla = interrompi il Force Pull.")
+                if answer is None:
+                    return
+                if answer:
+                    clean_paths = untracked
+            self._run_git_task(lambda: GitRepo.force_pull_apply(info['target'], info['current'], clean_paths, cwd),
+                               lambda result: self._on_force_pull_done("Force Pull", result))
+        self._run_git_task(lambda: GitRepo.force_pull_prepare(branch, cwd, self._git_progress_callback(progress_win),
+                                                              operation), on_prepared, operation)
+
+    def _undo_force_pull(self):
+        # Ripristina il backup dell'ultimo force pull sul branch corrente (dopo conferma)
+        if self._task_running:
+            show_info("Operazione in corso", "Attendi il completamento dell'operazione in corso.")
+            return
+        cwd = os.getcwd()
+
+        def on_backup(backup):
+            if isinstance(backup, Exception) or backup is None:
+                show_info("Annulla Force Pull", "Nessun backup di force pull per il branch corrente.")
+                return
+            name, head, wip = backup
+            extra = " e riapplicate le modifiche non committate salvate" if wip else ""
+            if not mb.askyesno("Annulla Force Pull",
+                               f"Il branch '{name}' verrà riportato a {head[:7]}{extra}.\n\n"
+                               "Le modifiche attuali non committate andranno perse. Continuare?"):
+                return
+            self._run_git_task(lambda: GitRepo.restore_force_pull_backup(cwd),
+                               lambda result: self._on_force_pull_done("Annulla Force Pull", result))
+        self._run_git_task(lambda: GitRepo.get_force_pull_backup(cwd), on_backup)
+
+    def _on_force_pull_done(self, title, result):
+        if isinstance(result, Exception):
+            result = (False, str(result))
+        ok, msg = result
+        self.invalidate_cache()
+        self.update_dir_label(force_refresh=True)
+        if ok:
+            show_info(title, msg or "Operazione completata.")
         else:
-            ok, msg = GitRepo.pull(branch)
+            show_error(f"Errore {title}", msg)
+
+    def _on_pull_done(self, result):
+        if isinstance(result, OperationCancelled):
+            self.invalidate_cache()
+            self.update_dir_label(force_refresh=True)
+            show_info("Pull annullato", "Pull annullato.")
+            return
+        if isinstance(result, Exception):
+            show_error("Errore Pull", str(result))
+            return
+        ok, msg = result
         if ok:
             self.invalidate_cache()
             self.update_dir_label(force_refresh=True)
@@ -355,7 +768,7 @@ class GitGuiApp(tk.Tk):
             else:
                 show_info("Pull Output", msg)
         else:
-            show_error("Errore Pull", msg)
+            show_error("Errore Pull", f"Si è verificato un errore durante il pull:\n\n{msg}\n\nPer risolvere, abilita l'opzione Force Pull.")
 
 
     def do_push(self):
@@ -368,8 +781,7 @@ class GitGuiApp(tk.Tk):
         branch_row.pack(pady=PAD_Y_SECTION, anchor="center", fill="x")
         tk.Label(branch_row, text="Branch remoto:", font=BOLD_FONT, anchor="w").grid(row=0, column=0, padx=(0, PAD_X_BUTTON), sticky="w")
         remote_var = self._push_remote_var
-        current_branch = self._cached_branch if self._cached_branch else GitRepo.get_current_branch()
-        remote_var.set(current_branch)
+        remote_var.set(self._cached_branch or "")
         remote_entry = tk.Entry(branch_row, textvariable=remote_var, font=BOLD_FONT, width=ENTRY_WIDTH_SHORT, state="readonly")
         remote_entry.grid(row=0, column=1)
         files = self._push_files
@@ -401,7 +813,24 @@ class GitGuiApp(tk.Tk):
             self.after(200, periodic_update)
         periodic_update()
 
-        tk.Label(self.main_container, text="Messaggio di commit:", font=BOLD_FONT).pack(pady=PAD_Y_DEFAULT)
+        commit_label_var = tk.StringVar(value="Messaggio di commit:")
+        tk.Label(self.main_container, textvariable=commit_label_var, font=BOLD_FONT).pack(pady=PAD_Y_DEFAULT)
+
+        def refresh_push_state():
+            # Branch e numero di modifiche dalla fotografia più recente
+            snapshot = self._cached_snapshot
+            if snapshot is None:
+                return
+            remote_var.set(snapshot.branch_label)
+            if snapshot.has_status:
+                if snapshot.changes:
+                    commit_label_var.set(f"Messaggio di commit ({snapshot.changes} modifiche):")
+                else:
+                    commit_label_var.set("Messaggio di commit:")
+        refresh_push_state()
+        self._current_section_refresh = refresh_push_state
+        if self._cached_snapshot is None or not self._cached_snapshot.has_status:
+            self._request_state_refresh()
         commit_text = tk.Text(self.main_container, height=TEXT_HEIGHT_COMMIT, width=TEXT_WIDTH_COMMIT, font=BOLD_FONT)
         commit_text.pack(pady=PAD_Y_DEFAULT)
         if self._push_commit_msg:
@@ -429,21 +858,16 @@ class GitGuiApp(tk.Tk):
                   font=BOLD_FONT).pack(side="right", padx=PAD_X_DEFAULT)
 
     def _on_push_confirm(self, files, remote_var, commit_text, force_var):
-        # DRY: usa sempre la stessa logica di espansione file/cartelle con barra avanzamento
-        selected_files = self.get_valid_files(files)
-        if selected_files is None:
-            selected_files = []
-        expanded_files, _ = self._expand_dirs_with_progress(selected_files, self)
-        files_arg = expanded_files if expanded_files else None
-        current_branch = self._cached_branch if self._cached_branch else GitRepo.get_current_branch()
-        branch_name = current_branch
+        branch_name = remote_var.get() or self._cached_branch
         msg = commit_text.get("1.0", "end").strip() if commit_text else ""
         if not self.validate_commit_message(msg):
             self._safe_show_error("Errore", "Il messaggio di commit non può essere vuoto.")
             return
+        force = force_var.get() if force_var else False
+        selected = [f for f in (files or []) if f and isinstance(f, str) and f.strip()]
 
         # Conferma solo se l'utente non ha selezionato alcun file (selezione vuota)
-        if not selected_files or len(selected_files) == 0:
+        if not selected:
             res = mb.askyesno(
                 "Conferma push globale",
                 "Non hai selezionato alcun file o cartella.\n\n"
@@ -452,142 +876,112 @@ class GitGuiApp(tk.Tk):
             )
             if not res:
                 return
+        if self._task_running:
+            show_info("Operazione in corso", "Attendi il completamento dell'operazione in corso.")
+            return
 
-        def threaded_push():
-            try:
-                # Use only correct commit command via GitRepo.push
-                ok, push_msg = GitRepo.push(files_arg, branch_name, msg, force=force_var.get() if force_var else False)
-                def show_push_result():
-                    self.invalidate_cache()
-                    if ok:
-                        self._safe_show_info("Successo", f"Push eseguito con successo al branch {branch_name}")
-                    else:
-                        # Rileva se la repository non existe
-                        if push_msg and push_msg.startswith("REPO_NOT_FOUND:"):
-                            # Estrae il messaggio originale
-                            original_msg = push_msg.replace("REPO_NOT_FOUND:", "", 1)
-                            # Chiedi all'utente se vuole creare la repository
-                            try:
-                                result = mb.askyesno(
-                                    "Repository non trovata",
-                                    f"La repository remota non esiste.\n\n{original_msg}\n\nVuoi crearla su GitHub?"
-                                )
-                                if result:
-                                    # Estrai account e repo name dal remote origin
-                                    current_origin = GitRepo.get_current_origin()
-                                    account, repo_name = GitRepo.parse_github_url(current_origin)
-                                    if account and repo_name:
-                                        create_ok, create_msg = GitRepo.create_remote_repository(repo_name, account)
-                                        if create_ok:
-                                            self._safe_show_info("Successo", create_msg)
-                                            self.show_menu()
-                                        else:
-                                            # Se la creazione fallisce, annulla il commit per evitare blocchi futuri
-                                            reset_ok, reset_msg = GitRepo.reset_last_commit()
-                                            if reset_ok:
-                                                self._safe_show_error("Errore creazione repository", f"{create_msg}\n\n{reset_msg}\n\nPer favore, effettua il login a GitHub e riprova.")
-                                            else:
-                                                self._safe_show_error("Errore creazione repository", f"{create_msg}\n\nErrore durante il reset del commit: {reset_msg}")
-                                    else:
-                                        self._safe_show_error("Errore", "Impossibile estrarre i dati della repository dal remote configurato.")
-                                else:
-                                    # Utente ha detto no - annulla il commit silenziosamente
-                                    _ = GitRepo.reset_last_commit()
-                            except Exception as e:
-                                self._safe_show_error("Errore", f"Errore durante la creazione della repository: {e}")
-                        elif push_msg and ("up to date" in push_msg.lower() or "everything up-to-date" in push_msg.lower()):
-                            self._safe_show_info("Push", f"Nessuna modifica da pushare: il branch locale è già aggiornato con il remoto.")
-                        elif push_msg and "failed to push some refs" in push_msg.lower():
-                            # Errore classico: il remote è avanti. Suggerisci pull prima di push
-                            self._safe_show_error("Errore Push", f"Il repository remoto contiene modifiche che non hai localmente.\n\nSoluzione: esegui PULL prima di fare PUSH di nuovo.\n\n{push_msg}")
-                        else:
-                            self._safe_show_error("Errore Push", push_msg)
-                    self.update_dir_label(force_refresh=True)
-                self.after(0, show_push_result)
-            except Exception as e:
-                self._safe_show_error("Errore", f"Errore durante il push:\n{e}")
-        threading.Thread(target=threaded_push, daemon=True).start()
-
-    def _expand_dirs_with_progress(self, paths, parent_win):
-        # Espansione semplice senza barra di avanzamento
-        all_files = []
-        all_dirs = set()
-        for p in paths:
-            if os.path.isdir(p):
-                all_dirs.add(p)
-                for root, dirs, files in os.walk(p):
-                    all_dirs.add(root)
-                    for file in files:
-                        fpath = os.path.join(root, file)
-                        all_files.append(fpath)
-            else:
-                all_files.append(p)
-        return all_files, list(all_dirs)
-
-
-    def _threaded_expand_and_push(self, selected_files, branch_name, msg, force, current_branch):
-
-        try:
-            expanded_files, _ = self._expand_dirs_with_progress(selected_files, self)
-
-            kwargs = get_subprocess_kwargs()
-            # Trova la root della repo git
-            def find_git_root(path):
-                path = os.path.abspath(path)
-                while True:
-                    if os.path.isdir(os.path.join(path, ".git")):
-                        return path
-                    parent = os.path.dirname(path)
-                    if parent == path:
-                        return None
-                    path = parent
-
-            repo_root = None
-            for p in selected_files:
-                repo_root = find_git_root(p)
-                if repo_root:
-                    break
-            if not repo_root:
-                repo_root = os.getcwd()
-
-            # Sempre aggiungi TUTTI i cambiamenti (inclusi deletions) prima del commit/push
-            try:
-                # Su Windows, nasconde la finestra della console per il comando subprocess
-                # come già fatto in altri punti del codice
-                if os.name == 'nt':
-                    startupinfo = subprocess.STARTUPINFO()
-                    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    kwargs['startupinfo'] = startupinfo
-                # Esegui il comando git add -A senza mostrare la console
-                subprocess.check_output(["git", "add", "-A"], text=True, cwd=repo_root, **kwargs)
-            except Exception as add_exc:
-                self.after(0, lambda: show_error("Errore git add", f"Errore durante 'git add -A':\n{add_exc}"))
+        # Espansione delle cartelle (un solo passaggio, nel worker) e push
+        expander = PathExpander(on_progress=lambda count: self._dispatcher.post(self._update_progress, progress_win, count),
+                                lister=GitRepo.list_changed_files)
+        cwd = os.getcwd()
+        operation = self._start_operation(cwd, GitOperation.PUSH_LOCKS)
+
+        def cancel():
+            expander.cancel()
+            operation.cancel()
+        progress_win = ProgressWindow(self, "Push", "Ricerca dei file selezionati..." if selected else "Commit in corso...",
+                                      on_cancel=cancel)
+
+        def push_task():
+            repo_root = GitRepo.get_repo_root(cwd)
+            paths = None
+            if selected:
+                paths = expander.expand(selected, repo_root)
+                if not paths:
+                    return False, "Nessun file selezionato da committare."
+                self._dispatcher.post(progress_win.set_message, f"Push di {len(paths)} file in corso...")
+            return GitRepo.push(paths, branch_name, msg, force=force, repo_root=repo_root,
+                                on_progress=on_hash_progress,
+                                on_git_progress=self._git_progress_callback(progress_win),
+                                operation=operation)
+
+        def on_hash_progress(done, total):
+            # Avanzamento dell'hashing parallelo dei file grandi (byte elaborati sul totale)
+            self._dispatcher.post(self._update_progress, progress_win, done, total,
+                                  f"{format_bytes(done)} / {format_bytes(total)} elaborati")
+
+        def on_done(result):
+            progress_win.close()
+            if isinstance(result, (ExpansionCancelled, OperationCancelled)):
+                self.invalidate_cache()
+                self.update_dir_label(force_refresh=True)
+                show_info("Push annullato", f"Push annullato: {result}" if str(result) else
+                          "Push annullato: nessuna modifica è stata fatta.")
+                self._offer_lock_cleanup(operation)
                 return
+            if isinstance(result, Exception):
+                show_error("Errore", f"Errore durante il push:\n{result}")
+                return
+            self._on_push_done(branch_name, result, cwd)
+        self._run_git_task(push_task, on_done, operation)
 
-            # Se non ci sono cambiamenti da committare, GitRepo.push gestirà il messaggio
-            ok, push_msg = GitRepo.push(None, branch_name, msg, force=force)
-
-            def show_push_result():
-                self.invalidate_cache()
-                if ok:
-                    if branch_name != current_branch:
-                        show_info("Successo", f"Push eseguito con successo sul branch remoto '{branch_name}' (diverso dal branch attivo '{current_branch}').")
-                    else:
-                        show_info("Successo", f"Push eseguito con successo al branch {branch_name}")
+    def _on_push_done(self, branch_name, result, cwd=None):
+        # cwd: directory da cui è partito il push, dove vanno eseguite anche le azioni successive
+        ok, push_msg = result
+        self.invalidate_cache()
+        if ok:
+            self._safe_show_info("Successo", f"Push eseguito con successo al branch {branch_name}")
+        else:
+            # Rileva se la repository non existe
+            if push_msg and push_msg.startswith("REPO_NOT_FOUND:"):
+                # Estrae il messaggio originale
+                original_msg = push_msg.replace("REPO_NOT_FOUND:", "", 1)
+                # Chiedi all'utente se vuole creare la repository (solo la conferma sul main thread)
+                if mb.askyesno(
+                    "Repository non trovata",
+                    f"La repository remota non esiste.\n\n{original_msg}\n\nVuoi crearla su GitHub?"
+                ):
+                    self._run_git_task(lambda: self._create_missing_remote(cwd), self._on_create_remote_done)
                 else:
-                    if push_msg and ("up to date" in push_msg.lower() or "everything up-to-date" in push_msg.lower()):
-                        show_info("Push", f"Nessuna modifica da pushare: il branch locale è già aggiornato con il remoto.")
-                    elif push_msg and "failed to push some refs" in push_msg.lower():
-                        # Errore classico: il remote è avanti. Suggerisci pull prima di push
-                        show_error("Errore Push", f"Il repository remoto contiene modifiche che non hai localmente.\n\nSoluzione: esegui PULL prima di fare PUSH di nuovo.\n\n{push_msg}")
-                    else:
-                        show_error("Errore Push", push_msg)
-                self.update_dir_label(force_refresh=True)
-            self.after(0, show_push_result)
-        except Exception as e:
-            self.after(0, lambda e=e: show_error("Errore", f"Errore durante l'espansione file:\n{e}"))
+                    # Utente ha detto no - annulla il commit silenziosamente
+                    self._run_git_task(lambda: GitRepo.reset_last_commit(cwd),
+                                       lambda result: self.update_dir_label(force_refresh=True))
+            elif push_msg and ("up to date" in push_msg.lower() or "everything up-to-date" in push_msg.lower()):
+                self._safe_show_info("Push", f"Nessuna modifica da pushare: il branch locale è già aggiornato con il remoto.")
+            elif push_msg and "failed to push some refs" in push_msg.lower():
+                # Errore classico: il remote è avanti. Suggerisci pull prima di push
+                self._safe_show_error("Errore Push", f"Il repository remoto contiene modifiche che non hai localmente.\n\nSoluzione: esegui PULL prima di fare PUSH di nuovo.\n\n{push_msg}")
+            else:
+                self._safe_show_error("Errore Push", push_msg)
+        self.update_dir_label(force_refresh=True)
 
-        # RIMOSSO: codice legacy non più usato dopo refactoring do_push
+    @staticmethod
+    def _create_missing_remote(cwd=None):
+        # Nel worker: crea la repository remota (gh repo create + push); se fallisce annulla il commit
+        # per evitare blocchi futuri. Restituisce (esito, titolo, messaggio).
+        current_origin = GitRepo.get_current_origin(cwd)
+        account, repo_name = GitRepo.parse_github_url(current_origin)
+        if not (account and repo_name):
+            return False, "Errore", "Impossibile estrarre i dati della repository dal remote configurato."
+        create_ok, create_msg = GitRepo.create_remote_repository(repo_name, account, cwd=cwd)
+        if create_ok:
+            return True, "Successo", create_msg
+        reset_ok, reset_msg = GitRepo.reset_last_commit(cwd)
+        if reset_ok:
+            return False, "Errore creazione repository", f"{create_msg}\n\n{reset_msg}\n\nPer favore, effettua il login a GitHub e riprova."
+        return False, "Errore creazione repository", f"{create_msg}\n\nErrore durante il reset del commit: {reset_msg}"
+
+    def _on_create_remote_done(self, result):
+        if isinstance(result, Exception):
+            result = (False, "Errore", f"Errore durante la creazione della repository: {result}")
+        ok, title, msg = result
+        self.invalidate_cache()
+        if ok:
+            self._safe_show_info(title, msg)
+            self.show_menu()
+        else:
+            self._safe_show_error(title, msg)
+        self.update_dir_label(force_refresh=True)
 
     def ensure_file_selection_window(self, files, num_var, after_files_saved):
         # Gestione DRY della finestra di selezione file: solleva se già esiste, crea se non esiste o è stata chiusa.
@@ -619,7 +1013,8 @@ class GitGuiApp(tk.Tk):
                 entry_var=entry_var,
                 action_callback=action_callback,
                 action_text="Cambia Branch",
-                show_force=False
+                show_force=False,
+                show_worktree=True
             ),
             show_delete_branch=True
         )
@@ -636,16 +1031,47 @@ class GitGuiApp(tk.Tk):
                 self._suggested_new_branch = branch
                 self._show_create_branch_section()
             return
-        ok, msg = GitRepo.checkout(branch)
+        if self._worktree_mode.get():
+            cwd = os.getcwd()
+            self._run_git_task(lambda: self._worktree_pool(cwd).acquire(branch), self._on_worktree_switch_done)
+            return
+        self._run_git_task(lambda: GitRepo.checkout(branch, confirm=self._confirm_from_worker), self._on_checkout_done)
+
+    @staticmethod
+    def _worktree_pool(cwd):
+        return WorktreePool(WORKTREE_POOL_DIR, WORKTREE_POOL_MAX, WORKTREE_POOL_MAX_BYTES, WORKTREE_POOL_MAX_AGE_DAYS, cwd=cwd)
+
+    def _on_worktree_switch_done(self, result):
+        if isinstance(result, Exception):
+            show_error("Errore cambio branch", str(result))
+            return
+        ok, msg = result
+        if not ok:
+            show_error("Errore cambio branch", msg)
+            return
+        # Il branch è già estratto nel worktree: basta spostare la directory di lavoro dell'app.
+        # Al prossimo avvio si riapre la repository scelta dall'utente, non il worktree nascosto del pool
+        try:
+            self._set_directory(msg, remember=False)
+        except OSError as e:
+            show_error("Errore cambio branch", f"Impossibile aprire il worktree:\n{e}")
+            return
+        show_info("Cambio branch", f"Worktree:\n{msg}")
+
+    def _on_checkout_done(self, result):
+        if isinstance(result, Exception):
+            show_error("Errore cambio branch", str(result))
+            return
+        ok, msg = result
         if ok:
             self.invalidate_cache()
             self.update_dir_label(force_refresh=True)
-            self.check_repo(force_refresh=True)
+            self.check_repo()
             show_info("Cambio branch", msg)
         else:
             show_error("Errore cambio branch", msg)
 
-    def _common_extra_widgets(self, bottom_frame, entry_var, action_callback, action_text, show_force=False):
+    def _common_extra_widgets(self, bottom_frame, entry_var, action_callback, action_text, show_force=False, show_worktree=False):
         # Crea solo widget extra (es. force checkbox), NON pulsanti di azione.
         # Ritorna la funzione di conferma da collegare all'evento <Return>.
         force_var = tk.BooleanVar(value=False) if show_force else None
@@ -655,6 +1081,11 @@ class GitGuiApp(tk.Tk):
                 font=BOLD_FONT, anchor="center", fg=COLOR_ERROR
             )
             force_chk.pack(side="left", expand=True, padx=PAD_X_DEFAULT)
+            tk.Button(bottom_frame, text="Annulla Force Pull", command=self._undo_force_pull,
+                      font=BOLD_FONT).pack(side="left", padx=PAD_X_DEFAULT)
+        if show_worktree:
+            tk.Checkbutton(bottom_frame, text="Worktree", variable=self._worktree_mode,
+                           font=BOLD_FONT, anchor="center").pack(side="left", expand=True, padx=PAD_X_DEFAULT)
         def on_confirm():
             branch = entry_var.get().strip()
             if show_force:
@@ -668,14 +1099,9 @@ class GitGuiApp(tk.Tk):
         self.clear_content_frame()
         self.button_frame.pack_forget()
         tk.Label(self.main_container, text=title, font=BOLD_FONT).pack(pady=PAD_Y_DEFAULT)
-        all_branches = list(self.branch_info.keys())
-        filtered_branches = list(all_branches)
         entry_var = tk.StringVar()
         entry = tk.Entry(self.main_container, textvariable=entry_var, font=BOLD_FONT)
         entry.pack(pady=PAD_Y_DEFAULT, padx=PAD_X_DEFAULT, fill="x")
-        get_count = lambda: len(filtered_branches)
-        sugg_container, canvas, btn_frame, update_mousewheel = create_scrollable_list(self.main_container, height=CANVAS_HEIGHT, threshold=SCROLL_THRESHOLD, item_count_func=get_count, parent_win=self)
-        sugg_container.pack(pady=PAD_Y_SUGG_CONTAINER, padx=PAD_X_SUGG_CONTAINER, fill="x")
 
         def on_suggestion_click(branch):
             entry_var.set(branch)
@@ -683,26 +1109,20 @@ class GitGuiApp(tk.Tk):
             entry.icursor(tk.END)
             entry.selection_range(0, tk.END)
 
+        # Solo le righe visibili sono widget: la lista resta rapida anche con migliaia di branch
+        sugg_list = VirtualList(self.main_container, height=CANVAS_HEIGHT, threshold=SCROLL_THRESHOLD, parent_win=self,
+                                on_click=on_suggestion_click, empty_text="Nessun branch trovato.",
+                                width=BUTTON_WIDTH_DEFAULT, anchor="w", font=BOLD_FONT)
+        sugg_list.pack(pady=PAD_Y_SUGG_CONTAINER, padx=PAD_X_SUGG_CONTAINER, fill="x")
+
         def update_buttons(*args):
-            for widget in btn_frame.winfo_children():
-                widget.destroy()
-            filtro = entry_var.get().lower()
-            nonlocal filtered_branches
-            filtered_branches = [b for b in all_branches if filtro in b.lower()]
-            found = False
-            for branch in filtered_branches:
-                label = branch
-                if branch in self.branch_info:
-                    label += f" {self.branch_info[branch]}"
-                b = tk.Button(btn_frame, text=label, width=BUTTON_WIDTH_DEFAULT, anchor="w", font=BOLD_FONT,
-                              command=lambda br=branch: on_suggestion_click(br))
-                b.pack(pady=BUTTON_PAD_Y_SUGG, fill="x")
-                found = True
-            if not found:
-                tk.Label(btn_frame, text="Nessun branch trovato.", font=BOLD_FONT).pack(pady=BUTTON_PAD_Y_SUGG)
-            update_mousewheel()
-        entry_var.trace_add("write", update_buttons)
+            # La mappa branch può essere aggiornata dal worker mentre la sezione è aperta:
+            # l'indice viene ricostruito al primo uso dopo ogni aggiornamento
+            info = self.branch_info
+            sugg_list.set_items((b, f"{b} {info[b]}") for b in self.branch_index.search(entry_var.get()))
+        entry_var.trace_add("write", debounced(entry, FILTER_DEBOUNCE_MS, update_buttons))
         update_buttons()
+        self._current_section_refresh = update_buttons
 
         bottom_frame = tk.Frame(self.main_container)
         bottom_frame.pack(side="bottom", fill="x", pady=PAD_Y_BUTTON)
@@ -713,18 +1133,23 @@ class GitGuiApp(tk.Tk):
             if not branch:
                 show_error("Errore", "Nessun branch selezionato.")
                 return
-            # Solo branch locale
-            local_branches = GitRepo.get_local_branches()
+            # Solo branch locale (dall'inventario in cache, senza interrogare git)
+            local_branches = {r.display_name for r in self.branch_records if r.is_local}
             if branch not in local_branches:
                 show_error("Errore", f"Il branch '{branch}' non esiste tra i branch locali.")
                 return
-            if branch == GitRepo.get_current_branch():
+            if branch == self._cached_branch:
                 show_error("Errore", "Non puoi eliminare il branch attualmente attivo.")
                 return
             res = mb.askyesno("Conferma eliminazione", f"Vuoi eliminare il branch locale '{branch}'?\nQuesta azione non è reversibile.")
             if not res:
                 return
-            ok, msg = GitRepo.delete_local_branch(branch)
+            self._run_git_task(lambda: GitRepo.delete_local_branch(branch), on_branch_deleted)
+
+        def on_branch_deleted(result):
+            if isinstance(result, Exception):
+                result = (False, str(result))
+            ok, msg = result
             if ok:
                 self.invalidate_cache()
                 # Non fare prune qui, solo aggiorna la lista branch senza fetch
@@ -734,7 +1159,7 @@ class GitGuiApp(tk.Tk):
                 entry_var.set("")
                 update_buttons()
                 # Aggiorna la sezione branch dopo eliminazione
-                self._show_branch_section(title="Seleziona o filtra il branch:", action_btn_text="Cambia Branch", action_callback=self._do_checkout_action, extra_widgets=lambda bottom_frame, entry_var, action_callback: self._common_extra_widgets(bottom_frame=bottom_frame, entry_var=entry_var, action_callback=action_callback, action_text="Cambia branch", show_force=False), show_delete_branch=True)
+                self._show_branch_section(title="Seleziona o filtra il branch:", action_btn_text="Cambia Branch", action_callback=self._do_checkout_action, extra_widgets=lambda bottom_frame, entry_var, action_callback: self._common_extra_widgets(bottom_frame=bottom_frame, entry_var=entry_var, action_callback=action_callback, action_text="Cambia branch", show_force=False, show_worktree=True), show_delete_branch=True)
             else:
                 show_error("Errore eliminazione branch", msg)
 
@@ -774,11 +1199,7 @@ class GitGuiApp(tk.Tk):
         # Centralized cleanup: destroy scrollable widgets and unbind mousewheel on section change
         def cleanup():
             try:
-                update_mousewheel()  # ensure unbinding if needed
-            except Exception:
-                pass
-            try:
-                sugg_container.destroy()
+                sugg_list.destroy()  # scollega anche la rotella del mouse
             except Exception:
                 pass
             try:
@@ -789,6 +1210,7 @@ class GitGuiApp(tk.Tk):
 
     def clear_content_frame(self):
         # Centralized cleanup for scrollable/mousewheel widgets
+        self._current_section_refresh = None
         if hasattr(self, '_current_section_cleanup') and self._current_section_cleanup:
             try:
                 self._current_section_cleanup()
@@ -836,22 +1258,31 @@ class GitGuiApp(tk.Tk):
     # _build_files_frame eliminata: la gestione della selezione file è ora centralizzata in FileSelectionWindow
 
     def change_directory(self):
+        # Non durante un'operazione: i comandi nel worker si riferiscono alla repository corrente
+        if self._task_running:
+            show_info("Operazione in corso", "Attendi il completamento dell'operazione in corso.")
+            return
         new_dir = filedialog.askdirectory(title="Seleziona nuova directory di lavoro")
         if new_dir:
             try:
-                os.chdir(new_dir)
-                save_last_dir(new_dir)
-                # Invalida TUTTA la cache dopo cambio directory
-                self.invalidate_cache()
-                self.invalidate_github_user_cache()  # Potrebbe cambiare anche l'utente GitHub
-                self.update_dir_label(force_refresh=True)
-                self.check_repo(force_refresh=True)
+                self._set_directory(new_dir)
                 show_info("Cambio directory", f"Directory cambiata in:\n{os.getcwd()}")
-                # Aggiorna la lista branch (anche remoti) dopo cambio directory
-                self._update_branch_info(prune=True)
             except Exception as e:
                 show_error("Errore", f"Impossibile cambiare directory:\n{e}")
 
+    def _set_directory(self, new_dir, remember=True):
+        # remember: directory da riaprire al prossimo avvio (non i worktree del pool, gestiti dall'app)
+        os.chdir(new_dir)
+        if remember:
+            save_last_dir(new_dir)
+        self._watcher.watch(new_dir)
+        # Passa alla cache della nuova repository: se visitata di recente viene mostrata subito
+        self._select_repo_state()
+        self.update_dir_label()
+        self.check_repo()
+        # Aggiorna la lista branch; il fetch dei remoti solo alla prima visita della repository
+        self._update_branch_info(prune=not self._repo_state.has('branches'))
+
     def do_account(self):
         # Mostra la schermata di gestione account con pulsanti Login e Logout
         self.clear_content_frame()
@@ -927,7 +1358,7 @@ class GitGuiApp(tk.Tk):
                             show_error("Errore Login", "Errore durante il login. Assicurati di avere GitHub CLI installato.")
                     
                     # Esegue l'aggiornamento UI nel thread principale
-                    self.after(0, update_ui)
+                    self._dispatcher.post(update_ui)
                     
                 except FileNotFoundError:
                     def show_error_ui():
@@ -936,14 +1367,14 @@ class GitGuiApp(tk.Tk):
                         show_error("GitHub CLI non trovato", 
                                   "GitHub CLI non è installato o non è nel PATH.\n"
                                   "Scaricalo da: https://cli.github.com/")
-                    self.after(0, show_error_ui)
+                    self._dispatcher.post(show_error_ui)
                     
                 except Exception as e:
                     def show_error_ui():
                         self._login_in_progress = False
                         self._update_login_button_state()
                         show_error("Errore", f"Errore durante il login: {str(e)}")
-                    self.after(0, show_error_ui)
+                    self._dispatcher.post(show_error_ui)
             
             # Avvia il thread del login
             thread = threading.Thread(target=login_thread, daemon=True)
@@ -1020,38 +1451,24 @@ class GitGuiApp(tk.Tk):
             new_var.set(self._suggested_new_branch)
             self._suggested_new_branch = None  # Reset dopo l'uso
         
-        # Lista scrollabile dei branch esistenti con filtro
-        all_branches = list(self.branch_info.keys())
-        filtered_branches = list(all_branches)  # iniziale
-        get_count = lambda: len(filtered_branches)
-        sugg_container, canvas, btn_frame, update_mousewheel = create_scrollable_list(self.main_container,height=CANVAS_HEIGHT,threshold=SCROLL_THRESHOLD,item_count_func=get_count,parent_win=self)
-        sugg_container.pack(pady=PAD_Y_SUGG_CONTAINER, padx=PAD_X_SUGG_CONTAINER, fill="x")
-
         def on_branch_click(branch):
             origin_var.set(branch)
             new_entry.focus()
 
+        # Lista scrollabile (virtuale) dei branch esistenti con filtro
+        sugg_list = VirtualList(self.main_container, height=CANVAS_HEIGHT, threshold=SCROLL_THRESHOLD, parent_win=self,
+                                on_click=on_branch_click, empty_text="Nessun branch trovato.",
+                                width=BUTTON_WIDTH_DEFAULT, anchor="w", font=BOLD_FONT)
+        sugg_list.pack(pady=PAD_Y_SUGG_CONTAINER, padx=PAD_X_SUGG_CONTAINER, fill="x")
+
         def update_branch_buttons(*args):
-            # Pulisci i bottoni precedenti
-            for widget in btn_frame.winfo_children():
-                widget.destroy()
-            filtro = origin_var.get().lower()
-            nonlocal filtered_branches
-            filtered_branches = [b for b in all_branches if filtro in b.lower()]
-            found = False
-            for branch in filtered_branches:
-                label = branch
-                if branch in self.branch_info:
-                    label += f" {self.branch_info[branch]}"
-                b = tk.Button(btn_frame, text=label, width=BUTTON_WIDTH_DEFAULT, anchor="w", font=BOLD_FONT, command=lambda br=branch: on_branch_click(br))
-                b.pack(pady=BUTTON_PAD_Y_SUGG, fill="x")
-                found = True
-            if not found:
-                tk.Label(btn_frame, text="Nessun branch trovato.", font=BOLD_FONT).pack(pady=BUTTON_PAD_Y_SUGG)
-            update_mousewheel()
-
-        origin_var.trace_add('write', update_branch_buttons)
+            info = self.branch_info
+            sugg_list.set_items((b, f"{b} {info[b]}") for b in self.branch_index.search(origin_var.get()))
+
+        origin_var.trace_add('write', debounced(origin_entry, FILTER_DEBOUNCE_MS, update_branch_buttons))
+        self._current_section_cleanup = sugg_list.destroy
         update_branch_buttons()
+        self._current_section_refresh = update_branch_buttons
         
         # Frame pulsanti in basso
         bottom_frame = tk.Frame(self.main_container)
@@ -1076,14 +1493,21 @@ class GitGuiApp(tk.Tk):
                 show_error("Errore", f"Il branch '{new_branch}' esiste già.")
                 return
 
-            # Usa la nuova funzione per creare il branch da quello di origine
-            ok, msg = GitRepo.create_and_checkout_from_branch(new_branch, origin_branch)
+            # Usa la nuova funzione per creare il branch da quello di origine (nel worker)
+            self._run_git_task(
+                lambda: GitRepo.create_and_checkout_from_branch(new_branch, origin_branch, confirm=self._confirm_from_worker),
+                lambda result: on_created(result, new_branch, origin_branch)
+            )
 
+        def on_created(result, new_branch, origin_branch):
+            if isinstance(result, Exception):
+                result = (False, str(result))
+            ok, msg = result
             if ok:
                 self.invalidate_cache()
                 self._update_branch_info(prune=False)
                 self.update_dir_label(force_refresh=True)
-                self.check_repo(force_refresh=True)
+                self.check_repo()
                 show_info("Branch creato", f"Branch '{new_branch}' creato con successo da '{origin_branch}'.")
                 self.do_branch()  # Torna alla sezione branch
             else:
@@ -1146,6 +1570,33 @@ class GitGuiApp(tk.Tk):
         
         btn_browse = tk.Button(path_frame, text="Sfoglia", command=browse_folder, font=BOLD_FONT, width=10)
         btn_browse.pack(side="right")
+        # Quinta riga - Modalità di clone (storia limitata, partial clone, un solo branch)
+        mode_frame = tk.Frame(fields_frame)
+        mode_frame.pack(fill="x", pady=(PAD_Y_DEFAULT, 0))
+        mode_labels = list(CLONE_MODES.values())
+        mode_var = tk.StringVar(value=CLONE_MODES['full'])
+        mode_menu = tk.OptionMenu(mode_frame, mode_var, *mode_labels)
+        mode_menu.config(font=DEFAULT_FONT)
+        mode_menu.pack(side="left")
+        depth_var = tk.StringVar(value=str(CLONE_DEFAULT_DEPTH))
+        depth_spin = tk.Spinbox(mode_frame, from_=1, to=100000, textvariable=depth_var, width=6, font=DEFAULT_FONT)
+        depth_spin.pack(side="left", padx=(PAD_X_BUTTON, 0))
+        mirror_var = tk.BooleanVar(value=True)
+        mirror_check = tk.Checkbutton(mode_frame, text="Cache locale", variable=mirror_var, font=DEFAULT_FONT)
+        mirror_check.pack(side="right")
+        single_branch_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(mode_frame, text="Un solo branch", variable=single_branch_var,
+                       font=DEFAULT_FONT).pack(side="right")
+
+        def selected_mode():
+            return next(key for key, label in CLONE_MODES.items() if label == mode_var.get())
+
+        def on_mode_change(*_):
+            # La profondità ha senso solo per il clone con storia limitata, la cache solo per quello completo
+            depth_spin.config(state="normal" if selected_mode() == 'shallow' else "disabled")
+            mirror_check.config(state="normal" if selected_mode() == 'full' else "disabled")
+        mode_var.trace_add("write", on_mode_change)
+        on_mode_change()
         
         # Frame pulsanti in basso
         bottom_frame = tk.Frame(self.main_container)
@@ -1168,19 +1619,136 @@ class GitGuiApp(tk.Tk):
             if not os.path.isdir(path_text):
                 show_error("Errore", f"Percorso destinazione non è valido:\n{path_text}")
                 return
+            mode = selected_mode()
+            single_branch = single_branch_var.get()
+            use_mirror = mode == 'full' and mirror_var.get()
+            depth = None
+            if mode == 'shallow':
+                try:
+                    depth = int(depth_var.get())
+                except ValueError:
+                    depth = 0
+                if depth < 1:
+                    show_error("Errore", "La profondità deve essere un numero di commit maggiore di zero.")
+                    return
             
             clone_url = GitRepo.build_github_url(account_text, repo_text)
-            ok, msg = GitRepo.clone(clone_url, path_text)
-            if ok:
-                show_info("Successo", f"Repository clonata con successo in:\n{msg}")
-                self.show_menu()
-            else:
-                show_error("Errore durante il clone", msg)
+            if self._task_running:
+                show_info("Operazione in corso", "Attendi il completamento dell'operazione in corso.")
+                return
+            # Nessuna repository esistente coinvolta: niente lock da ripulire in caso di annullamento
+            operation = self._start_operation(None)
+            progress_win = ProgressWindow(self, "Clone", f"Clone di {account_text}/{repo_text} in corso...",
+                                          on_cancel=operation.cancel)
+
+            def on_done(result):
+                progress_win.close()
+                if isinstance(result, OperationCancelled):
+                    show_info("Clone annullato", "Clone annullato: la cartella parziale è stata rimossa.")
+                    return
+                if isinstance(result, Exception):
+                    show_error("Errore durante il clone", str(result))
+                    return
+                ok, msg = result
+                if ok:
+                    show_info("Successo", f"Repository clonata con successo in:\n{msg}")
+                    self.show_menu()
+                else:
+                    show_error("Errore durante il clone", msg)
+            on_git_progress = self._git_progress_callback(progress_win)
+
+            def clone_task():
+                reference = None
+                if use_mirror:
+                    # Prima aggiorna la cache locale (solo la differenza dall'ultimo aggiornamento),
+                    # poi il clone copia da lì gli oggetti invece di scaricarli di nuovo
+                    self._dispatcher.post(progress_win.set_message, "Aggiornamento cache locale...")
+                    cache = MirrorCache(MIRROR_CACHE_DIR, MIRROR_CACHE_MAX_BYTES, MIRROR_CACHE_MAX_AGE_DAYS)
+                    reference = cache.refresh(clone_url, on_git_progress=on_git_progress, operation=operation)
+                result = GitRepo.clone(clone_url, path_text, on_git_progress=on_git_progress, operation=operation,
+                                       mode=mode, depth=depth, single_branch=single_branch, reference=reference)
+                if use_mirror:
+                    cache.evict(keep=reference)
+                return result
+            self._run_git_task(clone_task, on_done, operation)
         btn_clone = tk.Button(bottom_frame, text="Clona", command=on_clone, font=BOLD_FONT)
         btn_clone.pack(side="right", padx=PAD_X_DEFAULT)
         # Focus sul primo campo
         account_entry.focus()
 
+    def do_history(self):
+        # Mostra quanta storia remota è presente in locale e permette di scaricarne altra
+        self._show_history_section()
+
+    def _show_history_section(self):
+        self.clear_content_frame()
+        self.button_frame.pack_forget()
+        tk.Label(self.main_container, text="Storia Repository:", font=BOLD_FONT).pack(pady=PAD_Y_SECTION)
+        info_var = tk.StringVar(value="Lettura in corso...")
+        tk.Label(self.main_container, textvariable=info_var, font=DEFAULT_FONT, justify="left",
+                 anchor="w").pack(padx=PAD_X_DEFAULT, fill="both", expand=True)
+        actions_frame = tk.Frame(self.main_container)
+        actions_frame.pack(fill="x", pady=PAD_Y_DEFAULT)
+        btn_deepen = tk.Button(actions_frame, text=f"Approfondisci (+{HISTORY_DEEPEN_STEP})", font=BOLD_FONT, state="disabled")
+        btn_deepen.pack(side="left", expand=True, padx=PAD_X_BUTTON)
+        btn_unshallow = tk.Button(actions_frame, text="Storia completa", font=BOLD_FONT, state="disabled")
+        btn_unshallow.pack(side="left", expand=True, padx=PAD_X_BUTTON)
+        btn_widen = tk.Button(actions_frame, text="Tutti i branch", font=BOLD_FONT, state="disabled")
+        btn_widen.pack(side="left", expand=True, padx=PAD_X_BUTTON)
+        bottom_frame = tk.Frame(self.main_container)
+        bottom_frame.pack(side="bottom", fill="x", pady=PAD_Y_BUTTON)
+        tk.Button(bottom_frame, text="Indietro", command=self.show_menu, font=BOLD_FONT).pack(side="left", padx=PAD_X_DEFAULT)
+        cwd = os.getcwd()
+
+        def show_info_result(info):
+            if not info_var_alive():
+                return
+            lines = []
+            if info['commits'] is not None:
+                lines.append(f"Commit presenti nel branch corrente: {info['commits']}")
+            lines.append("Storia limitata (shallow): sì" if info['shallow'] else "Storia limitata (shallow): no")
+            if info['partial_filter']:
+                lines.append(f"Partial clone: {info['partial_filter']} (gli oggetti mancanti si scaricano quando servono)")
+            lines.append("Branch remoti: solo quello clonato" if info['single_branch'] else "Branch remoti: tutti")
+            info_var.set("\n".join(lines))
+            btn_deepen.config(state="normal" if info['shallow'] else "disabled")
+            btn_unshallow.config(state="normal" if info['shallow'] else "disabled")
+            btn_widen.config(state="normal" if info['single_branch'] else "disabled")
+
+        def info_var_alive():
+            return btn_deepen.winfo_exists()
+
+        def load():
+            self._refresh_worker.request('history', lambda publish: GitRepo.get_history_info(cwd), show_info_result)
+
+        def run(title, action):
+            if self._task_running:
+                show_info("Operazione in corso", "Attendi il completamento dell'operazione in corso.")
+                return
+            operation = self._start_operation(cwd, GitOperation.FETCH_LOCKS)
+            progress_win = ProgressWindow(self, title, f"{title} in corso...", on_cancel=operation.cancel)
+
+            def on_done(result):
+                progress_win.close()
+                self.invalidate_cache()
+                self._update_branch_info()
+                if isinstance(result, OperationCancelled):
+                    show_info(title, "Operazione annullata.")
+                    self._offer_lock_cleanup(operation)
+                elif isinstance(result, Exception):
+                    show_error(title, str(result))
+                elif not result[0]:
+                    show_error(title, result[1])
+                if info_var_alive():
+                    load()
+            self._run_git_task(lambda: action(cwd=cwd, on_git_progress=self._git_progress_callback(progress_win),
+                                              operation=operation), on_done, operation)
+        btn_deepen.config(command=lambda: run("Approfondimento storia",
+                                              lambda **kw: GitRepo.deepen(HISTORY_DEEPEN_STEP, **kw)))
+        btn_unshallow.config(command=lambda: run("Download storia completa", GitRepo.deepen))
+        btn_widen.config(command=lambda: run("Download di tutti i branch", GitRepo.fetch_all_branches))
+        load()
+
     def do_link(self):
         # Mostra la sezione per modificare il link remoto
         self._show_link_section()
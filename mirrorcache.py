@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from gitrepo import GitExecutor
+from gitoperation import OperationCancelled
+
+class MirrorCache:
+    # Cache locale degli oggetti per i clone ripetuti della stessa repository remota.
+    # Per ogni URL tiene una repository bare 'git clone --mirror' in root, aggiornata con un fetch
+    # incrementale prima di ogni clone: il clone la usa con --reference-if-able --dissociate,
+    # quindi dalla rete arriva solo ciò che manca e la nuova cartella non dipende dalla cache
+    # (che può essere eliminata in qualsiasi momento da evict).
+    META_FILE = 'gitbash6-mirror.json'
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, root, max_bytes, max_age_days):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 3600
+
+    @staticmethod
+    def normalize_url(url):
+        # Stessa chiave per le varianti dello stesso remoto (https/ssh, .git finale, maiuscole nell'host)
+        url = url.strip().rstrip('/')
+        if url.endswith('.git'):
+            url = url[:-4]
+        match = re.match(r'^(?:[a-z+]+://)?(?:[^@/]+@)?([^/:]+)[:/](.+)$', url, re.IGNORECASE)
+        if match is None or os.path.isabs(url) or re.match(r'^[A-Za-z]:[\\/]', url):
+            return url
+        return f"{match.group(1).lower()}/{match.group(2)}"
+
+    def path_for(self, url):
+        key = self.normalize_url(url)
+        slug = re.sub(r'[^A-Za-z0-9._-]+', '-', key.rsplit('/', 1)[-1])[:40] or 'repo'
+        return os.path.join(self.root, f"{slug}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}.git")
+
+    @classmethod
+    def _lock_for(cls, path):
+        with cls._locks_guard:
+            return cls._locks.setdefault(path, threading.Lock())
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, self.META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, path, url, refreshed):
+        meta = self._read_meta(path)
+        meta['url'] = url
+        meta['last_used'] = time.time()
+        if refreshed:
+            meta['last_refresh'] = meta['last_used']
+        try:
+            with open(os.path.join(path, self.META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            print(f"[MirrorCache] Impossibile aggiornare i metadati di {path}: {e}")
+
+    @staticmethod
+    def _remove_locks(path, since):
+        # Un fetch annullato lascia i propri lock nella cache: il prossimo aggiornamento fallirebbe
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d != 'objects']
+            for name in files:
+                if name.endswith('.lock'):
+                    lock = os.path.join(root, name)
+                    try:
+                        if os.stat(lock).st_mtime >= since - 1:
+                            os.remove(lock)
+                    except OSError:
+                        pass
+
+    def refresh(self, url, on_git_progress=None, operation=None):
+        # Crea o aggiorna la cache di url e ne restituisce il percorso.
+        # Se l'aggiornamento fallisce restituisce la cache esistente (comunque utile come riferimento),
+        # None se non c'è. L'annullamento (OperationCancelled) viene propagato.
+        path = self.path_for(url)
+        started = time.time()
+        with self._lock_for(path):
+            try:
+                if os.path.isdir(path):
+                    GitExecutor.stream(['git', '--git-dir', path, 'fetch', '--progress', '--prune', 'origin'],
+                                       on_progress=on_git_progress, operation=operation)
+                else:
+                    os.makedirs(self.root, exist_ok=True)
+                    tmp_path = f"{path}.tmp-{os.getpid()}"
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+                    try:
+                        GitExecutor.stream(['git', 'clone', '--mirror', '--progress', url, tmp_path],
+                                           on_progress=on_git_progress, operation=operation)
+                        os.replace(tmp_path, path)
+                    finally:
+                        shutil.rmtree(tmp_path, ignore_errors=True)
+                self._write_meta(path, url, refreshed=True)
+            except OperationCancelled:
+                if os.path.isdir(path):
+                    self._remove_locks(path, started)
+                raise
+            except (subprocess.CalledProcessError, OSError) as e:
+                err = e.output.strip() if getattr(e, 'output', None) else str(e)
+                print(f"[MirrorCache] Errore durante l'aggiornamento della cache di {url}: {err}")
+                if not os.path.isdir(path):
+                    return None
+                self._write_meta(path, url, refreshed=False)
+        return path
+
+    @staticmethod
+    def _size(path):
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    pass
+        return total
+
+    def entries(self):
+        # [(percorso, ultimo_uso, dimensione)] dalle cache usate più di recente
+        result = []
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return result
+        for name in names:
+            path = os.path.join(self.root, name)
+            if not name.endswith('.git') or not os.path.isdir(path):
+                continue
+            last_used = self._read_meta(path).get('last_used')
+            if last_used is None:
+                try:
+                    last_used = os.stat(path).st_mtime
+                except OSError:
+                    continue
+            result.append((path, last_used, self._size(path)))
+        result.sort(key=lambda e: e[1], reverse=True)
+        return result
+
+    def _remove_partial(self, now):
+        # Cartelle temporanee di creazioni interrotte (chiusura forzata dell'applicazione)
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.root, name)
+            try:
+                if '.git.tmp-' in name and now - os.stat(path).st_mtime > 24 * 3600:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def evict(self, keep=None):
+        # Elimina le cache non usate da più di max_age, poi le meno recenti finché il totale
+        # supera max_bytes. keep (la cache appena usata) non viene mai eliminata.
+        removed = []
+        now = time.time()
+        total = 0
+        self._remove_partial(now)
+        for path, last_used, size in self.entries():
+            if path != keep and (now - last_used > self.max_age or total + size > self.max_bytes):
+                with self._lock_for(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                removed.append(path)
+                continue
+            total += size
+        if removed:
+            print(f"[MirrorCache] Cache eliminate: {', '.join(removed)}")
+        return removed
@@ -0,0 +1,234 @@
+import errno
+import json
+import os
+import shutil
+from urllib.parse import quote
+from gitreader import GitDirReader
+
+class UntrackedParking:
+    # Parcheggio dei file non tracciati durante il cambio branch, basato su un manifest.
+    # Gli elementi sono quelli di 'git ls-files -o --directory --exclude-standard': una cartella
+    # interamente non tracciata è un solo elemento, quindi basta un rename per elemento nella stessa
+    # partizione e il tempo non dipende dalla quantità di dati. I percorsi relativi sono conservati.
+    # Struttura: .git-untracked/.parking/<branch>/{manifest.json, files/<percorso relativo>}.
+    # Il manifest viene scritto (in modo atomico) prima di spostare qualcosa; quale elemento si trovi
+    # dove lo dice poi il filesystem, così un'operazione interrotta viene completata alla successiva.
+    LEGACY_DIR = '.git-untracked'
+    PARKING_DIR = os.path.join(LEGACY_DIR, '.parking')
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, repo_root, run_git):
+        # run_git(args) -> output: esecutore dei comandi git nella root (GitExecutor.run)
+        self.root = os.path.abspath(repo_root)
+        self.run_git = run_git
+
+    def _branch_dir(self, branch):
+        # Un nome di branch con '/' diventa un solo livello di cartella
+        return os.path.join(self.root, self.PARKING_DIR, quote(branch, safe=''))
+
+    def _read_manifest(self, branch_dir):
+        try:
+            with open(os.path.join(branch_dir, self.MANIFEST), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[UntrackedParking] Manifest non leggibile in {branch_dir}: {e}")
+            return None
+
+    def _write_manifest(self, branch_dir, manifest):
+        os.makedirs(branch_dir, exist_ok=True)
+        path = os.path.join(branch_dir, self.MANIFEST)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _exclude_parking_dir(self):
+        # La cartella di parcheggio non deve comparire tra i file non tracciati
+        loc = GitDirReader.locate(self.root)
+        if not loc:
+            return
+        exclude = os.path.join(loc[2], 'info', 'exclude')
+        entry = f"/{self.LEGACY_DIR}/"
+        try:
+            with open(exclude, 'r', encoding='utf-8') as f:
+                if entry in (line.strip() for line in f):
+                    return
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return
+        try:
+            os.makedirs(os.path.dirname(exclude), exist_ok=True)
+            with open(exclude, 'a', encoding='utf-8') as f:
+                f.write(f"\n{entry}\n")
+        except OSError as e:
+            print(f"[UntrackedParking] Impossibile aggiornare {exclude}: {e}")
+
+    def _list_untracked(self):
+        output = self.run_git(['ls-files', '-z', '-o', '--directory', '--exclude-standard'])
+        entries = []
+        for rel in output.split('\0'):
+            top = rel.split('/', 1)[0]
+            if rel and top != self.LEGACY_DIR and top != '.git':
+                entries.append(rel)
+        return entries
+
+    @staticmethod
+    def _move(src, dest):
+        # Un rename quando possibile; copia e cancellazione solo se l'elemento è su un'altra partizione
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            os.rename(src, dest)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            print(f"[UntrackedParking] {src} è su un'altra partizione: copia in corso")
+            shutil.move(src, dest)
+
+    @staticmethod
+    def _remove_empty_dirs(top):
+        for current, _, _ in sorted(os.walk(top), key=lambda w: len(w[0]), reverse=True):
+            try:
+                os.rmdir(current)
+            except OSError:
+                pass
+
+    def _finish_parking(self, branch_dir, manifest, resuming=False):
+        # resuming: ripresa di un parcheggio interrotto, in cui una destinazione esistente è un elemento già spostato
+        files_dir = os.path.join(branch_dir, 'files')
+        parked = []
+        for rel in manifest['entries']:
+            src = os.path.join(self.root, rel.rstrip('/'))
+            dest = os.path.join(files_dir, rel.rstrip('/'))
+            if os.path.lexists(dest):
+                # Già spostato prima dell'interruzione, o rimasto da un ripristino precedente: mai sovrascritto
+                if resuming:
+                    parked.append(rel)
+                continue
+            if not os.path.lexists(src):
+                continue
+            try:
+                self._move(src, dest)
+                parked.append(rel)
+            except OSError as e:
+                # L'elemento resta nella working directory (es. file aperto da un altro programma)
+                print(f"[UntrackedParking] Impossibile parcheggiare {rel}: {e}")
+        manifest['state'] = 'parked'
+        self._write_manifest(branch_dir, manifest)
+        return parked
+
+    def _finish_restoring(self, branch_dir, manifest):
+        files_dir = os.path.join(branch_dir, 'files')
+        restored, remaining = [], []
+        for rel in manifest['entries']:
+            src = os.path.join(files_dir, rel.rstrip('/'))
+            dest = os.path.join(self.root, rel.rstrip('/'))
+            if not os.path.lexists(src):
+                continue
+            if os.path.lexists(dest):
+                # Il branch ha ora un file con lo stesso percorso: la copia parcheggiata resta al sicuro
+                print(f"[UntrackedParking] {rel} esiste già nella working directory: resta parcheggiato")
+                remaining.append(rel)
+                continue
+            try:
+                self._move(src, dest)
+                restored.append(rel)
+            except OSError as e:
+                print(f"[UntrackedParking] Impossibile ripristinare {rel}: {e}")
+                remaining.append(rel)
+        if remaining:
+            manifest['state'] = 'parked'
+            manifest['entries'] = remaining
+            self._write_manifest(branch_dir, manifest)
+        else:
+            os.remove(os.path.join(branch_dir, self.MANIFEST))
+            self._remove_empty_dirs(branch_dir)
+        return restored
+
+    def recover(self):
+        # Completa i parcheggi e i ripristini interrotti (chiusura forzata, crash)
+        parking_dir = os.path.join(self.root, self.PARKING_DIR)
+        try:
+            names = os.listdir(parking_dir)
+        except OSError:
+            return
+        for name in names:
+            branch_dir = os.path.join(parking_dir, name)
+            manifest = self._read_manifest(branch_dir)
+            if manifest is None:
+                continue
+            if manifest.get('state') == 'parking':
+                self._finish_parking(branch_dir, manifest, resuming=True)
+            elif manifest.get('state') == 'restoring':
+                self._finish_restoring(branch_dir, manifest)
+
+    def park(self, branch):
+        # Sposta i file non tracciati del branch corrente nel parcheggio; restituisce i percorsi spostati
+        self.recover()
+        branch_dir = self._branch_dir(branch)
+        leftovers = []
+        if self._read_manifest(branch_dir) is not None:
+            # Parcheggio rimasto da un cambio branch fatto fuori dall'applicazione: i file tornano prima al loro posto.
+            # Quelli che non possono tornare (percorso occupato) restano parcheggiati e nel manifest.
+            self.unpark(branch)
+            manifest = self._read_manifest(branch_dir)
+            leftovers = manifest['entries'] if manifest is not None else []
+        entries = []
+        for rel in self._list_untracked():
+            if any(self._overlaps(rel, old) for old in leftovers):
+                # Stesso percorso di un elemento ancora parcheggiato: resta nella working directory
+                print(f"[UntrackedParking] {rel} coincide con un elemento già parcheggiato: non spostato")
+            else:
+                entries.append(rel)
+        if not entries:
+            return []
+        self._exclude_parking_dir()
+        manifest = {'version': 1, 'branch': branch, 'state': 'parking', 'entries': leftovers + entries}
+        self._write_manifest(branch_dir, manifest)
+        return self._finish_parking(branch_dir, manifest)
+
+    @staticmethod
+    def _overlaps(a, b):
+        # Vero se i due percorsi coincidono o uno è una cartella che contiene l'altro
+        a, b = a.rstrip('/') + '/', b.rstrip('/') + '/'
+        return a.startswith(b) or b.startswith(a)
+
+    def unpark(self, branch):
+        # Riporta nella working directory i file parcheggiati per branch; restituisce i percorsi ripristinati
+        self.recover()
+        branch_dir = self._branch_dir(branch)
+        manifest = self._read_manifest(branch_dir)
+        restored = []
+        if manifest is not None:
+            manifest['state'] = 'restoring'
+            self._write_manifest(branch_dir, manifest)
+            restored = self._finish_restoring(branch_dir, manifest)
+        restored += self._unpark_legacy(branch)
+        self._remove_empty_dirs(os.path.join(self.root, self.LEGACY_DIR))
+        return restored
+
+    def _unpark_legacy(self, branch):
+        # Formato precedente: .git-untracked/<branch>/<nome> senza manifest, ripristinato nella root
+        legacy_dir = os.path.join(self.root, self.LEGACY_DIR, branch)
+        if branch.startswith('.') or not os.path.isdir(legacy_dir):
+            return []
+        restored = []
+        for name in os.listdir(legacy_dir):
+            dest = os.path.join(self.root, name)
+            if os.path.lexists(dest):
+                print(f"[UntrackedParking] {name} esiste già nella working directory: resta in {legacy_dir}")
+                continue
+            try:
+                shutil.move(os.path.join(legacy_dir, name), dest)
+                restored.append(name)
+            except (OSError, shutil.Error) as e:
+                print(f"[UntrackedParking] Impossibile ripristinare {name}: {e}")
+        try:
+            os.rmdir(legacy_dir)
+        except OSError:
+            pass
+        return restored
@@ -0,0 +1,108 @@
+import os
+import threading
+
+class ExpansionCancelled(Exception):
+    pass
+
+
+class PathExpander:
+    # Espande i file e le cartelle selezionati per il push in un unico passaggio con os.scandir.
+    # Restituisce percorsi relativi alla root della repository (separatore '/'), normalizzati
+    # e senza duplicati, pronti per GitRepo.push. Pensato per girare nel worker:
+    # riporta l'avanzamento con on_progress(conteggio) ed è annullabile con cancel().
+    # Con lister (es. GitRepo.list_changed_files) il contenuto delle cartelle viene chiesto a git:
+    # solo i file modificati, cancellati o nuovi non ignorati, senza visitare node_modules & co.
+    # La visita con scandir resta come ripiego se lister non è disponibile o fallisce.
+    PROGRESS_EVERY = 250
+
+    def __init__(self, on_progress=None, lister=None):
+        self.on_progress = on_progress
+        self.lister = lister
+        self._cancel = threading.Event()
+        self._count = 0
+
+    def cancel(self):
+        # Chiamabile da qualsiasi thread: l'espansione si interrompe al prossimo elemento
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @staticmethod
+    def _strip_quotes(path):
+        # Accetta anche percorsi incollati tra virgolette ("C:\path\file.txt" o 'C:/path/file.txt')
+        if len(path) > 1 and path[0] == path[-1] and path[0] in '"\'':
+            return path[1:-1]
+        return path
+
+    def _found(self, result, seen, rel):
+        key = os.path.normcase(rel)
+        if key not in seen:
+            seen.add(key)
+            result.append(rel)
+            self._count += 1
+            if self.on_progress and self._count % self.PROGRESS_EVERY == 0:
+                self.on_progress(self._count)
+
+    def _check_cancel(self):
+        if self._cancel.is_set():
+            raise ExpansionCancelled()
+
+    def expand(self, paths, repo_root):
+        # I percorsi fuori dalla repository vengono ignorati, così come le cartelle .git.
+        # I link simbolici non vengono seguiti: git li registra come file.
+        root = os.path.normpath(os.path.abspath(repo_root))
+        root_norm = os.path.normcase(root)
+        prefix_len = len(root) + (0 if root.endswith(os.sep) else 1)
+        result = []
+        seen = set()
+        dirs = []
+        self._count = 0
+        for path in paths:
+            self._check_cancel()
+            if not path or not isinstance(path, str) or not path.strip():
+                continue
+            abs_path = os.path.normpath(os.path.abspath(self._strip_quotes(path.strip())))
+            abs_norm = os.path.normcase(abs_path)
+            if abs_norm == root_norm:
+                rel = ''
+            elif abs_norm.startswith(root_norm.rstrip(os.sep) + os.sep):
+                rel = abs_path[prefix_len:]
+            else:
+                continue
+            if rel and '.git' in rel.split(os.sep):
+                continue
+            if not os.path.isdir(abs_path) or os.path.islink(abs_path):
+                if os.path.lexists(abs_path):
+                    self._found(result, seen, rel.replace(os.sep, '/'))
+                continue
+            dirs.append(abs_path)
+        listed = None
+        if dirs and self.lister is not None:
+            listed = self.lister([d[prefix_len:].replace(os.sep, '/') for d in dirs], root)
+            self._check_cancel()
+        if listed is not None:
+            for rel in listed:
+                self._found(result, seen, rel)
+            dirs = []
+        for abs_path in dirs:
+            stack = [abs_path]
+            while stack:
+                self._check_cancel()
+                current = stack.pop()
+                try:
+                    with os.scandir(current) as it:
+                        entries = list(it)
+                except OSError as e:
+                    print(f"[PathExpander] Cartella non leggibile {current}: {e}")
+                    continue
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != '.git':
+                            stack.append(entry.path)
+                    else:
+                        self._found(result, seen, entry.path[prefix_len:].replace(os.sep, '/'))
+        if self.on_progress:
+            self.on_progress(self._count)
+        return result
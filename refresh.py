@@ -0,0 +1,116 @@
+import queue
+import threading
+import tkinter as tk
+
+class UiDispatcher:
+    # Unico canale dai thread di lavoro al main thread Tk.
+    # I thread accodano funzioni con post(); il main thread le esegue con un polling 'after'.
+    POLL_MS = 30
+
+    def __init__(self, root):
+        self.root = root
+        self._queue = queue.Queue()
+        self._main_thread = threading.current_thread()
+        self._poll()
+
+    def post(self, func, *args):
+        # Esegue func(*args) nel main thread appena possibile (chiamabile da qualsiasi thread).
+        self._queue.put((func, args))
+
+    def call(self, func, *args):
+        # Esegue func(*args) nel main thread e ne attende il risultato (es. una finestra di conferma).
+        if threading.current_thread() is self._main_thread:
+            return func(*args)
+        done = threading.Event()
+        result = {}
+
+        def invoke():
+            try:
+                result['value'] = func(*args)
+            except Exception as e:
+                result['error'] = e
+            finally:
+                done.set()
+        self.post(invoke)
+        done.wait()
+        if 'error' in result:
+            raise result['error']
+        return result.get('value')
+
+    def _poll(self):
+        while True:
+            try:
+                func, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"[UiDispatcher] Errore nella callback: {e}")
+        try:
+            self.root.after(self.POLL_MS, self._poll)
+        except tk.TclError:
+            # Finestra distrutta: il dispatcher si ferma
+            pass
+
+
+class RefreshWorker:
+    # Raccoglie lo stato della repository fuori dal main thread, con un thread per chiave:
+    # chiavi diverse (stato, branch, utente GitHub, fetch) procedono in parallelo.
+    # Le richieste con la stessa chiave vengono accorpate: se ne arrivano altre mentre una è in coda
+    # o in esecuzione, viene pubblicato solo il risultato dell'ultima.
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self._cond = threading.Condition()
+        self._pending = {}       # chiave -> (generazione, gather, on_done)
+        self._generation = {}    # chiave -> ultima generazione richiesta
+        self._threads = {}       # chiave -> thread dedicato
+
+    def request(self, key, gather, on_done):
+        # gather(publish) gira nel worker e restituisce il risultato finale; può chiamare
+        # publish(parziale) per mostrare subito un risultato intermedio.
+        # on_done(risultato) gira nel main thread, solo se la richiesta non è stata superata.
+        with self._cond:
+            generation = self._generation.get(key, 0) + 1
+            self._generation[key] = generation
+            self._pending[key] = (generation, gather, on_done)
+            if key not in self._threads:
+                thread = threading.Thread(target=self._run, args=(key,), name=f'refresh-{key}', daemon=True)
+                self._threads[key] = thread
+                thread.start()
+            self._cond.notify_all()
+
+    def is_current(self, key, generation):
+        with self._cond:
+            return self._generation.get(key) == generation
+
+    def _publish(self, key, generation, on_done, result):
+        def deliver():
+            if self.is_current(key, generation):
+                on_done(result)
+        self.dispatcher.post(deliver)
+
+    def _run(self, key):
+        while True:
+            with self._cond:
+                while key not in self._pending:
+                    self._cond.wait()
+                generation, gather, on_done = self._pending.pop(key)
+            publish = lambda partial, k=key, g=generation, cb=on_done: self._publish(k, g, cb, partial)
+            try:
+                result = gather(publish)
+            except Exception as e:
+                print(f"[RefreshWorker] Errore durante l'aggiornamento '{key}': {e}")
+                continue
+            self._publish(key, generation, on_done, result)
+
+    def run_task(self, func, on_done):
+        # Esegue un'operazione singola (pull, checkout, eliminazione...) in un thread dedicato
+        # e consegna il risultato (o l'eccezione) a on_done nel main thread. Non viene accorpata.
+        def target():
+            try:
+                result = func()
+            except Exception as e:
+                result = e
+            self.dispatcher.post(on_done, result)
+        threading.Thread(target=target, daemon=True).start()
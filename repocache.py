@@ -0,0 +1,178 @@
+import os
+import time
+from collections import OrderedDict
+from gitreader import GitDirReader
+from gitrepo import RepoSnapshot, BranchRecord
+from branchsearch import BranchSearchIndex
+
+class RepoState:
+    # Stato in cache di una singola repository: fotografia (branch, origin, modifiche),
+    # inventario dei branch e utente GitHub. Ogni campo ha la propria validità:
+    # viene invalidato singolarmente (watcher, operazioni git, login) e resta leggibile finché
+    # non arriva il valore nuovo, così l'interfaccia può mostrarlo subito marcato come vecchio.
+    FIELDS = ('snapshot', 'branches', 'github_user')
+
+    def __init__(self, root):
+        self.root = root
+        self.snapshot = None
+        self.branch_records = []
+        self.branch_info = {}
+        self.github_user = None
+        self._branch_index = None  # (branch_info da cui è costruito, BranchSearchIndex)
+        self._stored_at = {}   # campo -> time.time() dell'ultimo aggiornamento
+        self._stamps = {}      # campo -> impronta dei file .git quando è stato letto
+        self._valid = set()
+
+    def _mark(self, field, stamp=None):
+        self._stored_at[field] = time.time()
+        self._stamps[field] = stamp
+        self._valid.add(field)
+
+    def store_snapshot(self, snapshot):
+        self.snapshot = snapshot
+        self._mark('snapshot', snapshot.stamp)
+
+    def store_branches(self, records, info, stamp=None):
+        self.branch_records = records
+        self.branch_info = info
+        self._mark('branches', stamp)
+
+    @property
+    def branch_index(self):
+        # Indice di ricerca costruito alla prima ricerca dopo ogni nuovo inventario
+        if self._branch_index is None or self._branch_index[0] is not self.branch_info:
+            dates = {}
+            for r in self.branch_records:
+                dates[r.display_name] = max(dates.get(r.display_name, 0), r.date or 0)
+            self._branch_index = (self.branch_info, BranchSearchIndex(self.branch_info, dates))
+        return self._branch_index[1]
+
+    def store_github_user(self, user):
+        self.github_user = user
+        self._mark('github_user')
+
+    def has(self, field):
+        return field in self._stored_at
+
+    def is_valid(self, field, ttl=None):
+        # ttl (secondi) serve solo quando nessun watcher può invalidare il campo
+        if field not in self._valid:
+            return False
+        return ttl is None or time.time() - self._stored_at[field] <= ttl
+
+    def invalidate(self, *fields):
+        # Senza argomenti invalida tutti i campi
+        self._valid.difference_update(fields or self.FIELDS)
+
+    def revalidate(self, stamp):
+        # Per una voce non osservata dal watcher: snapshot e branch sono validi solo se
+        # l'impronta attuale dei file .git coincide con quella presa quando sono stati letti
+        for field in ('snapshot', 'branches'):
+            if stamp is not None and self._stamps.get(field) == stamp:
+                self._valid.add(field)
+            else:
+                self._valid.discard(field)
+        if 'snapshot' in self._valid and self.snapshot.has_status:
+            # I conteggi delle modifiche dipendono dai file del worktree, non coperti dall'impronta
+            self.snapshot.has_status = False
+
+    def stamp(self, field):
+        return self._stamps.get(field)
+
+    def to_dict(self):
+        # Forma serializzabile in JSON; l'impronta è salvata solo per i campi ancora validi
+        return {
+            'root': self.root,
+            'snapshot': self.snapshot.to_dict() if self.snapshot is not None else None,
+            'branches': [r.to_dict() for r in self.branch_records] if self.has('branches') else None,
+            'branch_info': self.branch_info,
+            'github_user': self.github_user,
+            'stored_at': self._stored_at,
+            'stamps': {f: s for f, s in self._stamps.items() if f in self._valid},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        # Voce letta dal disco: tutti i campi partono non validi (vedi revalidate)
+        entry = cls(data['root'])
+        if data.get('snapshot') is not None:
+            entry.snapshot = RepoSnapshot.from_dict(data['snapshot'])
+        if data.get('branches') is not None:
+            entry.branch_records = [BranchRecord.from_dict(r) for r in data['branches']]
+            entry.branch_info = dict(data.get('branch_info') or {})
+        entry.github_user = data.get('github_user')
+        entry._stored_at = {f: t for f, t in (data.get('stored_at') or {}).items() if f in cls.FIELDS}
+        entry._stamps = {f: s for f, s in (data.get('stamps') or {}).items() if f in cls.FIELDS}
+        return entry
+
+    def __repr__(self):
+        return f"RepoState({self.root!r}, valid={sorted(self._valid)})"
+
+
+class RepoStateCache:
+    # Cache dello stato per repository, indicizzata dalla radice del worktree.
+    # Tiene in memoria al massimo max_repos repository, eliminando la meno usata di recente.
+    def __init__(self, max_repos=8):
+        self.max_repos = max_repos
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key_for(cwd):
+        # Radice del worktree (la stessa per tutte le sottocartelle), altrimenti la cartella stessa
+        loc = GitDirReader.locate(cwd)
+        path = loc[0] if loc else cwd
+        return os.path.normcase(os.path.realpath(path))
+
+    def get(self, key):
+        # Restituisce la voce di key (creandola se serve) e la segna come usata di recente
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = RepoState(key)
+            # L'account GitHub non dipende dalla repository: parte da quello noto più di recente
+            for other in reversed(self._entries.values()):
+                if other.has('github_user'):
+                    entry.store_github_user(other.github_user)
+                    if not other.is_valid('github_user'):
+                        entry.invalidate('github_user')
+                    break
+            self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_repos:
+            self._entries.popitem(last=False)
+        return entry
+
+    def peek(self, key):
+        # Come get ma senza creare voci né cambiare l'ordine LRU (None se assente o già eliminata)
+        return self._entries.get(key)
+
+    def to_dict(self, version):
+        # Voci dalla più recente alla meno recente
+        return {'version': version, 'repos': [entry.to_dict() for entry in self.entries()]}
+
+    def load(self, data, version):
+        # Carica le voci salvate da to_dict (ignorate se di una versione diversa o danneggiate)
+        if not isinstance(data, dict) or data.get('version') != version:
+            return False
+        try:
+            entries = [RepoState.from_dict(item) for item in data.get('repos', [])[:self.max_repos]]
+        except (KeyError, TypeError, AttributeError) as e:
+            print(f"[RepoStateCache] Cache su disco non valida: {e}")
+            return False
+        for entry in reversed(entries):
+            self._entries[entry.root] = entry
+            self._entries.move_to_end(entry.root)
+        return True
+
+    def invalidate_all(self, *fields):
+        for entry in self._entries.values():
+            entry.invalidate(*fields)
+
+    def entries(self):
+        # Voci dalla più recente alla meno recente
+        return list(reversed(self._entries.values()))
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,64 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class GitTestCase(unittest.TestCase):
+    # Base dei test che lavorano su repository temporanee: ogni test ha una cartella propria e una
+    # configurazione git globale isolata (identità, branch iniziale 'main'), così il risultato non
+    # dipende dalla configurazione della macchina.
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='gitbash6-test-')
+        self.global_config = os.path.join(self.tmp, 'gitconfig')
+        with open(self.global_config, 'w') as f:
+            f.write('[user]\n\tname = Test\n\temail = test@example.com\n'
+                    '[init]\n\tdefaultBranch = main\n')
+        self._saved_env = {k: os.environ.get(k) for k in ('GIT_CONFIG_GLOBAL', 'GIT_CONFIG_NOSYSTEM')}
+        os.environ['GIT_CONFIG_GLOBAL'] = self.global_config
+        os.environ['GIT_CONFIG_NOSYSTEM'] = '1'
+
+    def tearDown(self):
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def add_global_config(self, text):
+        # Aggiunge sezioni al gitconfig globale del test (es. '[uploadpack]\n\tallowFilter = true\n')
+        with open(self.global_config, 'a') as f:
+            f.write(text)
+
+    def path(self, *parts):
+        return os.path.join(self.tmp, *parts)
+
+    def git(self, *args, cwd=None):
+        # Restituisce l'output (stdout) del comando; fallisce il test se git esce con errore
+        return subprocess.run(['git'] + list(args), cwd=cwd, check=True, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True).stdout
+
+    def write(self, path, content='contenuto\n'):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def init_repo(self, name='repo'):
+        # Repository con un primo commit (file.txt)
+        repo = self.path(name)
+        self.git('init', '-q', repo)
+        self.write(os.path.join(repo, 'file.txt'))
+        self.git('add', '.', cwd=repo)
+        self.git('commit', '-q', '-m', 'primo', cwd=repo)
+        return repo
+
+    def commit(self, repo, name, content, message=None):
+        self.write(os.path.join(repo, name), content)
+        self.git('add', name, cwd=repo)
+        self.git('commit', '-q', '-m', message or f'modifica {name}', cwd=repo)
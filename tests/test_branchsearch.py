@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from branchsearch import BranchSearchIndex
+
+NOW = 1_800_000_000
+DAY = 24 * 3600
+
+
+class BranchSearchIndexTest(unittest.TestCase):
+
+    def test_empty_query_keeps_order(self):
+        names = ['main', 'develop', 'feature/login']
+        self.assertEqual(BranchSearchIndex(names).search('  '), names)
+
+    def test_match_levels(self):
+        # prefisso > inizio di parola > sottostringa > sottosequenza
+        index = BranchSearchIndex(['xlogin', 'l-o-g-i-n', 'feature/login', 'login-page', 'fixLogin'], now=NOW)
+        result = index.search('login')
+        self.assertEqual(result[0], 'login-page')
+        self.assertEqual(set(result[1:3]), {'feature/login', 'fixLogin'})
+        self.assertEqual(result[3:], ['xlogin', 'l-o-g-i-n'])
+
+    def test_all_terms_required(self):
+        index = BranchSearchIndex(['feature/login', 'feature/logout', 'fix/login'])
+        self.assertEqual(index.search('feat login'), ['feature/login'])
+        self.assertEqual(index.search('zzz'), [])
+
+    def test_case_insensitive(self):
+        self.assertEqual(BranchSearchIndex(['Release/2.0']).search('release'), ['Release/2.0'])
+
+    def test_recency_breaks_ties(self):
+        dates = {'fix/old': NOW - 365 * DAY, 'fix/new': NOW - DAY}
+        index = BranchSearchIndex(['fix/old', 'fix/new'], dates, now=NOW)
+        self.assertEqual(index.search('fix'), ['fix/new', 'fix/old'])
+        # ma non supera una corrispondenza migliore
+        index = BranchSearchIndex(['hotfix', 'fix-old'], {'hotfix': NOW, 'fix-old': NOW - 365 * DAY}, now=NOW)
+        self.assertEqual(index.search('fix'), ['fix-old', 'hotfix'])
+
+    def test_narrowing_query(self):
+        names = ['feature/a', 'feature/b', 'fix/a']
+        index = BranchSearchIndex(names)
+        self.assertEqual(len(index.search('f')), 3)
+        # La query che estende la precedente cerca tra i risultati precedenti: stesso esito di una ricerca nuova
+        self.assertEqual(index.search('fe'), BranchSearchIndex(names).search('fe'))
+        self.assertEqual(index.search('fea b'), ['feature/b'])
+        # Una query più corta riparte da tutti i nomi
+        self.assertEqual(len(index.search('f')), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import subprocess
+import threading
+import time
+import unittest
+
+from gitfixture import GitTestCase
+from gitoperation import GitOperation, OperationCancelled
+from gitrepo import GitExecutor, GitRepo
+
+# Secondi di attesa del remoto rallentato: molto più dell'annullamento atteso
+REMOTE_DELAY = 30
+# Tempo massimo per un annullamento: TERMINATE_TIMEOUT più un margine per la pulizia
+CANCEL_LIMIT = GitOperation.TERMINATE_TIMEOUT + 3
+
+
+class SlowRemoteTest(GitTestCase):
+    # Annullamento di clone, fetch e push contro una repository bare locale rallentata:
+    # upload-pack attende REMOTE_DELAY secondi prima di inviare il pack (uploadpack.packObjectsHook,
+    # letto solo dalla configurazione globale) e il pre-receive del remoto attende prima di accettare un push.
+
+    def setUp(self):
+        super().setUp()
+        hook = self.path('slow-pack.sh')
+        self.write(hook, f'#!/bin/sh\nsleep {REMOTE_DELAY}\nexec "$@"\n')
+        os.chmod(hook, 0o755)
+        self.add_global_config(f'[uploadpack]\n\tpackObjectsHook = {hook}\n')
+        self.source = self.init_repo('source')
+        self.remote = self.path('remote.git')
+        self._git('clone', '-q', '--bare', self.source, self.remote)
+        self.url = 'file://' + self.remote
+
+    def _git(self, *args, cwd=None):
+        self.git(*args, cwd=cwd)
+
+    def _local_clone(self):
+        # Clone senza rallentamento (repository locale con percorso: nessun upload-pack)
+        path = os.path.join(self.tmp, 'work')
+        self._git('clone', '-q', self.remote, path)
+        self._git('remote', 'set-url', 'origin', self.url, cwd=path)
+        return path
+
+    def _operation(self, *args):
+        operation = GitOperation(*args)
+        self.addCleanup(operation.finish)
+        return operation
+
+    def _advance_remote(self):
+        # Nuovo commit sul remoto: il fetch successivo deve scaricare un pack (e quindi attendere)
+        with open(os.path.join(self.source, 'file.txt'), 'a') as f:
+            f.write('remoto\n')
+        self._git('commit', '-q', '-am', 'remoto', cwd=self.source)
+        self._git('push', '-q', self.remote, 'main', cwd=self.source)
+
+    def _cancel_when_started(self, operation, target):
+        # Esegue target in un thread, annulla appena il primo processo è registrato e
+        # restituisce (risultato o eccezione, secondi dall'annullamento alla fine)
+        result = {}
+
+        def run():
+            try:
+                result['value'] = target()
+            except Exception as e:
+                result['value'] = e
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        deadline = time.time() + 10
+        while not operation._procs and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertTrue(operation._procs, "il comando git non è partito")
+        time.sleep(0.5)
+        cancelled_at = time.time()
+        operation.cancel(wait=True)
+        thread.join(CANCEL_LIMIT)
+        elapsed = time.time() - cancelled_at
+        self.assertFalse(thread.is_alive(), "l'operazione non si è chiusa dopo l'annullamento")
+        return result.get('value'), elapsed
+
+    def test_cancel_clone(self):
+        operation = self._operation()
+        destination = os.path.join(self.tmp, 'clones')
+        os.makedirs(destination)
+        value, elapsed = self._cancel_when_started(
+            operation, lambda: GitRepo.clone(self.url, destination, operation=operation))
+        self.assertIsInstance(value, OperationCancelled)
+        self.assertLess(elapsed, CANCEL_LIMIT)
+        # La cartella parziale del clone viene rimossa
+        self.assertEqual(os.listdir(destination), [])
+
+    def test_cancel_fetch_lists_only_its_own_locks(self):
+        work = self._local_clone()
+        self._advance_remote()
+        operation = self._operation(work, GitOperation.FETCH_LOCKS)
+        git_dir = os.path.join(work, '.git')
+
+        def fetch_and_lock():
+            return GitRepo.fetch(prune=True, cwd=work, operation=operation)
+        thread_result = {}
+
+        def create_locks():
+            # Lock presi durante l'operazione: uno che il fetch può lasciare, uno di un altro comando
+            while not operation._procs:
+                time.sleep(0.05)
+            for name in ('refs/remotes/origin/main.lock', 'index.lock'):
+                with open(os.path.join(git_dir, name), 'w'):
+                    pass
+            thread_result['done'] = True
+        threading.Thread(target=create_locks, daemon=True).start()
+        value, elapsed = self._cancel_when_started(operation, fetch_and_lock)
+        self.assertTrue(thread_result.get('done'))
+        self.assertIsInstance(value, OperationCancelled)
+        self.assertLess(elapsed, CANCEL_LIMIT)
+        self.assertTrue(operation.wait_closed())
+        lock = os.path.join(git_dir, 'refs/remotes/origin/main.lock')
+        # index.lock non può essere del fetch: non viene proposto
+        self.assertEqual(operation.leftover_locks(), [lock])
+        # Nulla viene rimosso senza conferma
+        self.assertTrue(os.path.exists(lock))
+        self.assertEqual(operation.remove_locks([lock]), [lock])
+        self.assertFalse(os.path.exists(lock))
+        self.assertTrue(os.path.exists(os.path.join(git_dir, 'index.lock')))
+
+    def test_locks_not_listed_while_another_operation_runs(self):
+        work = self._local_clone()
+        other = self._operation(work, GitOperation.PULL_LOCKS)
+        operation = self._operation(work, GitOperation.FETCH_LOCKS)
+        lock = os.path.join(work, '.git', 'packed-refs.lock')
+        with open(lock, 'w'):
+            pass
+        try:
+            self.assertEqual(operation.leftover_locks(), [])
+        finally:
+            other.finish()
+        self.assertEqual(operation.leftover_locks(), [lock])
+
+    def test_cancel_push(self):
+        work = self._local_clone()
+        hook = os.path.join(self.remote, 'hooks', 'pre-receive')
+        with open(hook, 'w') as f:
+            f.write(f'#!/bin/sh\nsleep {REMOTE_DELAY}\n')
+        os.chmod(hook, 0o755)
+        with open(os.path.join(work, 'file.txt'), 'a') as f:
+            f.write('modifica\n')
+        self._git('commit', '-q', '-am', 'secondo', cwd=work)
+        before = subprocess.check_output(['git', 'rev-parse', 'main'], cwd=self.remote, text=True).strip()
+        operation = self._operation(work, GitOperation.PUSH_LOCKS)
+        value, elapsed = self._cancel_when_started(
+            operation, lambda: GitExecutor.stream(['git', 'push', '--progress', 'origin', 'main'], cwd=work,
+                                                  operation=operation))
+        self.assertIsInstance(value, OperationCancelled)
+        self.assertLess(elapsed, CANCEL_LIMIT)
+        after = subprocess.check_output(['git', 'rev-parse', 'main'], cwd=self.remote, text=True).strip()
+        self.assertEqual(before, after)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gitprogress import GitProgressParser
+
+
+class GitProgressParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = GitProgressParser()
+
+    def test_remote_percent(self):
+        progress = self.parser.feed('remote: Counting objects:  45% (123/456)\r')
+        self.assertTrue(progress.remote)
+        self.assertEqual(progress.phase, 'Counting objects')
+        self.assertEqual((progress.percent, progress.current, progress.total), (45, 123, 456))
+        self.assertFalse(progress.done)
+        self.assertEqual(progress.label, "Conteggio oggetti (remoto)")
+
+    def test_transfer(self):
+        progress = self.parser.feed('Receiving objects:  37% (123/456), 1.20 MiB | 512.00 KiB/s')
+        self.assertFalse(progress.remote)
+        self.assertAlmostEqual(progress.transferred, 1.2 * 1024 ** 2)
+        self.assertEqual(progress.throughput, 512 * 1024)
+        self.assertEqual(progress.detail(), "37% (123/456) - 1.2 MB - 512.0 KB/s")
+
+    def test_done(self):
+        progress = self.parser.feed('Writing objects: 100% (3/3), 280 bytes | 280.00 KiB/s, done.')
+        self.assertTrue(progress.done)
+        self.assertEqual(progress.transferred, 280)
+        # Senza ', done' la fase è conclusa quando il conteggio arriva al totale
+        self.assertTrue(self.parser.feed('Resolving deltas: 100% (7/7)').done)
+
+    def test_count_only(self):
+        progress = self.parser.feed('Enumerating objects: 1234, done.')
+        self.assertIsNone(progress.total)
+        self.assertEqual(progress.current, 1234)
+        self.assertTrue(progress.done)
+        self.assertEqual(progress.detail(), "1234 oggetti")
+
+    def test_other_lines(self):
+        # Tutto ciò che non è avanzamento resta output del comando
+        for line in ('To github.com:user/repo.git', '   1f49147..18dd3ee  main -> main',
+                     "Cloning into 'repo'...", 'remote: Resolving deltas: fatto', 'error: failed to push some refs', ''):
+            with self.subTest(line=line):
+                self.assertIsNone(self.parser.feed(line))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import unittest
+
+from gitfixture import GitTestCase
+from gitreader import GitDirReader
+
+
+class GitDirReaderTest(GitTestCase):
+    # Le risposte lette dai file .git devono coincidere con quelle dei comandi git equivalenti
+
+    def setUp(self):
+        super().setUp()
+        self.repo = self.init_repo()
+
+    def test_locate(self):
+        sub = os.path.join(self.repo, 'a', 'b')
+        os.makedirs(sub)
+        git_dir = os.path.join(self.repo, '.git')
+        self.assertEqual(GitDirReader.locate(sub), (self.repo, git_dir, git_dir))
+        self.assertEqual(GitDirReader.worktree_root(sub), self.repo)
+        # Dentro .git git si comporta diversamente: si lascia decidere a git
+        self.assertIsNone(GitDirReader.locate(git_dir))
+
+    def test_outside_repository(self):
+        os.makedirs(self.path('vuota'))
+        self.assertIs(GitDirReader.locate(self.path('vuota')), False)
+        self.assertIs(GitDirReader.is_repo(self.path('vuota')), False)
+
+    def test_linked_worktree(self):
+        self.git('branch', 'altro', cwd=self.repo)
+        linked = self.path('linked')
+        self.git('worktree', 'add', '-q', linked, 'altro', cwd=self.repo)
+        root, git_dir, common_dir = GitDirReader.locate(linked)
+        self.assertEqual(root, linked)
+        self.assertEqual(git_dir, os.path.join(self.repo, '.git', 'worktrees', 'linked'))
+        self.assertEqual(common_dir, os.path.join(self.repo, '.git'))
+        self.assertEqual(GitDirReader.current_branch(linked), 'altro')
+        self.assertEqual(GitDirReader.local_branches(linked), ['altro', 'main'])
+
+    def test_branches(self):
+        self.assertEqual(GitDirReader.current_branch(self.repo), 'main')
+        self.git('branch', 'feature/x', cwd=self.repo)
+        self.git('branch', 'impacchettato', cwd=self.repo)
+        # I ref impacchettati (packed-refs) valgono quanto quelli sciolti
+        self.git('pack-refs', '--all', cwd=self.repo)
+        self.git('branch', 'sciolto', cwd=self.repo)
+        self.assertEqual(GitDirReader.local_branches(self.repo), ['feature/x', 'impacchettato', 'main', 'sciolto'])
+        self.git('checkout', '-q', '--detach', cwd=self.repo)
+        self.assertEqual(GitDirReader.current_branch(self.repo), 'HEAD')
+
+    def test_has_commits(self):
+        self.assertTrue(GitDirReader.has_commits(self.repo))
+        empty = self.path('vuota')
+        self.git('init', '-q', empty)
+        self.assertFalse(GitDirReader.has_commits(empty))
+
+    def test_remote_branches_and_origin(self):
+        work = self.path('work')
+        self.git('clone', '-q', self.repo, work)
+        self.git('branch', 'remoto', cwd=self.repo)
+        self.git('fetch', '-q', cwd=work)
+        # origin/HEAD è un ref simbolico: escluso come in 'git branch -r' senza le righe '->'
+        self.assertEqual(GitDirReader.remote_branches(work), ['origin/main', 'origin/remoto'])
+        self.assertEqual(GitDirReader.origin_url(work), self.repo)
+        self.assertEqual(GitDirReader.origin_url(self.repo), '')
+        # Con riscritture url.*.insteadOf serve git per conoscere l'URL effettivo
+        self.git('config', 'url.https://example.com/.insteadOf', 'gh:', cwd=work)
+        self.assertIsNone(GitDirReader.origin_url(work))
+
+    def test_state_stamp(self):
+        stamp = GitDirReader.state_stamp(self.repo)
+        self.assertEqual(stamp, GitDirReader.state_stamp(self.repo))
+        self.commit(self.repo, 'file.txt', 'altro contenuto\n')
+        self.assertNotEqual(stamp, GitDirReader.state_stamp(self.repo))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import os
+import unittest
+
+from gitfixture import GitTestCase
+from gitrepo import BranchRecord, GitRepo, RepoSnapshot
+
+
+class ParseStatusTest(unittest.TestCase):
+    # RepoSnapshot.parse_status su output di 'git status --porcelain=v2 --branch -z' scritti a mano
+
+    def _parse(self, *entries):
+        snap = RepoSnapshot()
+        snap.parse_status('\0'.join(entries) + '\0')
+        return snap
+
+    def test_branch_headers(self):
+        snap = self._parse('# branch.oid 1234567890abcdef1234567890abcdef12345678', '# branch.head feature/x',
+                           '# branch.upstream origin/feature/x', '# branch.ab +2 -3')
+        self.assertTrue(snap.has_commits)
+        self.assertEqual(snap.head_oid, '1234567890abcdef1234567890abcdef12345678')
+        self.assertEqual(snap.branch, 'feature/x')
+        self.assertEqual(snap.upstream, 'origin/feature/x')
+        self.assertEqual((snap.ahead, snap.behind), (2, 3))
+
+    def test_initial_and_detached(self):
+        snap = self._parse('# branch.oid (initial)', '# branch.head (detached)')
+        self.assertFalse(snap.has_commits)
+        self.assertIsNone(snap.head_oid)
+        self.assertIsNone(snap.branch)
+
+    def test_counts(self):
+        snap = self._parse(
+            '1 M. N... 100644 100644 100644 aaa bbb staged.txt',
+            '1 .M N... 100644 100644 100644 aaa aaa unstaged.txt',
+            '1 MM N... 100644 100644 100644 aaa bbb both.txt',
+            # La rinomina porta il percorso originale nel campo successivo, che non va contato
+            '2 R. N... 100644 100644 100644 aaa aaa R100 new name.txt', 'old name.txt',
+            'u UU N... 100644 100644 100644 100644 aaa bbb ccc conflict.txt',
+            '? untracked.txt',
+            '! ignored.log',
+        )
+        self.assertEqual(snap.staged, 3)
+        self.assertEqual(snap.unstaged, 2)
+        self.assertEqual(snap.conflicts, 1)
+        self.assertEqual(snap.untracked, 1)
+        self.assertEqual(snap.changes, 7)
+
+
+class CaptureTest(GitTestCase):
+
+    def test_capture_real_repository(self):
+        repo = self.init_repo()
+        self.git('mv', 'file.txt', 'renamed.txt', cwd=repo)
+        self.write(os.path.join(repo, 'nuovo.txt'))
+        snap = RepoSnapshot.capture(repo)
+        self.assertTrue(snap.is_repo and snap.has_status and snap.has_commits)
+        self.assertEqual(snap.branch, 'main')
+        self.assertEqual((snap.staged, snap.unstaged, snap.untracked), (1, 0, 1))
+
+    def test_capture_outside_repository(self):
+        os.makedirs(self.path('vuota'))
+        snap = RepoSnapshot.capture(self.path('vuota'))
+        self.assertFalse(snap.is_repo)
+        self.assertEqual(snap.branch_label, "(nessun branch)")
+
+
+class BranchInventoryTest(GitTestCase):
+
+    def test_local_and_remote_branches(self):
+        remote = self.init_repo('remote')
+        self.git('branch', 'feature/login', cwd=remote)
+        work = self.path('work')
+        self.git('clone', '-q', remote, work)
+        self.git('checkout', '-q', '-b', 'locale', cwd=work)
+        self.git('remote', 'add', 'upstream', remote, cwd=work)
+        self.git('fetch', '-q', 'upstream', cwd=work)
+        records = GitRepo.get_branch_inventory(cwd=work)
+        names = {(r.remote, r.name) for r in records}
+        self.assertEqual(names, {(None, 'main'), (None, 'locale'), ('origin', 'main'), ('origin', 'feature/login'),
+                                 ('upstream', 'main'), ('upstream', 'feature/login')})
+        # origin/HEAD è un ref simbolico: escluso
+        self.assertNotIn(('origin', 'HEAD'), names)
+        main = next(r for r in records if r.is_local and r.name == 'main')
+        self.assertEqual(main.upstream, 'origin/main')
+        self.assertEqual(main.sha, self.git('rev-parse', 'main', cwd=work).strip())
+        self.assertGreater(main.date, 0)
+        display = {r.display_name for r in records if not r.is_local}
+        self.assertEqual(display, {'main', 'feature/login', 'upstream/main', 'upstream/feature/login'})
+
+    def test_sorted_by_commit_date(self):
+        repo = self.init_repo()
+        self.git('branch', 'vecchio', cwd=repo)
+        self.git('checkout', '-q', '-b', 'recente', cwd=repo)
+        os.environ['GIT_COMMITTER_DATE'] = '2030-01-01T00:00:00'
+        self.addCleanup(os.environ.pop, 'GIT_COMMITTER_DATE', None)
+        self.commit(repo, 'file.txt', 'nuovo\n')
+        self.assertEqual(GitRepo.get_branch_inventory(cwd=repo)[0].name, 'recente')
+
+    def test_record_round_trip(self):
+        record = BranchRecord('feature/x', 'origin', None, 'a' * 40, 1700000000)
+        copy = BranchRecord.from_dict(record.to_dict())
+        self.assertEqual(copy.to_dict(), record.to_dict())
+        self.assertFalse(copy.is_local)
+
+
+class CloneModesTest(GitTestCase):
+    # Modalità di clone contro una repository bare locale servita via file:// (upload-pack vero,
+    # con i filtri abilitati): storia di COMMITS commit su main più un secondo branch.
+    # Le dimensioni misurate per le modalità veloci dipendono dalla repository; qui si verifica
+    # cosa arriva in locale (storia, filtro, branch) e che deepen e fetch_all_branches lo completino.
+    COMMITS = 5
+
+    def setUp(self):
+        super().setUp()
+        self.add_global_config('[uploadpack]\n\tallowFilter = true\n')
+        source = self.init_repo('source')
+        # Il secondo branch resta sul primo commit: non aggiunge storia a un clone --depth di main
+        self.git('branch', 'altro', cwd=source)
+        for i in range(self.COMMITS - 1):
+            self.commit(source, 'file.txt', f'versione {i}\n')
+        remote = self.path('remote.git')
+        self.git('clone', '-q', '--bare', source, remote)
+        self.url = 'file://' + remote
+        os.makedirs(self.path('clones'))
+
+    def test_clone_args(self):
+        self.assertEqual(GitRepo.clone_args('full'), [])
+        self.assertEqual(GitRepo.clone_args('full', single_branch=True), ['--single-branch'])
+        self.assertEqual(GitRepo.clone_args('shallow', 3), ['--depth=3', '--no-single-branch'])
+        self.assertEqual(GitRepo.clone_args('shallow', 0, single_branch=True), ['--depth=1'])
+        self.assertEqual(GitRepo.clone_args('blobless'), ['--filter=blob:none'])
+        self.assertEqual(GitRepo.clone_args('treeless', single_branch=True), ['--filter=tree:0', '--single-branch'])
+
+    def _clone(self, name, **kwargs):
+        destination = self.path('clones', name)
+        os.makedirs(destination)
+        ok, path = GitRepo.clone(self.url, destination, **kwargs)
+        self.assertTrue(ok, path)
+        return path, GitRepo.get_history_info(cwd=path)
+
+    def _branches(self, path):
+        return sorted(r.name for r in GitRepo.get_branch_inventory(cwd=path) if not r.is_local)
+
+    def test_full(self):
+        path, info = self._clone('full')
+        self.assertEqual(info, {'shallow': False, 'partial_filter': '', 'single_branch': False, 'commits': self.COMMITS})
+        self.assertEqual(self._branches(path), ['altro', 'main'])
+
+    def test_shallow(self):
+        path, info = self._clone('shallow', mode='shallow', depth=2)
+        self.assertTrue(info['shallow'])
+        self.assertEqual(info['commits'], 2)
+        self.assertFalse(info['single_branch'])
+        self.assertEqual(self._branches(path), ['altro', 'main'])
+        ok, msg = GitRepo.deepen(cwd=path)
+        self.assertTrue(ok, msg)
+        info = GitRepo.get_history_info(cwd=path)
+        self.assertFalse(info['shallow'])
+        self.assertEqual(info['commits'], self.COMMITS)
+
+    def test_shallow_single_branch(self):
+        path, info = self._clone('single', mode='shallow', depth=1, single_branch=True)
+        self.assertTrue(info['shallow'] and info['single_branch'])
+        self.assertEqual(self._branches(path), ['main'])
+        ok, msg = GitRepo.fetch_all_branches(cwd=path)
+        self.assertTrue(ok, msg)
+        self.assertFalse(GitRepo.get_history_info(cwd=path)['single_branch'])
+        self.assertEqual(self._branches(path), ['altro', 'main'])
+
+    def test_partial(self):
+        for mode, spec in (('blobless', 'blob:none'), ('treeless', 'tree:0')):
+            with self.subTest(mode=mode):
+                path, info = self._clone(mode, mode=mode)
+                self.assertEqual(info['partial_filter'], spec)
+                self.assertFalse(info['shallow'])
+                # Tutti i commit sono presenti; il contenuto del checkout è stato scaricato
+                self.assertEqual(info['commits'], self.COMMITS)
+                with open(os.path.join(path, 'file.txt')) as f:
+                    self.assertEqual(f.read(), f'versione {self.COMMITS - 2}\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import unittest
+
+from gitfixture import GitTestCase
+from gitrepo import GitExecutor
+from parking import UntrackedParking
+
+
+class UntrackedParkingTest(GitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.repo = self.init_repo()
+        self.write(os.path.join(self.repo, '.gitignore'), '*.log\n')
+        self.git('add', '.gitignore', cwd=self.repo)
+        self.git('commit', '-q', '-m', 'ignora i log', cwd=self.repo)
+        self.parking = UntrackedParking(self.repo, lambda args: GitExecutor.run(['git'] + args, cwd=self.repo,
+                                                                                stderr=subprocess.DEVNULL))
+        self.branch_dir = os.path.join(self.repo, UntrackedParking.PARKING_DIR, 'feature%2Fx')
+
+    def _in_repo(self, rel):
+        return os.path.exists(os.path.join(self.repo, rel))
+
+    def _parked(self, rel):
+        return os.path.exists(os.path.join(self.branch_dir, 'files', rel))
+
+    def _manifest(self):
+        with open(os.path.join(self.branch_dir, UntrackedParking.MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_manifest(self, state, entries):
+        os.makedirs(self.branch_dir, exist_ok=True)
+        with open(os.path.join(self.branch_dir, UntrackedParking.MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'branch': 'feature/x', 'state': state, 'entries': entries}, f)
+
+    def test_park_and_unpark(self):
+        self.write(os.path.join(self.repo, 'nuovo.txt'))
+        self.write(os.path.join(self.repo, 'cartella', 'dentro.txt'))
+        self.write(os.path.join(self.repo, 'debug.log'))
+        parked = self.parking.park('feature/x')
+        # Una cartella interamente non tracciata è un solo elemento; i file ignorati restano
+        self.assertEqual(sorted(parked), ['cartella/', 'nuovo.txt'])
+        self.assertFalse(self._in_repo('nuovo.txt') or self._in_repo('cartella'))
+        self.assertTrue(self._in_repo('debug.log'))
+        self.assertEqual(self._manifest()['state'], 'parked')
+        # La cartella di parcheggio è esclusa dai non tracciati
+        status = self.git('status', '--porcelain', cwd=self.repo)
+        self.assertNotIn(UntrackedParking.LEGACY_DIR, status)
+        restored = self.parking.unpark('feature/x')
+        self.assertEqual(sorted(restored), ['cartella/', 'nuovo.txt'])
+        self.assertTrue(self._in_repo('cartella/dentro.txt'))
+        self.assertFalse(os.path.exists(os.path.join(self.repo, UntrackedParking.LEGACY_DIR)))
+
+    def test_resume_interrupted_parking(self):
+        # Interruzione a metà: manifest scritto, 'a.txt' già spostato, 'b.txt' ancora al suo posto
+        self._write_manifest('parking', ['a.txt', 'b.txt'])
+        self.write(os.path.join(self.branch_dir, 'files', 'a.txt'))
+        self.write(os.path.join(self.repo, 'b.txt'))
+        self.parking.recover()
+        self.assertEqual(self._manifest()['state'], 'parked')
+        self.assertTrue(self._parked('a.txt') and self._parked('b.txt'))
+        self.assertFalse(self._in_repo('b.txt'))
+
+    def test_resume_interrupted_restoring(self):
+        self._write_manifest('restoring', ['a.txt', 'b.txt'])
+        self.write(os.path.join(self.repo, 'a.txt'), 'ripristinato\n')
+        self.write(os.path.join(self.branch_dir, 'files', 'b.txt'))
+        self.parking.recover()
+        self.assertTrue(self._in_repo('b.txt'))
+        self.assertFalse(os.path.exists(os.path.join(self.branch_dir, UntrackedParking.MANIFEST)))
+
+    def test_occupied_path_stays_parked(self):
+        self.write(os.path.join(self.repo, 'x.txt'), 'parcheggiato\n')
+        self.parking.park('feature/x')
+        # Nel frattempo il percorso è stato occupato: la copia parcheggiata non viene sovrascritta
+        self.write(os.path.join(self.repo, 'x.txt'), 'nuovo\n')
+        self.assertEqual(self.parking.unpark('feature/x'), [])
+        self.assertEqual(self._manifest()['entries'], ['x.txt'])
+        # Un nuovo parcheggio conserva l'elemento rimasto e non sposta il file con lo stesso percorso
+        self.write(os.path.join(self.repo, 'y.txt'))
+        self.assertEqual(self.parking.park('feature/x'), ['y.txt'])
+        self.assertEqual(sorted(self._manifest()['entries']), ['x.txt', 'y.txt'])
+        with open(os.path.join(self.branch_dir, 'files', 'x.txt')) as f:
+            self.assertEqual(f.read(), 'parcheggiato\n')
+        self.assertTrue(self._in_repo('x.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,258 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+import time
+from gitreader import GitDirReader
+
+class _PollBackend:
+    # Fallback portabile: nessuna notifica, il watcher confronta i stat a ogni intervallo
+    INTERVAL = 1.0
+
+    def set_dirs(self, dirs):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(self.INTERVAL)
+        return True
+
+    def close(self):
+        pass
+
+
+class _InotifyBackend:
+    # Linux: inotify via ctypes, un watch per cartella (inotify non è ricorsivo)
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+            IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 non disponibile')
+        self._wds = {}  # cartella -> watch descriptor
+
+    def set_dirs(self, dirs):
+        wanted = set()
+        for path, recursive in dirs:
+            wanted.add(path)
+            if recursive:
+                for root, subdirs, _ in os.walk(path):
+                    wanted.update(os.path.join(root, d) for d in subdirs)
+        for path in list(self._wds):
+            if path not in wanted:
+                self._libc.inotify_rm_watch(self._fd, self._wds.pop(path))
+        for path in wanted:
+            if path not in self._wds:
+                wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.MASK)
+                if wd >= 0:
+                    self._wds[path] = wd
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return False
+        # Il contenuto degli eventi non serve: cosa è cambiato lo dice il confronto dei stat
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _WindowsBackend:
+    # Windows: FindFirstChangeNotificationW, un handle per cartella (ricorsivo dove serve)
+    FILTER = 0x1 | 0x2 | 0x8 | 0x10  # FILE_NAME | DIR_NAME | SIZE | LAST_WRITE
+    WAIT_TIMEOUT = 0x102
+
+    def __init__(self):
+        from ctypes import wintypes
+        self._wintypes = wintypes
+        self._k32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self._k32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        self._k32.FindFirstChangeNotificationW.argtypes = [wintypes.LPCWSTR, wintypes.BOOL, wintypes.DWORD]
+        self._k32.FindNextChangeNotification.argtypes = [wintypes.HANDLE]
+        self._k32.FindCloseChangeNotification.argtypes = [wintypes.HANDLE]
+        self._k32.WaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL, wintypes.DWORD]
+        self._k32.WaitForMultipleObjects.restype = wintypes.DWORD
+        self._invalid = wintypes.HANDLE(-1).value
+        self._handles = {}  # (cartella, ricorsivo) -> handle
+
+    def set_dirs(self, dirs):
+        wanted = set(dirs)
+        for key in list(self._handles):
+            if key not in wanted:
+                self._k32.FindCloseChangeNotification(self._handles.pop(key))
+        for path, recursive in wanted:
+            if (path, recursive) not in self._handles:
+                handle = self._k32.FindFirstChangeNotificationW(path, recursive, self.FILTER)
+                if handle and handle != self._invalid:
+                    self._handles[(path, recursive)] = handle
+
+    def wait(self, timeout):
+        handles = list(self._handles.values())
+        if not handles:
+            time.sleep(timeout)
+            return False
+        array = (self._wintypes.HANDLE * len(handles))(*handles)
+        index = self._k32.WaitForMultipleObjects(len(handles), array, False, int(timeout * 1000))
+        if index == self.WAIT_TIMEOUT or index >= len(handles):
+            return False
+        self._k32.FindNextChangeNotification(handles[index])
+        return True
+
+    def close(self):
+        for handle in self._handles.values():
+            self._k32.FindCloseChangeNotification(handle)
+        self._handles = {}
+
+
+class RepoWatcher:
+    # Osserva i file che descrivono lo stato della repository (.git/HEAD, config, refs/**,
+    # packed-refs, index) e chiama on_change(categorie) dal proprio thread quando cambiano.
+    # Categorie: 'head', 'index', 'config', 'refs' e 'repo' (repository comparsa o sparita).
+    # Le notifiche del sistema operativo svegliano soltanto il thread: le categorie si ottengono
+    # confrontando i stat dei file, quindi una repository inattiva non costa alcun comando git.
+    WAIT_TIMEOUT = 0.5
+    DEBOUNCE = 0.15  # git scrive più file in sequenza: attende che abbia finito
+
+    def __init__(self, on_change):
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._target = None
+        self._retarget = False
+        self._stopped = False
+        self._loc = None
+        self._signature = {}
+        self._backend = self._create_backend()
+        self._thread = threading.Thread(target=self._run, name='repo-watcher', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _create_backend():
+        try:
+            if sys.platform.startswith('linux'):
+                return _InotifyBackend()
+            if sys.platform == 'win32':
+                return _WindowsBackend()
+        except (OSError, AttributeError) as e:
+            print(f"[RepoWatcher] Notifiche native non disponibili, uso il polling: {e}")
+        return _PollBackend()
+
+    @property
+    def active(self):
+        # False se la cartella osservata non è gestibile leggendo i file (il chiamante usa allora un TTL)
+        return self._loc is not None
+
+    def watch(self, cwd):
+        # Cambia la cartella osservata (chiamabile da qualsiasi thread)
+        with self._lock:
+            self._target = os.path.abspath(cwd)
+            self._retarget = True
+
+    def stop(self):
+        self._stopped = True
+
+    def _locate(self):
+        # Fuori da una repository (False) si osserva solo la comparsa di .git nella cartella corrente;
+        # None indica un caso che solo git sa interpretare e disattiva l'osservazione
+        self._loc = GitDirReader.locate(self._target)
+        self._backend.set_dirs(self._dirs())
+        self._signature = self._stat_files()
+
+    def _dirs(self):
+        if not self._loc:
+            return [(self._target, False)] if self._loc is False else []
+        _, git_dir, common_dir = self._loc
+        dirs = {(git_dir, False), (common_dir, False)}
+        refs = os.path.join(common_dir, 'refs')
+        if os.path.isdir(refs):
+            dirs.add((refs, True))
+        return sorted(dirs)
+
+    def _files(self):
+        # (percorso, categoria) dei file da confrontare
+        if not self._loc:
+            return [(os.path.join(self._target, '.git'), 'repo')] if self._loc is False else []
+        _, git_dir, common_dir = self._loc
+        files = [
+            (os.path.join(git_dir, 'HEAD'), 'head'),
+            (os.path.join(git_dir, 'index'), 'index'),
+            (os.path.join(common_dir, 'config'), 'config'),
+            (os.path.join(common_dir, 'packed-refs'), 'refs'),
+        ]
+        for root, _, filenames in os.walk(os.path.join(common_dir, 'refs')):
+            for name in filenames:
+                if not name.endswith('.lock'):
+                    files.append((os.path.join(root, name), 'refs'))
+        return files
+
+    def _stat_files(self):
+        signature = {}
+        for path, kind in self._files():
+            try:
+                st = os.stat(path)
+                signature[path] = (kind, st.st_mtime_ns, st.st_size, st.st_ino)
+            except OSError:
+                continue
+        return signature
+
+    def _diff(self, old, new):
+        kinds = set()
+        for path in old.keys() | new.keys():
+            if old.get(path) != new.get(path):
+                kinds.add((old.get(path) or new.get(path))[0])
+        return kinds
+
+    def _run(self):
+        while not self._stopped:
+            with self._lock:
+                retarget = self._retarget
+                self._retarget = False
+            if retarget:
+                try:
+                    self._locate()
+                except Exception as e:
+                    print(f"[RepoWatcher] Errore durante l'avvio dell'osservazione: {e}")
+                    self._loc = None
+                continue
+            if self._target is None or not self._backend.wait(self.WAIT_TIMEOUT):
+                if self._target is None:
+                    time.sleep(self.WAIT_TIMEOUT)
+                continue
+            time.sleep(self.DEBOUNCE)
+            try:
+                signature = self._stat_files()
+                kinds = self._diff(self._signature, signature)
+                self._signature = signature
+                if 'repo' in kinds or ('head' in kinds and self._loc and not os.path.isfile(self._files()[0][0])):
+                    # .git creata o rimossa: ricalcola cosa osservare
+                    kinds.add('repo')
+                    self._locate()
+                elif 'refs' in kinds:
+                    # Nuove cartelle sotto refs/ (es. branch 'feature/x') vanno aggiunte ai watch
+                    self._backend.set_dirs(self._dirs())
+            except Exception as e:
+                print(f"[RepoWatcher] Errore durante il controllo dei file: {e}")
+                continue
+            if kinds:
+                try:
+                    self.on_change(kinds)
+                except Exception as e:
+                    print(f"[RepoWatcher] Errore nella notifica: {e}")
+        self._backend.close()
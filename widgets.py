@@ -1,6 +1,6 @@
 import os
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, ttk
 from helpers import (MouseWheelHelper, set_placeholder, clear_placeholder, 
                      count_selected_files, update_counter_var)
 from config import BOLD_FONT, DEFAULT_FONT
@@ -294,6 +294,70 @@ class FileSelectionWindow:
                 self._unbind_mousewheel()
 
 
+class ProgressWindow:
+    # Finestra di avanzamento per le operazioni che girano nel worker, con pulsante Annulla opzionale.
+    # update_progress viene chiamato nel main thread (tramite GitGuiApp._update_progress).
+    def __init__(self, parent, title, message, on_cancel=None):
+        self._on_cancel = on_cancel
+        self.cancelled = False
+        self.win = tk.Toplevel(parent)
+        self.win.title(title)
+        self.win.geometry("380x140")
+        self.win.resizable(False, False)
+        self.win.transient(parent)
+        self.message_var = tk.StringVar(value=message)
+        self.detail_var = tk.StringVar(value="")
+        tk.Label(self.win, textvariable=self.message_var, font=BOLD_FONT).pack(pady=(12, 4))
+        self.bar = ttk.Progressbar(self.win, mode="indeterminate", length=320)
+        self.bar.pack(pady=4)
+        self.bar.start(15)
+        tk.Label(self.win, textvariable=self.detail_var, font=DEFAULT_FONT).pack()
+        self.cancel_btn = None
+        if on_cancel is not None:
+            self.cancel_btn = tk.Button(self.win, text="Annulla", font=BOLD_FONT, command=self.cancel)
+            self.cancel_btn.pack(pady=(6, 0))
+        self.win.protocol("WM_DELETE_WINDOW", self.cancel if on_cancel is not None else (lambda: None))
+
+    def exists(self):
+        try:
+            return bool(self.win.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def update_progress(self, count, total=None, text=None):
+        # Con total la barra diventa determinata, senza torna indeterminata; text sostituisce il dettaglio predefinito
+        if not self.exists():
+            return
+        if total:
+            if str(self.bar.cget("mode")) != "determinate":
+                self.bar.stop()
+                self.bar.config(mode="determinate", maximum=100)
+            self.bar.config(value=min(100, count * 100 / total))
+        elif str(self.bar.cget("mode")) == "determinate":
+            # Una fase senza totale (es: conteggio oggetti) dopo una con percentuale
+            self.bar.config(mode="indeterminate", value=0)
+            self.bar.start(15)
+        self.detail_var.set(text if text is not None else f"{count} file")
+
+    def set_message(self, message):
+        # Dopo Annulla resta visibile "Annullamento in corso..." finché l'operazione non si chiude
+        if self.exists() and not self.cancelled:
+            self.message_var.set(message)
+
+    def cancel(self):
+        if self._on_cancel is None or not self.exists() or self.cancelled:
+            return
+        self.cancelled = True
+        if self.cancel_btn is not None:
+            self.cancel_btn.config(state="disabled")
+        self.message_var.set("Annullamento in corso...")
+        self._on_cancel()
+
+    def close(self):
+        if self.exists():
+            self.bar.stop()
+            self.win.destroy()
+
 class RequestGithubLoginOrAccountDialog:
     # Dialogo unico che mostra prima la scelta tra Login e URL, poi il form di input URL
     def __init__(self, parent, on_login_callback, on_manual_url_callback):
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from urllib.parse import quote
+from gitrepo import GitExecutor
+
+class WorktreePool:
+    # Pool di 'git worktree' gestiti dall'applicazione, uno per branch usato di recente.
+    # Tutti condividono l'object store della repository: passare a un branch del pool significa solo
+    # cambiare la directory di lavoro dell'app, senza riscrivere file né invalidare gli artefatti di build.
+    # I worktree del pool stanno in root/<repository>/<branch>; i meno recenti vengono rimossi oltre
+    # max_worktrees, max_bytes o max_age_days, ma mai se contengono modifiche non committate.
+    # I metadati (ultimo uso e dimensione di ogni worktree) stanno in META_FILE nella cartella del pool:
+    # la dimensione si ricalcola visitando la cartella solo se più vecchia di SIZE_TTL secondi.
+    META_FILE = 'gitbash6-worktrees.json'
+    SIZE_TTL = 24 * 3600
+    _lock = threading.Lock()
+
+    def __init__(self, root, max_worktrees, max_bytes, max_age_days, cwd=None):
+        self.max_worktrees = max_worktrees
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 3600
+        self.cwd = os.path.abspath(cwd or os.getcwd())
+        common_dir = GitExecutor.run(['git', 'rev-parse', '--path-format=absolute', '--git-common-dir'],
+                                     cwd=self.cwd, stderr=subprocess.DEVNULL).strip()
+        self.common_dir = os.path.normcase(os.path.abspath(common_dir))
+        name = os.path.basename(os.path.dirname(self.common_dir)) or 'repo'
+        slug = re.sub(r'[^A-Za-z0-9._-]+', '-', name)[:40]
+        digest = hashlib.sha1(self.common_dir.encode('utf-8')).hexdigest()[:12]
+        self.pool_dir = os.path.join(root, f"{slug}-{digest}")
+
+    def _git(self, args, cwd=None):
+        return GitExecutor.run(['git'] + args, cwd=cwd or self.cwd, stderr=subprocess.STDOUT)
+
+    @staticmethod
+    def _contains(parent, path):
+        parent = os.path.normcase(os.path.abspath(parent))
+        path = os.path.normcase(os.path.abspath(path))
+        return path == parent or path.startswith(parent.rstrip(os.sep) + os.sep)
+
+    def _in_pool(self, path):
+        return self._contains(self.pool_dir, path) and not self._contains(path, self.pool_dir)
+
+    def worktrees(self):
+        # [{path, branch, locked, prunable}] da 'git worktree list --porcelain' (branch None se detached)
+        output = self._git(['worktree', 'list', '--porcelain'])
+        result, current = [], None
+        for line in output.splitlines():
+            if line.startswith('worktree '):
+                current = {'path': line[len('worktree '):], 'branch': None, 'locked': False, 'prunable': False}
+                result.append(current)
+            elif current is None:
+                continue
+            elif line.startswith('branch refs/heads/'):
+                current['branch'] = line[len('branch refs/heads/'):]
+            elif line.startswith('locked'):
+                current['locked'] = True
+            elif line.startswith('prunable'):
+                current['prunable'] = True
+        return result
+
+    def _read_meta(self):
+        # percorso -> {'used': ultimo uso, 'size': byte, 'measured': momento della misura}
+        try:
+            with open(os.path.join(self.pool_dir, self.META_FILE), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(meta, dict):
+            return {}
+        # Formato precedente: percorso -> ultimo uso
+        return {path: info if isinstance(info, dict) else {'used': info} for path, info in meta.items()}
+
+    def _write_meta(self, meta):
+        try:
+            os.makedirs(self.pool_dir, exist_ok=True)
+            with open(os.path.join(self.pool_dir, self.META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            print(f"[WorktreePool] Impossibile aggiornare i metadati di {self.pool_dir}: {e}")
+
+    def _touch(self, path):
+        meta = self._read_meta()
+        key = os.path.normcase(os.path.abspath(path))
+        meta[key] = dict(meta.get(key, {}), used=time.time())
+        self._write_meta(meta)
+
+    def _new_path(self, branch):
+        # Un nome di branch con '/' diventa un solo livello di cartella; un residuo non registrato non viene riusato
+        base = os.path.join(self.pool_dir, quote(branch, safe=''))
+        path, n = base, 1
+        while os.path.lexists(path):
+            n += 1
+            path = f"{base}-{n}"
+        return path
+
+    def acquire(self, branch):
+        # Restituisce (ok, percorso o messaggio) del worktree con branch, creandolo nel pool se serve.
+        # Se il branch è già estratto in un altro worktree (anche quello principale) restituisce quello.
+        with self._lock:
+            try:
+                self.prune()
+                for wt in self.worktrees():
+                    if wt['branch'] == branch and not wt['prunable']:
+                        if self._in_pool(wt['path']):
+                            self._touch(wt['path'])
+                        return True, wt['path']
+                os.makedirs(self.pool_dir, exist_ok=True)
+                path = self._new_path(branch)
+                # Un branch solo remoto viene creato locale con tracking di origin/<branch> (come git checkout)
+                self._git(['worktree', 'add', path, branch])
+                self._touch(path)
+            except subprocess.CalledProcessError as e:
+                return False, e.output.strip() if e.output else str(e)
+            except OSError as e:
+                return False, str(e)
+            self.evict(keep=path)
+            return True, path
+
+    @staticmethod
+    def _size(path):
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    pass
+        return total
+
+    def _is_dirty(self, path):
+        try:
+            return bool(self._git(['status', '--porcelain', '--untracked-files=normal'], cwd=path).strip())
+        except (subprocess.CalledProcessError, OSError):
+            return True
+
+    def entries(self):
+        # [(percorso, branch, ultimo_uso, dimensione, bloccato)] dei worktree del pool, dai più recenti
+        meta = self._read_meta()
+        now = time.time()
+        measured = False
+        result = []
+        for wt in self.worktrees():
+            path = wt['path']
+            if not self._in_pool(path) or wt['prunable'] or not os.path.isdir(path):
+                continue
+            key = os.path.normcase(os.path.abspath(path))
+            info = meta.setdefault(key, {})
+            last_used = info.get('used')
+            if last_used is None:
+                try:
+                    last_used = os.stat(path).st_mtime
+                except OSError:
+                    continue
+            size = info.get('size')
+            if size is None or now - info.get('measured', 0) > self.SIZE_TTL:
+                size = info['size'] = self._size(path)
+                info['measured'] = now
+                measured = True
+            result.append((path, wt['branch'], last_used, size, wt['locked']))
+        if measured:
+            self._write_meta(meta)
+        result.sort(key=lambda e: e[2], reverse=True)
+        return result
+
+    def prune(self):
+        # Dimentica i worktree la cui cartella non esiste più e i metadati rimasti senza worktree
+        self._git(['worktree', 'prune'])
+        meta = self._read_meta()
+        registered = {os.path.normcase(os.path.abspath(wt['path'])) for wt in self.worktrees()}
+        stale = [path for path in meta if path not in registered]
+        if stale:
+            for path in stale:
+                del meta[path]
+            self._write_meta(meta)
+
+    def evict(self, keep=None):
+        # Rimuove i worktree del pool non usati da più di max_age, poi i meno recenti oltre max_worktrees
+        # o max_bytes. Non tocca keep, la directory corrente dell'app, i worktree bloccati
+        # ('git worktree lock') e quelli con modifiche: 'git worktree remove' senza --force le protegge comunque.
+        removed = []
+        now = time.time()
+        count, total = 0, 0
+        protected = [p for p in (keep, os.getcwd()) if p]
+        for path, branch, last_used, size, locked in self.entries():
+            over = now - last_used > self.max_age or count + 1 > self.max_worktrees or total + size > self.max_bytes
+            if over and not locked and not any(self._contains(path, p) for p in protected):
+                if self._is_dirty(path):
+                    print(f"[WorktreePool] Worktree {path} ({branch}) con modifiche: non rimosso")
+                else:
+                    try:
+                        self._git(['worktree', 'remove', path])
+                        removed.append(path)
+                        continue
+                    except subprocess.CalledProcessError as e:
+                        print(f"[WorktreePool] Errore durante la rimozione di {path}: {e.output.strip() if e.output else e}")
+            count += 1
+            total += size
+        if removed:
+            self.prune()
+            print(f"[WorktreePool] Worktree rimossi: {', '.join(removed)}")
+        return removed